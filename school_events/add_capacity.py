@@ -0,0 +1,34 @@
+"""
+Script to add event capacity and the registration waitlist to an existing database.
+Adds event.capacity (empty = unlimited) and registration.status, marks all
+existing registrations as confirmed and indexes registrations by event and status.
+"""
+from app import app, db
+
+def column_names(conn, table):
+    return {row[1] for row in conn.execute(db.text(f"PRAGMA table_info({table})"))}
+
+def add_capacity():
+    with app.app_context():
+        with db.engine.begin() as conn:
+            if 'capacity' not in column_names(conn, 'event'):
+                conn.execute(db.text("ALTER TABLE event ADD COLUMN capacity INTEGER"))
+                print("Capacity column added to event table!")
+            else:
+                print("Capacity column already exists!")
+
+            if 'status' not in column_names(conn, 'registration'):
+                conn.execute(db.text(
+                    "ALTER TABLE registration ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'confirmed'"
+                ))
+                print("Status column added to registration table!")
+            else:
+                print("Status column already exists!")
+
+            conn.execute(db.text(
+                "CREATE INDEX IF NOT EXISTS ix_registration_event_status ON registration (event_id, status)"
+            ))
+        print("Waitlist index added successfully!")
+
+if __name__ == '__main__':
+    add_capacity()
@@ -0,0 +1,19 @@
+"""
+Script to add the data version table used for ETag / Last-Modified headers.
+Creates the data_version table if it doesn't exist and initialises its row.
+"""
+from app import app, db, DataVersion
+from versioning import bump_data_version
+
+def add_data_version():
+    with app.app_context():
+        db.create_all()
+        if db.session.get(DataVersion, 1) is None:
+            with db.engine.begin() as conn:
+                bump_data_version(conn)
+            print("Data version table created!")
+        else:
+            print("Data version table already exists!")
+
+if __name__ == '__main__':
+    add_data_version()
@@ -0,0 +1,44 @@
+"""
+Script to add registration and event indexes to an existing database.
+Duplicate registrations (same student and event) are merged first, because
+the unique index on (user_id, event_id) cannot be created while they exist.
+"""
+from app import app, db
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_registration_user_event ON registration (user_id, event_id)",
+    "CREATE INDEX IF NOT EXISTS ix_registration_event_id ON registration (event_id)",
+    "CREATE INDEX IF NOT EXISTS ix_event_date ON event (date)",
+]
+
+def dedupe_registrations(conn):
+    """Keep the oldest registration of each (user_id, event_id) pair, preserving attendance"""
+    duplicates = conn.execute(db.text(
+        "SELECT user_id, event_id, MIN(id), MAX(attended) FROM registration "
+        "GROUP BY user_id, event_id HAVING COUNT(*) > 1"
+    )).fetchall()
+
+    for user_id, event_id, keep_id, attended in duplicates:
+        conn.execute(db.text(
+            "UPDATE registration SET attended = :attended WHERE id = :keep_id"
+        ), {'attended': attended, 'keep_id': keep_id})
+        conn.execute(db.text(
+            "DELETE FROM registration WHERE user_id = :user_id AND event_id = :event_id AND id != :keep_id"
+        ), {'user_id': user_id, 'event_id': event_id, 'keep_id': keep_id})
+    return len(duplicates)
+
+def add_registration_indexes():
+    with app.app_context():
+        with db.engine.begin() as conn:
+            merged = dedupe_registrations(conn)
+            if merged:
+                print(f"Merged duplicate registrations for {merged} student/event pairs.")
+            else:
+                print("No duplicate registrations found.")
+
+            for statement in INDEXES:
+                conn.execute(db.text(statement))
+        print("Indexes added successfully!")
+
+if __name__ == '__main__':
+    add_registration_indexes()
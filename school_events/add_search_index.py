@@ -0,0 +1,17 @@
+"""
+Script to add the full-text search index to an existing database.
+Creates the FTS5 tables for students and events, fills them from the
+existing rows and installs the triggers that keep them in sync.
+"""
+from app import app, db
+from search import ensure_search_index
+
+def add_search_index():
+    with app.app_context():
+        ensure_search_index(db.engine)
+        users = db.session.execute(db.text("SELECT count(*) FROM user_search")).scalar()
+        events = db.session.execute(db.text("SELECT count(*) FROM event_search")).scalar()
+        print(f"Search index ready ({users} students, {events} events).")
+
+if __name__ == '__main__':
+    add_search_index()
@@ -1,15 +1,64 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, session, g, make_response, abort, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+import hmac
+import os
+import random
 from datetime import datetime
+from matrix import AttendanceMatrix
+import seeding
+import seats
+import export
+from database import configure_database, apply_sqlite_pragmas
+from querystats import init_query_stats
+from metrics import Metrics, init_metrics, metered_pool_class, pool_families, cache_families, password_pool_families, CONTENT_TYPE
+from profiler import init_profiler, profile_directory
+from cache import create_cache, LRUCache
+from identity import load_identity, track_user_changes
+from passwords import create_hasher, create_password_pool, PasswordPoolBusy
+from versioning import track_data_version, current_data_version, bump_data_version, conditional_get
+from search import ensure_search_index, register_czech_collation, CZECH_COLLATION, match_query, matching_user_ids, matching_event_ids, search_users, search_events
+from pagination import parse_limit, decode_cursor, keyset_after, keyset_order, next_cursor
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'  # Change this to a secure key in production
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///school_events.db'
+configure_database(app)  # URL, pool and SQLite pragmas from config.py / DATABASE_URL
+app.config['RESPONSE_CACHE_BACKEND'] = 'lru'  # 'lru' or 'null' to disable
+app.config['RESPONSE_CACHE_MAX_ENTRIES'] = 256
+app.config['RESPONSE_CACHE_TTL'] = 60  # seconds, bounds staleness after writes made by scripts
+app.config['USER_CACHE_MAX_ENTRIES'] = 1024
+app.config['USER_CACHE_TTL'] = 30  # seconds, bounds staleness after user changes made by scripts
+# 'strong' for real accounts, 'fast' only for test runs and throwaway databases
+app.config['PASSWORD_HASH_PROFILE'] = os.environ.get('PASSWORD_HASH_PROFILE', 'strong')
+app.config['PASSWORD_POOL_WORKERS'] = None  # processes hashing for /login and /register, None = CPU count
+app.config['PASSWORD_POOL_MAX_PENDING'] = None  # jobs before answering 503, None = 8 per worker
+app.config['PASSWORD_POOL_RETRY_AFTER'] = 5  # seconds, sent with the 503
+app.config['SLOW_QUERY_THRESHOLD_MS'] = 100  # log slower queries with their route, None to disable
+app.config['QUERY_STATS_HEADERS'] = False  # X-Query-Count / X-Query-Time headers, always on in debug mode
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # bearer token for scraping /admin/metrics without a login
+app.config['PROFILER_DIRECTORY'] = None  # where ?_profile=1 writes profiles, None = instance/profiles
+app.config['PROFILER_MAX_PROFILES'] = 50  # older profiles are deleted
+app.config['PROFILER_SAMPLE_INTERVAL'] = 0.001  # seconds between stack samples for the flamegraph
+metrics = Metrics()
+if app.config['SQLALCHEMY_ENGINE_OPTIONS']:  # In-memory databases keep their single-connection pool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'] = metered_pool_class(metrics)
 db = SQLAlchemy(app)
+with app.app_context():
+    apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    register_czech_collation(db.engine)
+    init_query_stats(app, db.engine)
+init_metrics(app, metrics)
+response_cache = create_cache(app.config)
+user_cache = LRUCache(max_entries=app.config['USER_CACHE_MAX_ENTRIES'], ttl=app.config['USER_CACHE_TTL'])
+password_hasher = create_hasher(app.config)
+password_pool = create_password_pool(app.config, password_hasher)
+metrics.add_collector(lambda: pool_families(db.engine.pool))
+metrics.add_collector(lambda: cache_families({'response': response_cache, 'user': user_cache}))
+metrics.add_collector(lambda: password_pool_families(password_pool))
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
+init_profiler(app, lambda: current_user.is_authenticated and current_user.is_admin)
 
 # Models
 class User(UserMixin, db.Model):
@@ -37,8 +86,9 @@ def format_datetime(dt):
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
+    date = db.Column(db.DateTime, nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
+    capacity = db.Column(db.Integer, nullable=True)  # None = unlimited
     registrations = db.relationship('Registration', backref='event', lazy=True, cascade='all, delete-orphan')
 
     @property
@@ -46,50 +96,135 @@ class Event(db.Model):
         return format_datetime(self.date)
 
 class Registration(db.Model):
+    __table_args__ = (
+        # One registration per student and event; also serves lookups by user_id
+        db.Index('ix_registration_user_event', 'user_id', 'event_id', unique=True),
+        # Confirmed seat counts and the waitlist of an event
+        db.Index('ix_registration_event_status', 'event_id', 'status'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     attended = db.Column(db.Boolean, default=False)
     registration_date = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(20), nullable=False, default=seats.CONFIRMED, server_default=seats.CONFIRMED)
     user = db.relationship('User', backref=db.backref('registrations', lazy=True))
 
+class DataVersion(db.Model):
+    """Single-row counter bumped by every committed write to User, Event or Registration"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+track_data_version(db.session, [User, Event, Registration])
+track_user_changes(db.session, User, user_cache)
+
+def data_version():
+    """(version, updated_at) of the data, read once per request"""
+    if 'data_version' not in g:
+        g.data_version = current_data_version(db.session.connection())
+    return g.data_version
+
+def user_variant():
+    """Part of the ETag for responses that differ per user"""
+    return f"u{current_user.id}" if current_user.is_authenticated else 'anon'
+
+def user_day_variant():
+    """Part of the ETag for responses that also depend on today's date"""
+    return f"{user_variant()}-{datetime.now().date().isoformat()}"
+
+# Changes to templates or scripts on deploy must invalidate ETags issued before
+ETAG_SALT = format(int(max(
+    os.path.getmtime(os.path.join(root, name))
+    for folder in ('templates', 'static')
+    for root, _, names in os.walk(os.path.join(app.root_path, folder))
+    for name in names
+)), 'x')
+
+def conditional(vary=user_variant):
+    return conditional_get(data_version, vary=vary, salt=ETAG_SALT)
+
+def seat_counts(event_ids=None):
+    """Return {event_id: (confirmed, waitlisted)} from a single GROUP BY query"""
+    rows = db.session.query(
+        Registration.event_id,
+        db.func.sum(db.case((Registration.status == seats.CONFIRMED, 1), else_=0)),
+        db.func.sum(db.case((Registration.status == seats.WAITLISTED, 1), else_=0))
+    )
+    if event_ids is not None:
+        rows = rows.filter(Registration.event_id.in_(event_ids))
+    return {event_id: (confirmed, waitlisted) for event_id, confirmed, waitlisted in rows.group_by(Registration.event_id)}
+
+def registration_statuses(user_id):
+    """Return {event_id: status} of the user's registrations"""
+    rows = db.session.query(Registration.event_id, Registration.status).filter(Registration.user_id == user_id)
+    return dict(rows.all())
+
+def parse_capacity(value):
+    """Capacity from a form field, returns (capacity, error); an empty field means unlimited"""
+    if not value or not value.strip():
+        return None, None
+    try:
+        capacity = int(value)
+    except ValueError:
+        return None, 'Capacity must be a whole number'
+    if capacity < 1:
+        return None, 'Capacity must be at least 1'
+    return capacity, None
+
+def server_busy(template, busy):
+    """503 with Retry-After when the password pool is saturated"""
+    flash('The server is busy right now, please try again in a few seconds')
+    response = make_response(render_template(template), 503)
+    response.headers['Retry-After'] = str(busy.retry_after)
+    return response
+
+def rehash_password(user, password):
+    """Upgrade a hash made with outdated parameters while the plain password is at hand"""
+    if not password_pool.needs_rehash(user.password_hash):
+        return
+    try:
+        user.password_hash = password_pool.hash(password)
+        db.session.commit()
+    except PasswordPoolBusy:
+        pass  # The login still succeeds, the next one upgrades the hash
+
+def fetch_identity(user_id):
+    return db.session.execute(
+        db.select(User.id, User.username, User.name, User.is_admin).where(User.id == user_id)
+    ).first()
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_identity(user_cache, int(user_id), fetch_identity)
 
 # Routes
 @app.route('/')
 def index():
-    events = Event.query.order_by(Event.date).all()
-    return render_template('index.html', events=events)
+    # Pending flash messages are rendered once, so that page must not be cached or revalidated
+    if session.get('_flashes'):
+        events = Event.query.order_by(Event.date).all()
+        return render_template('index.html', events=events)
+    return index_page()
+
+@conditional()
+def index_page():
+    # Anonymous visitors all get the same page
+    if current_user.is_authenticated:
+        events = Event.query.order_by(Event.date).all()
+        return render_template('index.html', events=events)
+    return response_cache.get_or_set(
+        ('index', data_version()[0]),
+        lambda: render_template('index.html', events=Event.query.order_by(Event.date).all()),
+        tags=('events',)
+    )
 
 @app.route('/students')
 @login_required
 def students():
-    students = User.query.filter_by(is_admin=False).order_by(User.name, User.username).all()
-    events = Event.query.order_by(Event.date).all()
-    registrations = Registration.query.all()
-    
-    # Create a matrix of student registrations and attendance
-    student_matrix = {}
-    for student in students:
-        student_matrix[student.id] = {}
-        for event in events:
-            registration = next((r for r in registrations if r.user_id == student.id and r.event_id == event.id), None)
-            if registration:
-                student_matrix[student.id][event.id] = {
-                    'registered': True,
-                    'attended': registration.attended,
-                    'registration_id': registration.id
-                }
-            else:
-                student_matrix[student.id][event.id] = {
-                    'registered': False,
-                    'attended': False,
-                    'registration_id': None
-                }
-    
-    return render_template('students.html', students=students, events=events, student_matrix=student_matrix)
+    # The list and the attendance matrix are loaded by the React component from /api/students and /api/matrix
+    return render_template('students.html')
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -98,7 +233,12 @@ def login():
         password = request.form.get('password')
         
         user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password_hash, password):
+        try:
+            valid = user is not None and password_pool.verify(user.password_hash, password)
+        except PasswordPoolBusy as busy:
+            return server_busy('login.html', busy)
+        if valid:
+            rehash_password(user, password)
             login_user(user)
             return redirect(url_for('index'))
         flash('Invalid username or password')
@@ -121,9 +261,14 @@ def register():
             flash('Username already exists')
             return render_template('register.html')
 
+        try:
+            password_hash = password_pool.hash(password)
+        except PasswordPoolBusy as busy:
+            return server_busy('register.html', busy)
+
         user = User(
             username=username,
-            password_hash=generate_password_hash(password),
+            password_hash=password_hash,
             name=name
         )
         db.session.add(user)
@@ -141,19 +286,68 @@ def logout():
 @app.route('/event/<int:event_id>')
 def event_details(event_id):
     event = Event.query.get_or_404(event_id)
-    return render_template('event_details.html', event=event)
+    confirmed, waitlisted = seat_counts([event_id]).get(event_id, (0, 0))
+    registration = None
+    position = None
+    if current_user.is_authenticated:
+        registration = Registration.query.filter_by(user_id=current_user.id, event_id=event_id).first()
+        if registration and registration.status == seats.WAITLISTED:
+            position = seats.waitlist_position(db.session.connection(), registration.id)
+    return render_template('event_details.html', event=event, registration=registration,
+                           confirmed=confirmed, waitlisted=waitlisted, waitlist_position=position)
+
+def reserve_seat(event_id):
+    """Register the current user, returns (registration_id, status, waitlist position)
+
+    Raises IntegrityError if already registered; returns None if the event does not exist.
+    """
+    try:
+        reserved = seats.reserve_seat(db.session.connection(), current_user.id, event_id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise
+    if reserved is None:
+        return None
+    response_cache.invalidate('registrations')
+    registration_id, status = reserved
+    position = seats.waitlist_position(db.session.connection(), registration_id) if status == seats.WAITLISTED else None
+    return registration_id, status, position
+
+def release_seat(event_id):
+    """Cancel the current user's registration, returns False if there was none"""
+    released = seats.release_seat(db.session.connection(), current_user.id, event_id)
+    db.session.commit()
+    if released:
+        response_cache.invalidate('registrations')
+    return released
 
 @app.route('/event/<int:event_id>/register')
 @login_required
 def register_event(event_id):
-    event = Event.query.get_or_404(event_id)
-    if not Registration.query.filter_by(user_id=current_user.id, event_id=event_id).first():
-        registration = Registration(user_id=current_user.id, event_id=event_id)
-        db.session.add(registration)
-        db.session.commit()
+    Event.query.get_or_404(event_id)
+    # Seats are counted and taken in one statement and the unique (user_id, event_id)
+    # index rejects duplicates, so concurrent requests can neither overbook nor double-register
+    try:
+        reserved = reserve_seat(event_id)
+    except IntegrityError:
+        flash('You are already registered for this event!')
+        return redirect(url_for('event_details', event_id=event_id))
+    if reserved is None:
+        abort(404)
+    if reserved[1] == seats.WAITLISTED:
+        flash(f'The event is full, you are number {reserved[2]} on the waitlist.')
+    else:
         flash('Successfully registered for the event!')
+    return redirect(url_for('event_details', event_id=event_id))
+
+@app.route('/event/<int:event_id>/unregister', methods=['POST'])
+@login_required
+def unregister_event(event_id):
+    if release_seat(event_id):
+        flash('Your registration was cancelled.')
     else:
-        flash('You are already registered for this event!')
+        flash('You are not registered for this event.')
     return redirect(url_for('event_details', event_id=event_id))
 
 @app.route('/admin/events')
@@ -172,7 +366,8 @@ def admin_events():
     
     return render_template('admin_events.html', 
                          current_events=current_events,
-                         previous_events=previous_events)
+                         previous_events=previous_events,
+                         counts=seat_counts())
 
 def validate_event_date(date_str):
     try:
@@ -194,13 +389,16 @@ def create_event():
     description = request.form.get('description')
     
     date, error = validate_event_date(date_str)
+    if not error:
+        capacity, error = parse_capacity(request.form.get('capacity'))
     if error:
         flash(error)
         return redirect(url_for('admin_events'))
     
-    event = Event(name=name, date=date, description=description)
+    event = Event(name=name, date=date, description=description, capacity=capacity)
     db.session.add(event)
     db.session.commit()
+    response_cache.invalidate('events')
     flash('Event created successfully!')
     return redirect(url_for('admin_events'))
 
@@ -217,17 +415,48 @@ def edit_event(event_id):
         date_str = request.form.get('date')
         
         date, error = validate_event_date(date_str)
+        if not error:
+            capacity, error = parse_capacity(request.form.get('capacity'))
         if error:
             flash(error)
-            return render_template('edit_event.html', event=event)
+            return render_edit_event(event)
             
         event.date = date
         event.description = request.form.get('description')
+        event.capacity = capacity
+        db.session.flush()
+        # Seats added by a larger capacity go to the waitlist in order; lowering it keeps confirmed seats
+        seats.promote_waitlist(db.session.connection(), event.id)
         db.session.commit()
+        response_cache.invalidate('events', 'registrations')
         flash('Event updated successfully!')
         return redirect(url_for('admin_events'))
     
-    return render_template('edit_event.html', event=event)
+    return render_edit_event(event)
+
+def render_edit_event(event):
+    # Students are loaded with their registrations in one query instead of one per row
+    registrations = Registration.query.options(db.joinedload(Registration.user)) \
+        .filter_by(event_id=event.id).order_by(Registration.id).all()
+    return render_template('edit_event.html', event=event, registrations=registrations)
+
+REGISTRATION_KEYS = [(Event.date, True), (Registration.id, True)]
+REGISTRATION_CURSOR = (datetime, int)
+
+def filter_registrations(query, event_id):
+    """Registrations joined with their student and event, filtered like the admin registrations page"""
+    registrations = Registration.query.join(User).join(Event)
+    match = match_query(query)
+    if match:
+        # Diacritic-insensitive prefix match on the student or the event name through the FTS index
+        ensure_search_index(db.engine)
+        registrations = registrations.filter(db.or_(
+            Registration.user_id.in_(matching_user_ids(match)),
+            Registration.event_id.in_(matching_event_ids(match_query(query, columns=['name'])))
+        ))
+    if event_id and event_id.isdigit():
+        registrations = registrations.filter(Event.id == int(event_id))
+    return registrations
 
 @app.route('/admin/registrations')
 @login_required
@@ -241,21 +470,90 @@ def admin_registrations():
     # Get all events for the filter dropdown
     events = Event.query.order_by(Event.date.desc()).all()
     
-    # Build the query
-    registrations = Registration.query.join(User).join(Event)
-    if query:
-        registrations = registrations.filter(
-            db.or_(User.name.contains(query), User.username.contains(query))
-        )
-    if event_id and event_id.isdigit():
-        registrations = registrations.filter(Event.id == int(event_id))
+    registrations = filter_registrations(query, event_id)
+    
+    # Keyset pagination on (Event.date, id), newest first
+    limit = parse_limit(request.args.get('limit'))
+    cursor = decode_cursor(request.args.get('cursor'), REGISTRATION_CURSOR, scope='registrations')
+    if cursor is not None:
+        registrations = registrations.filter(keyset_after(REGISTRATION_KEYS, cursor[1]))
+    registrations = registrations.options(db.contains_eager(Registration.user), db.contains_eager(Registration.event)) \
+        .order_by(*keyset_order(REGISTRATION_KEYS)).limit(limit + 1).all()
+    cursor_token = next_cursor('registrations', registrations, limit, lambda r: (r.event.date, r.id))
+    
+    # Further pages are fetched by the "load more" button and appended to the table
+    if request.args.get('partial'):
+        response = app.make_response(render_template('_registration_rows.html', registrations=registrations))
+        response.headers['X-Next-Cursor'] = cursor_token or ''
+        return response
     
-    registrations = registrations.order_by(Event.date.desc()).all()
     return render_template('admin_registrations.html', 
                          registrations=registrations, 
                          query=query, 
                          events=events, 
-                         selected_event=event_id)
+                         selected_event=event_id,
+                         next_cursor=cursor_token)
+
+REGISTRATION_EXPORT_HEADER = ['Jméno studenta', 'Uživatelské jméno', 'Akce', 'Datum akce', 'Datum registrace', 'Stav', 'Účast']
+
+def export_response(fmt, filename, sheet_name, header, rows):
+    """Stream rows as a CSV or XLSX download while they are read from the database"""
+    chunks, content_type = export.FORMATS[fmt]
+    response = app.response_class(stream_with_context(chunks(sheet_name, header, rows)), content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+@app.route('/admin/export/registrations.<any(csv, xlsx):fmt>')
+@login_required
+def export_registrations(fmt):
+    if not current_user.is_admin:
+        return redirect(url_for('index'))
+    
+    # Same filters and order as the registrations page, fetched in batches
+    rows = filter_registrations(request.args.get('query', ''), request.args.get('event', '')).with_entities(
+        User.name, User.username, Event.name, Event.date, Registration.registration_date,
+        Registration.status, Registration.attended
+    ).order_by(*keyset_order(REGISTRATION_KEYS)).yield_per(export.BATCH_SIZE)
+    return export_response(fmt, 'registrations', 'Registrace', REGISTRATION_EXPORT_HEADER, (
+        [name or username, username, event_name, format_datetime(event_date),
+         registration_date.strftime('%Y-%m-%d %H:%M'),
+         'Čekací listina' if status == seats.WAITLISTED else 'Potvrzeno',
+         'Zúčastněn' if attended else 'Nezúčastněn']
+        for name, username, event_name, event_date, registration_date, status, attended in rows
+    ))
+
+@app.route('/admin/export/attendance_matrix.<any(csv, xlsx):fmt>')
+@login_required
+def export_attendance_matrix(fmt):
+    if not current_user.is_admin:
+        return redirect(url_for('index'))
+    
+    query = request.args.get('query', '')
+    event_id = request.args.get('event', '')
+    student_name = db.func.coalesce(db.func.nullif(User.name, ''), User.username)
+    if match_query(query) or event_id.isdigit():
+        # Only the students and events of the filtered registrations, as on the registrations page
+        registrations = filter_registrations(query, event_id)
+        event_ids = registrations.with_entities(Registration.event_id).scalar_subquery()
+        events = Event.query.filter(Event.id.in_(event_ids)).order_by(Event.date).all()
+        cells = registrations.with_entities(User.id, student_name, Registration.event_id,
+                                            Registration.attended, Registration.status)
+    else:
+        # Every student and event, like the students page
+        events = Event.query.order_by(Event.date).all()
+        cells = db.session.query(User.id, student_name, Registration.event_id,
+                                 Registration.attended, Registration.status) \
+            .outerjoin(Registration, Registration.user_id == User.id).filter(User.is_admin == False)
+    # One row per student is assembled from consecutive cells, only one batch is held at a time
+    cells = cells.order_by(User.name, User.username, User.id).yield_per(export.BATCH_SIZE)
+    
+    def cell_value(attended, status):
+        if attended:
+            return 'Zúčastněn'
+        return 'Čeká' if status == seats.WAITLISTED else 'Přihlášen'
+    
+    header = ['Jméno studenta'] + [f"{event.name} ({format_datetime(event.date)})" for event in events]
+    return export_response(fmt, 'attendance_matrix', 'Účast', header, export.matrix_rows(events, cells, cell_value))
 
 @app.route('/admin/toggle_attendance/<int:registration_id>')
 @login_required
@@ -263,64 +561,393 @@ def toggle_attendance(registration_id):
     if not current_user.is_admin:
         return redirect(url_for('index'))
     registration = Registration.query.get_or_404(registration_id)
+    if registration.status == seats.WAITLISTED:
+        # Attendance is only kept for confirmed seats
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return {'error': 'Registration is waitlisted'}, 409
+        flash('The student is on the waitlist, attendance cannot be marked')
+        return redirect(request.referrer or url_for('students'))
     registration.attended = not registration.attended
     db.session.commit()
+    # Cached event payloads only carry registration counts, so only attendance views are affected
+    response_cache.invalidate('attendance')
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return {'status': 'success', 'attended': registration.attended}
     return redirect(request.referrer or url_for('students'))
 
-# API endpoints for React components
-@app.route('/api/events')
-def api_events():
-    from datetime import datetime
-    now = datetime.now()
+# Largest number of ids per UPDATE, below SQLite's bound parameter limit
+ATTENDANCE_BATCH_CHUNK = 500
+
+@app.route('/api/attendance/batch', methods=['POST'])
+@login_required
+def attendance_batch():
+    if not current_user.is_admin:
+        return {'error': 'Unauthorized'}, 403
+    
+    payload = request.get_json(silent=True)
+    updates = payload.get('updates') if isinstance(payload, dict) else payload
+    if not isinstance(updates, list):
+        return {'error': 'Expected a list of {registration_id, attended}'}, 400
     
-    current_events = Event.query.filter(Event.date >= now.date()).order_by(Event.date).all()
-    previous_events = Event.query.filter(Event.date < now.date()).order_by(Event.date.desc()).all()
+    # Later entries for the same registration win, like the toggles they were queued from
+    attendance = {}
+    for update in updates:
+        if not isinstance(update, dict) \
+                or not isinstance(update.get('registration_id'), int) \
+                or not isinstance(update.get('attended'), bool):
+            return {'error': 'Expected a list of {registration_id, attended}'}, 400
+        attendance[update['registration_id']] = update['attended']
+    
+    # One CASE-based UPDATE per chunk, all in a single transaction and commit;
+    # waitlisted registrations keep their attendance and are reported back
+    ids = list(attendance)
+    for start in range(0, len(ids), ATTENDANCE_BATCH_CHUNK):
+        chunk = ids[start:start + ATTENDANCE_BATCH_CHUNK]
+        db.session.execute(
+            db.update(Registration)
+            .where(Registration.id.in_(chunk), Registration.status == seats.CONFIRMED)
+            .values(attended=db.case({i: attendance[i] for i in chunk}, value=Registration.id))
+            .execution_options(synchronize_session=False)
+        )
+    if ids:
+        bump_data_version(db.session.connection())
+    db.session.commit()
+    response_cache.invalidate('attendance')
+    
+    rows = []
+    for start in range(0, len(ids), ATTENDANCE_BATCH_CHUNK):
+        chunk = ids[start:start + ATTENDANCE_BATCH_CHUNK]
+        rows += db.session.query(Registration.id, Registration.attended, Registration.status) \
+            .filter(Registration.id.in_(chunk)).all()
+    found = {registration_id for registration_id, _, _ in rows}
+    return {
+        'status': 'success',
+        'registrations': [{'registration_id': i, 'attended': bool(a)} for i, a, _ in rows],
+        'missing': [i for i in ids if i not in found],
+        'waitlisted': [i for i, _, status in rows if status == seats.WAITLISTED]
+    }
+
+# API endpoints for React components
+def events_to_dicts(pages):
+    """Serialize {scope: [Event]} for the API with registration counts
+
+    Counts come from one GROUP BY, so the number of queries does not depend on
+    the number of events. The result is the same for every visitor and can be
+    cached; is_registered is filled in per user by merge_registrations().
+    """
+    counts = seat_counts([e.id for events in pages.values() for e in events])
     
     def event_to_dict(event):
-        registered_count = Registration.query.filter_by(event_id=event.id).count()
-        is_registered = False
-        if current_user.is_authenticated and not current_user.is_admin:
-            is_registered = Registration.query.filter_by(
-                event_id=event.id, 
-                user_id=current_user.id
-            ).first() is not None
-        
+        confirmed, waitlisted = counts.get(event.id, (0, 0))
         return {
             'id': event.id,
             'title': event.name,
             'description': event.description,
             'date': event.date.isoformat(),
-            'registered_count': registered_count,
-            'is_registered': is_registered
+            'max_students': event.capacity,
+            'registered_count': confirmed,
+            'waitlist_count': waitlisted,
+            'is_registered': False,
+            'is_waitlisted': False
         }
     
+    return {scope: [event_to_dict(e) for e in events] for scope, events in pages.items()}
+
+def merge_registrations(result, scopes=('current', 'previous')):
+    """Copy of an events payload with is_registered/is_waitlisted set for the current student (one query)"""
+    if not current_user.is_authenticated or current_user.is_admin:
+        return result
+    statuses = registration_statuses(current_user.id)
+    merged = dict(result)
+    for scope in scopes:
+        if scope in result:
+            merged[scope] = [
+                dict(event, is_registered=event['id'] in statuses,
+                     is_waitlisted=statuses.get(event['id']) == seats.WAITLISTED)
+                for event in result[scope]
+            ]
+    return merged
+
+# Sort keys of the two event lists, used for ordering and for keyset cursors
+EVENT_SCOPES = {
+    'current': [(Event.date, False), (Event.id, False)],
+    'previous': [(Event.date, True), (Event.id, True)],
+}
+EVENT_CURSOR = (datetime, int)
+
+@app.route('/api/events')
+@conditional(vary=user_day_variant)
+def api_events():
+    from datetime import datetime
+    now = datetime.now()
+    limit = parse_limit(request.args.get('limit'))
+    
+    # The first request returns a page of both lists, a cursor continues only its own list
+    if request.args.get('cursor'):
+        cursor = decode_cursor(request.args.get('cursor'), EVENT_CURSOR)
+        if cursor is None or cursor[0] not in EVENT_SCOPES:
+            return {'error': 'Invalid cursor'}, 400
+        requested = {cursor[0]: cursor[1]}
+    else:
+        requested = {'current': None, 'previous': None}
+    
+    def build():
+        pages = {}
+        next_cursors = {}
+        for scope, after in requested.items():
+            keys = EVENT_SCOPES[scope]
+            events = Event.query.filter(Event.date >= now.date() if scope == 'current' else Event.date < now.date())
+            if after is not None:
+                events = events.filter(keyset_after(keys, after))
+            events = events.order_by(*keyset_order(keys)).limit(limit + 1).all()
+            next_cursors[scope] = next_cursor(scope, events, limit, lambda e: (e.date, e.id))
+            pages[scope] = events
+        
+        result = events_to_dicts(pages)
+        result['next_cursor'] = next_cursors
+        result['limit'] = limit
+        if 'cursor' not in request.args:
+            current_total, total = db.session.query(
+                db.func.coalesce(db.func.sum(db.case((Event.date >= now.date(), 1), else_=0)), 0),
+                db.func.count(Event.id)
+            ).one()
+            result['total'] = {'current': current_total, 'previous': total - current_total}
+        return result
+    
+    # The anonymous payload is shared by everyone; per-user is_registered is merged in afterwards
+    # Keyed by data version too, so writes made by other processes never serve stale counts
+    cache_key = ('api_events', data_version()[0], now.date().isoformat(), request.args.get('cursor'), limit)
+    result = response_cache.get_or_set(cache_key, build, tags=('events', 'registrations'))
+    return merge_registrations(result)
+
+@app.route('/api/events/search')
+@conditional(vary=user_day_variant)
+def api_events_search():
+    from datetime import datetime
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    limit = parse_limit(request.args.get('limit'))
+    
+    # Prefix match on every word, so results follow the user as they type
+    match = match_query(request.args.get('q', ''))
+    if not match:
+        return {'current': [], 'previous': [], 'limit': limit}
+    
+    ensure_search_index(db.engine)
+    hits = search_events(db.session, match, limit)
+    events = {e.id: e for e in Event.query.filter(Event.id.in_([event_id for event_id, _ in hits]))}
+    ranked = [events[event_id] for event_id, _ in hits if event_id in events]
+    
+    result = events_to_dicts({
+        'current': [e for e in ranked if e.date >= today],
+        'previous': [e for e in ranked if e.date < today]
+    })
+    result['limit'] = limit
+    return merge_registrations(result)
+
+@app.route('/api/events/<int:event_id>/register', methods=['POST'])
+@login_required
+def api_register_event(event_id):
+    try:
+        reserved = reserve_seat(event_id)
+    except IntegrityError:
+        return {'error': 'Already registered'}, 409
+    if reserved is None:
+        return {'error': 'Event not found'}, 404
+    registration_id, status, position = reserved
+    confirmed, waitlisted = seat_counts([event_id]).get(event_id, (0, 0))
     return {
-        'current': [event_to_dict(e) for e in current_events],
-        'previous': [event_to_dict(e) for e in previous_events]
-    }
+        'registration_id': registration_id,
+        'status': status,
+        'waitlist_position': position,
+        'registered_count': confirmed,
+        'waitlist_count': waitlisted
+    }, 201
+
+@app.route('/api/events/<int:event_id>/unregister', methods=['POST'])
+@login_required
+def api_unregister_event(event_id):
+    if not release_seat(event_id):
+        return {'error': 'Not registered'}, 404
+    confirmed, waitlisted = seat_counts([event_id]).get(event_id, (0, 0))
+    return {'status': 'success', 'registered_count': confirmed, 'waitlist_count': waitlisted}
 
 @app.route('/api/students')
 @login_required
+@conditional()
 def api_students():
     if not current_user.is_admin:
         return {'error': 'Unauthorized'}, 403
     
-    students = User.query.filter_by(is_admin=False).all()
+    sort = request.args.get('sort', 'name')
+    search = request.args.get('q', '').strip()
+    limit = parse_limit(request.args.get('limit'))
+    
+    event_count = db.func.count(Registration.id)
+    attended_count = db.func.coalesce(db.func.sum(db.case((Registration.attended == True, 1), else_=0)), 0)
+    
+    # Keyset on the sort value plus id; aggregate sort values have to be compared in HAVING
+    if sort == 'username':
+        keys, having = [(User.username, False), (User.id, False)], False
+    elif sort == 'events':
+        keys, having = [(event_count, True), (User.id, False)], True
+    elif sort == 'attendance':
+        keys, having = [(attended_count, True), (User.id, False)], True
+    else:
+        sort = 'name'
+        # Sorted as displayed (an empty name shows the username) in Czech alphabetical order
+        student_name = db.func.coalesce(db.func.nullif(User.name, ''), User.username).collate(CZECH_COLLATION)
+        keys, having = [(student_name, False), (User.id, False)], False
+    
+    # Counts for the aggregate sorts, the displayed text for the others, then the id
+    cursor = decode_cursor(request.args.get('cursor'), (int, int) if having else (str, int), scope=sort)
+    if request.args.get('cursor') and cursor is None:
+        return {'error': 'Invalid cursor'}, 400
+    
+    # Case- and diacritic-insensitive prefix match on name or username through the FTS index
+    student_filter = [User.is_admin == False]
+    if search:
+        match = match_query(search)
+        if not match:
+            return {'students': [], 'next_cursor': None, 'limit': limit, 'total': 0}
+        ensure_search_index(db.engine)
+        student_filter.append(User.id.in_(matching_user_ids(match)))
+    
+    # Registration and attendance counts for a page of students in one outer-join aggregate;
+    # waitlisted registrations are not events the student takes part in
+    students = db.session.query(User.id, User.name, User.username, event_count, attended_count,
+                                keys[0][0].label('sort_value')) \
+        .outerjoin(Registration, db.and_(Registration.user_id == User.id, Registration.status == seats.CONFIRMED)) \
+        .filter(*student_filter) \
+        .group_by(User.id)
+    if cursor is not None:
+        condition = keyset_after(keys, cursor[1])
+        students = students.having(condition) if having else students.filter(condition)
+    rows = students.order_by(*keyset_order(keys)).limit(limit + 1).all()
+    cursor_token = next_cursor(sort, rows, limit, lambda row: (row.sort_value, row.id))
     
     students_data = []
-    for student in students:
-        event_count = Registration.query.filter_by(user_id=student.id).count()
+    for student_id, name, username, events, attended, _ in rows:
         students_data.append({
-            'id': student.id,
-            'name': student.name or student.username,
-            'username': student.username,
-            'event_count': event_count
+            'id': student_id,
+            'name': name or username,
+            'username': username,
+            'event_count': events,
+            'attended_count': attended,
+            'attendance_rate': round(attended / events, 2) if events else 0.0
         })
     
-    return students_data
+    result = {'students': students_data, 'next_cursor': cursor_token, 'limit': limit}
+    if cursor is None:
+        result['total'] = User.query.filter(*student_filter).count()
+    return result
+
+@app.route('/api/matrix')
+@login_required
+@conditional()
+def api_matrix():
+    def build():
+        students = db.session.query(User.id, User.name, User.username) \
+            .filter(User.is_admin == False).order_by(User.name, User.username).all()
+        events = db.session.query(Event.id, Event.name, Event.date).order_by(Event.date).all()
+        # One row per student rather than per registration; fetching 240k rows costs far more than parsing.
+        # Only confirmed seats are cells of the matrix, waitlisted students cannot attend yet
+        rows = db.session.query(
+            Registration.user_id,
+            db.func.group_concat(Registration.event_id),
+            db.func.group_concat(db.case((Registration.attended == True, Registration.event_id)))
+        ).filter(Registration.status == seats.CONFIRMED).group_by(Registration.user_id)
+        matrix = AttendanceMatrix.from_rows([s.id for s in students], [e.id for e in events], rows)
+        return {
+            'students': {
+                'ids': matrix.student_ids,
+                'names': [name or username for _, name, username in students]
+            },
+            'events': {
+                'ids': matrix.event_ids,
+                'names': [e.name for e in events],
+                'dates': [format_datetime(e.date) for e in events]
+            },
+            **matrix.encode()
+        }
+    
+    # Everyone sees the same matrix; only admins may change it
+    result = response_cache.get_or_set(('api_matrix', data_version()[0]), build,
+                                       tags=('events', 'registrations', 'attendance'))
+    return {**result, 'can_edit': current_user.is_admin}
+
+@app.route('/api/matrix/registration')
+@login_required
+def api_matrix_registration():
+    """Registration id of one matrix cell, fetched when an admin first changes its attendance"""
+    if not current_user.is_admin:
+        return {'error': 'Unauthorized'}, 403
+    registration = db.session.query(Registration.id, Registration.attended).filter_by(
+        user_id=request.args.get('student', type=int),
+        event_id=request.args.get('event', type=int),
+        status=seats.CONFIRMED
+    ).first()
+    if registration is None:
+        return {'error': 'Not registered'}, 404
+    return {'registration_id': registration.id, 'attended': bool(registration.attended)}
+
+@app.route('/api/search')
+@login_required
+def api_search():
+    if not current_user.is_admin:
+        return {'error': 'Unauthorized'}, 403
+    
+    match = match_query(request.args.get('q', ''))
+    limit = parse_limit(request.args.get('limit'), default=20)
+    if not match:
+        return {'students': [], 'events': []}
+    
+    ensure_search_index(db.engine)
+    user_hits = search_users(db.session, match, limit)
+    event_hits = search_events(db.session, match_query(request.args.get('q', ''), columns=['name']), limit)
+    users = {u.id: u for u in User.query.filter(User.id.in_([user_id for user_id, _ in user_hits]))}
+    events = {e.id: e for e in Event.query.filter(Event.id.in_([event_id for event_id, _ in event_hits]))}
+    
+    return {
+        'students': [{
+            'id': user_id,
+            'name': users[user_id].display_name,
+            'username': users[user_id].username,
+            'is_admin': users[user_id].is_admin,
+            'score': round(score, 3)
+        } for user_id, score in user_hits if user_id in users],
+        'events': [{
+            'id': event_id,
+            'title': events[event_id].name,
+            'date': events[event_id].date.isoformat(),
+            'score': round(score, 3)
+        } for event_id, score in event_hits if event_id in events]
+    }
+
+@app.route('/admin/cache/stats')
+@login_required
+def cache_stats():
+    if not current_user.is_admin:
+        return {'error': 'Unauthorized'}, 403
+    return response_cache.stats()
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    # Scrapers send the METRICS_TOKEN as a bearer token, people log in as an admin
+    token = app.config['METRICS_TOKEN']
+    if not (token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')):
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not current_user.is_admin:
+            return {'error': 'Unauthorized'}, 403
+    return metrics.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+@app.route('/admin/profiles/<path:filename>')
+@login_required
+def download_profile(filename):
+    if not current_user.is_admin:
+        return {'error': 'Unauthorized'}, 403
+    return send_from_directory(profile_directory(app), filename, as_attachment=True)
 
 @app.route('/admin/create_sample_data', methods=['POST'])
 @login_required
@@ -330,75 +957,15 @@ def create_sample_data_route():
         return redirect(url_for('index'))
     
     try:
-        from werkzeug.security import generate_password_hash
-        import random
-        from datetime import timedelta
-        
-        # Create sample events
-        events = [
-            Event(
-                name="School Christmas Party",
-                date=datetime(2025, 12, 20, 18, 0),
-                description="Annual Christmas celebration with music, food, and fun activities."
-            ),
-            Event(
-                name="Science Fair",
-                date=datetime(2025, 11, 15, 13, 0),
-                description="Students present their science projects. Prizes for best projects!"
-            ),
-            Event(
-                name="Sports Day",
-                date=datetime(2025, 10, 25, 9, 0),
-                description="Annual sports competition with various athletic events and team games."
-            )
-        ]
-        
-        for event in events:
-            db.session.add(event)
-        db.session.commit()
-
-        # Create sample students
-        students = [
-            "Anna Novotná", "Jan Svoboda", "Marie Dvořáková",
-            "Petr Novák", "Tereza Černá", "Tomáš Procházka",
-            "Lucie Kučerová", "Jakub Veselý", "Karolína Horáková", "David Král"
-        ]
-
-        for student_name in students:
-            username = student_name.lower().replace(' ', '').replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ý', 'y').replace('ř', 'r').replace('š', 's').replace('ž', 'z').replace('ů', 'u').replace('ú', 'u').replace('ó', 'o').replace('č', 'c')
-            
-            if not User.query.filter_by(username=username).first():
-                student = User(
-                    username=username,
-                    password_hash=generate_password_hash('student123'),
-                    name=student_name,
-                    is_admin=False
-                )
-                db.session.add(student)
-        db.session.commit()
-
-        # Create random registrations
-        students = User.query.filter_by(is_admin=False).all()
-        events = Event.query.all()
-
-        for student in students:
-            for event in events:
-                if random.random() < 0.7:
-                    attended = random.random() < 0.8
-                    registration = Registration(
-                        user_id=student.id,
-                        event_id=event.id,
-                        attended=attended,
-                        registration_date=datetime.now() - timedelta(days=random.randint(1, 30))
-                    )
-                    db.session.add(registration)
-        
+        stats = seeding.create_sample_data(db.session.connection(), random.Random(), hasher=password_hasher)
         db.session.commit()
+        app.logger.info('Sample data: %s', stats)
         flash('Sample data created successfully!')
     except Exception as e:
         db.session.rollback()
         flash(f'Error creating sample data: {str(e)}')
     
+    response_cache.invalidate('events', 'registrations')
     return redirect(url_for('index'))
 
 @app.route('/admin/create_previous_data', methods=['POST'])
@@ -409,102 +976,15 @@ def create_previous_data_route():
         return redirect(url_for('index'))
     
     try:
-        from werkzeug.security import generate_password_hash
-        import random
-        from datetime import timedelta
-        
-        past_events = [
-            {
-                "name": "Spring Concert 2025",
-                "date": datetime(2025, 5, 15, 17, 30),
-                "description": "Annual spring concert featuring student performances in choir and instrumental music."
-            },
-            {
-                "name": "Math Olympics",
-                "date": datetime(2025, 4, 20, 9, 0),
-                "description": "Mathematics competition with challenging problems and puzzles."
-            },
-            {
-                "name": "Career Day",
-                "date": datetime(2025, 3, 12, 10, 0),
-                "description": "Professional speakers sharing career insights and opportunities."
-            },
-            {
-                "name": "Art Exhibition",
-                "date": datetime(2025, 2, 28, 14, 0),
-                "description": "Showcase of student artwork from various mediums and styles."
-            },
-            {
-                "name": "Winter Sports Tournament",
-                "date": datetime(2025, 1, 25, 8, 30),
-                "description": "Indoor sports competition including basketball and volleyball."
-            },
-            {
-                "name": "Literature Festival",
-                "date": datetime(2024, 12, 10, 13, 0),
-                "description": "Celebration of reading and writing with author visits and workshops."
-            }
-        ]
-
-        db_events = []
-        for event_data in past_events:
-            event = Event(
-                name=event_data["name"],
-                date=event_data["date"],
-                description=event_data["description"]
-            )
-            db.session.add(event)
-            db_events.append(event)
-        db.session.commit()
-
-        students = User.query.filter_by(is_admin=False).all()
-        if not students:
-            student_names = [
-                "Eva Malá", "Martin Horák", "Zuzana Šimková",
-                "Filip Kovář", "Nina Benešová", "Ondřej Marek",
-                "Klára Říhová", "Adam Tichý", "Barbora Vávrová",
-                "Daniel Pospíšil", "Sofie Marková", "Matěj Kříž"
-            ]
-            
-            for name in student_names:
-                username = name.lower().replace(' ', '').replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ý', 'y').replace('ř', 'r').replace('š', 's').replace('ž', 'z').replace('ů', 'u').replace('ú', 'u').replace('ó', 'o').replace('č', 'c')
-                student = User(
-                    username=username,
-                    password_hash=generate_password_hash('student123'),
-                    name=name,
-                    is_admin=False
-                )
-                db.session.add(student)
-                students.append(student)
-            db.session.commit()
-
-        for event in db_events:
-            if "Concert" in event.name or "Exhibition" in event.name:
-                num_registrations = random.randint(15, 20)
-            elif "Olympics" in event.name or "Tournament" in event.name:
-                num_registrations = random.randint(8, 12)
-            else:
-                num_registrations = random.randint(10, 15)
-
-            event_students = random.sample(students, min(num_registrations, len(students)))
-
-            for student in event_students:
-                attended = random.random() < (0.85 if "Olympics" not in event.name else 0.75)
-                
-                registration = Registration(
-                    user_id=student.id,
-                    event_id=event.id,
-                    attended=attended,
-                    registration_date=event.date - timedelta(days=random.randint(5, 20))
-                )
-                db.session.add(registration)
-        
+        stats = seeding.create_previous_data(db.session.connection(), random.Random(), hasher=password_hasher)
         db.session.commit()
+        app.logger.info('Previous data: %s', stats)
         flash('Previous sample data created successfully!')
     except Exception as e:
         db.session.rollback()
         flash(f'Error creating previous data: {str(e)}')
     
+    response_cache.invalidate('events', 'registrations')
     return redirect(url_for('index'))
 
 @app.route('/admin/generate_events', methods=['POST'])
@@ -515,62 +995,19 @@ def generate_events_route():
         return redirect(url_for('index'))
     
     try:
-        import random
-        from datetime import timedelta
-        
-        # Generate new future event
-        event_types = [
-            ("Graduation Ceremony", "End of year graduation ceremony celebrating our students' achievements. Family and friends welcome!"),
-            ("Technology Workshop", "Hands-on workshop exploring latest technology trends and innovations."),
-            ("Drama Performance", "Student theatrical production showcasing dramatic talents."),
-            ("Field Trip", "Educational excursion to local museum and historical sites."),
-            ("Dance Competition", "Annual dance showcase with various styles and performances."),
-            ("Debate Tournament", "Inter-class debate competition on current events and social issues."),
-            ("Music Festival", "Multi-genre music festival featuring student bands and solo performers."),
-            ("Cooking Class", "Interactive culinary workshop learning international cuisines."),
-            ("Photography Exhibition", "Display of student photography from various themes and techniques."),
-            ("Environmental Day", "Activities focused on sustainability and environmental awareness.")
-        ]
-        
-        # Pick a random event type
-        event_name, event_desc = random.choice(event_types)
-        
-        # Generate a future date (1-6 months from now)
-        days_ahead = random.randint(30, 180)
-        event_date = datetime.now() + timedelta(days=days_ahead)
-        event_date = event_date.replace(hour=random.choice([9, 10, 13, 14, 15, 17, 18]), minute=random.choice([0, 30]))
-        
-        new_event = Event(
-            name=event_name,
-            date=event_date,
-            description=event_desc
-        )
-        
-        db.session.add(new_event)
-        db.session.commit()
-
-        # Add random registrations for existing students
-        students = User.query.filter_by(is_admin=False).all()
-        
-        for student in students:
-            if random.random() < 0.6:  # 60% chance of registering
-                registration = Registration(
-                    user_id=student.id,
-                    event_id=new_event.id,
-                    attended=False,
-                    registration_date=datetime.now()
-                )
-                db.session.add(registration)
-        
+        event_name, stats = seeding.generate_event(db.session.connection(), random.Random())
         db.session.commit()
+        app.logger.info('Generated event: %s', stats)
         flash(f'Generated new event: {event_name}')
     except Exception as e:
         db.session.rollback()
         flash(f'Error generating event: {str(e)}')
     
+    response_cache.invalidate('events', 'registrations')
     return redirect(url_for('index'))
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        ensure_search_index(db.engine)
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+Route micro-benchmarks on the Flask test client.
+Builds a throwaway database per data size, times the hot routes in-process
+(no network, no server) and reports how each route scales with the data.
+Results can be saved as a baseline and later runs compared against it,
+flagging routes that got slower beyond a threshold.
+
+Usage:
+    python bench_routes.py --sizes 100x50,1000x500 --save-baseline bench_baseline.json
+    python bench_routes.py --sizes 100x50,1000x500 --compare bench_baseline.json
+
+Sizes are STUDENTSxEVENTS; data for a size is the same on every run with
+the same --seed, so runs are comparable. The response cache is cleared
+before every timed request unless --warm is given, so the numbers show
+what a route costs to build rather than to serve from the cache.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from sqlalchemy import text
+
+ROUTES = [
+    # (label, path, who is logged in)
+    ('GET /', '/', None),
+    ('GET /students', '/students', 'student'),
+    ('GET /api/matrix', '/api/matrix', 'student'),
+    ('GET /api/events', '/api/events', 'student'),
+    ('GET /api/students', '/api/students', 'admin'),
+    ('GET /admin/registrations', '/admin/registrations', 'admin'),
+    ('GET /admin/events', '/admin/events', 'admin'),
+    ('GET /event/<id>', '/event/{event_id}', 'student'),
+]
+
+DEFAULT_SIZES = '100x50,1000x50,1000x500'
+
+def parse_sizes(value):
+    """'100x50,1000x500' -> [(100, 50), (1000, 500)]"""
+    sizes = []
+    for part in value.split(','):
+        students, _, events = part.strip().lower().partition('x')
+        sizes.append((int(students), int(events)))
+    return sizes
+
+def size_label(students, events):
+    return f"{students}x{events}"
+
+def timing_stats(durations):
+    """Summary of a list of durations in seconds, in milliseconds"""
+    ordered = sorted(d * 1000 for d in durations)
+    return {
+        'runs': len(ordered),
+        'median': round(statistics.median(ordered), 3),
+        'p95': round(ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)], 3),
+        'min': round(ordered[0], 3),
+        'mean': round(statistics.fmean(ordered), 3),
+    }
+
+def scaling_exponent(small, large):
+    """Exponent k in time ~ registrations^k between two sizes, None if it can't be told
+
+    About 0 means the route does not depend on the data size, 1 linear.
+    """
+    if not small['registrations'] or large['registrations'] <= small['registrations']:
+        return None
+    ratio = large['median'] / small['median'] if small['median'] else None
+    if not ratio:
+        return None
+    return round(math.log(ratio) / math.log(large['registrations'] / small['registrations']), 2)
+
+def seed(url, students, events, seed_value):
+    """Reset the database to a dataset of the given size, returns (registrations, admin id, student id, event id)"""
+    import seeding
+    from passwords import PasswordHasher, HASH_PROFILES
+
+    engine = seeding.open_engine(url, reset=True)
+    try:
+        with engine.begin() as conn:
+            stats = seeding.generate_dataset(conn, random.Random(seed_value), students=students, events=events,
+                                             hasher=PasswordHasher(HASH_PROFILES['fast']))
+            seeding.insert_students(conn, [('benchadmin', 'Bench Admin')], stats,
+                                    PasswordHasher(HASH_PROFILES['fast']))
+            admin_id = conn.execute(text("UPDATE user SET is_admin = 1 WHERE username = 'benchadmin' "
+                                         "RETURNING id")).scalar()
+            # The busiest student and event make the per-user and per-event pages as heavy as they get
+            student_id = conn.execute(text(
+                "SELECT user_id FROM registration GROUP BY user_id ORDER BY COUNT(*) DESC, user_id LIMIT 1"
+            )).scalar()
+            event_id = conn.execute(text(
+                "SELECT event_id FROM registration GROUP BY event_id ORDER BY COUNT(*) DESC, event_id LIMIT 1"
+            )).scalar()
+            registrations = conn.execute(text("SELECT COUNT(*) FROM registration")).scalar()
+    finally:
+        engine.dispose()
+    return registrations, admin_id, student_id, event_id
+
+def bench_size(students, events, args, url):
+    """Seed one size and time every route, returns the size info and {label: stats}"""
+    from app import app, db, response_cache, user_cache
+
+    registrations, admin_id, student_id, event_id = seed(url, students, events, args.seed)
+    with app.app_context():
+        db.engine.dispose()  # No pooled connection should outlive the reset
+    response_cache.clear()
+    user_cache.clear()
+    users = {'admin': admin_id, 'student': student_id or admin_id}
+
+    results = {}
+    for label, path, who in ROUTES:
+        if args.routes and label not in args.routes:
+            continue
+        client = app.test_client()
+        if who:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(users[who])
+        path = path.format(event_id=event_id)
+
+        durations = []
+        for run in range(args.warmup + args.repeat):
+            if not args.warm:
+                response_cache.clear()
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise RuntimeError(f"{label} returned {response.status_code} at {size_label(students, events)}")
+            if run >= args.warmup:
+                durations.append(elapsed)
+        results[label] = timing_stats(durations)
+        print(f"  {label:<28} median {results[label]['median']:>9.2f} ms  p95 {results[label]['p95']:>9.2f} ms")
+
+    size = {'label': size_label(students, events), 'students': students, 'events': events,
+            'registrations': registrations}
+    return size, results
+
+def run(args):
+    """Benchmark every size, returns the report dict"""
+    fd, path = tempfile.mkstemp(suffix='.db', prefix='bench-')
+    os.close(fd)
+    url = f'sqlite:///{path}'
+    # The app reads its database and hash profile at import time
+    os.environ['DATABASE_URL'] = url
+    os.environ['PASSWORD_HASH_PROFILE'] = 'fast'
+    from app import app, db
+    with app.app_context():
+        if db.engine.url.database != path:
+            raise RuntimeError("The app was imported before the benchmark set its database; "
+                               "run bench_routes.py as a script")
+
+    sizes, routes = [], {}
+    try:
+        for students, events in parse_sizes(args.sizes):
+            print(f"{size_label(students, events)}:")
+            size, results = bench_size(students, events, args, url)
+            print(f"  ({size['registrations']:,} registrations)")
+            sizes.append(size)
+            for label, stats in results.items():
+                routes.setdefault(label, {})[size['label']] = stats
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    if len(sizes) > 1:
+        small, large = sizes[0], sizes[-1]
+        for label, by_size in routes.items():
+            by_size['scaling'] = scaling_exponent(
+                {**by_size[small['label']], 'registrations': small['registrations']},
+                {**by_size[large['label']], 'registrations': large['registrations']}
+            )
+    return {
+        'config': {'sizes': args.sizes, 'repeat': args.repeat, 'warmup': args.warmup, 'warm': args.warm,
+                   'seed': args.seed},
+        'python': sys.version.split()[0],
+        'sizes': sizes,
+        'routes': routes,
+    }
+
+def print_report(report):
+    labels = [size['label'] for size in report['sizes']]
+    print(f"\nMedian ms per request{' (warm cache)' if report['config']['warm'] else ''}")
+    print(f"{'route':<28}" + ''.join(f"{label:>14}" for label in labels) + f"{'scaling':>10}")
+    for route, by_size in report['routes'].items():
+        scaling = by_size.get('scaling')
+        print(f"{route:<28}" + ''.join(f"{by_size[label]['median']:>14.2f}" for label in labels)
+              + f"{'' if scaling is None else scaling:>10}")
+    print("scaling: exponent k in time ~ registrations^k between the smallest and largest size")
+
+def compare(baseline, report, threshold, min_delta):
+    """Routes and sizes whose median grew by more than threshold (and min_delta ms), as (route, size, old, new)"""
+    regressions = []
+    for route, by_size in report['routes'].items():
+        for label, stats in by_size.items():
+            old = baseline['routes'].get(route, {}).get(label)
+            if not isinstance(stats, dict) or not isinstance(old, dict):
+                continue
+            if stats['median'] > old['median'] * (1 + threshold) and stats['median'] - old['median'] > min_delta:
+                regressions.append((route, label, old['median'], stats['median']))
+    return regressions
+
+def print_comparison(baseline, report, regressions):
+    flagged = {(route, label) for route, label, _, _ in regressions}
+    print(f"\n{'route':<28} {'size':<12} {'baseline':>10} {'now':>10} {'change':>8}")
+    for route, by_size in report['routes'].items():
+        for label, stats in by_size.items():
+            old = baseline['routes'].get(route, {}).get(label)
+            if not isinstance(stats, dict) or not isinstance(old, dict):
+                continue
+            change = (stats['median'] / old['median'] - 1) if old['median'] else 0
+            marker = '  REGRESSION' if (route, label) in flagged else ''
+            print(f"{route:<28} {label:<12} {old['median']:>10.2f} {stats['median']:>10.2f} {change:>+8.0%}{marker}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's routes on the test client")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"STUDENTSxEVENTS list, default {DEFAULT_SIZES}")
+    parser.add_argument('--repeat', type=int, default=20, help="timed requests per route and size")
+    parser.add_argument('--warmup', type=int, default=2, help="untimed requests before timing")
+    parser.add_argument('--warm', action='store_true', help="keep the response cache between requests")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--routes', nargs='*', help="only these route labels, e.g. 'GET /students'")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--save-baseline', metavar='FILE', help="write the results as the new baseline")
+    parser.add_argument('--compare', metavar='FILE', help="compare against a baseline, exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown, default 0.25 = 25%%")
+    parser.add_argument('--min-delta', type=float, default=0.5, help="ignore slowdowns below this many ms")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Saved {path}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.min_delta)
+        print_comparison(baseline, report, regressions)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
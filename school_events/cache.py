@@ -0,0 +1,113 @@
+"""
+In-process response cache for the most requested public data.
+Entries carry tags naming the data they were built from ('events',
+'registrations', ...). Write paths invalidate the tags they change, so an
+entry is dropped exactly when its data changes; the TTL only bounds
+staleness for writes made outside this process (scripts, other workers).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL, an entry limit and tag invalidation"""
+
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, build, tags=()):
+        """Return the cached value, building and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value, tags)
+        return value
+
+    def invalidate(self, *tags):
+        """Drop every entry built from any of the given tags"""
+        tags = set(tags)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[2] & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'lru',
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+class NullCache:
+    """Cache that stores nothing, for disabling the response cache"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, tags=()):
+        pass
+
+    def get_or_set(self, key, build, tags=()):
+        return build()
+
+    def invalidate(self, *tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'backend': 'null'}
+
+def create_cache(config):
+    """Create the cache backend selected by RESPONSE_CACHE_BACKEND"""
+    backend = config.get('RESPONSE_CACHE_BACKEND', 'lru')
+    if backend == 'null':
+        return NullCache()
+    if backend == 'lru':
+        return LRUCache(
+            max_entries=config.get('RESPONSE_CACHE_MAX_ENTRIES', 256),
+            ttl=config.get('RESPONSE_CACHE_TTL', 60)
+        )
+    raise ValueError(f"Unknown cache backend: {backend}")
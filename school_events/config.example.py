@@ -4,3 +4,21 @@
 
 ADMIN_USERNAME = 'your_admin_username'
 ADMIN_PASSWORD = 'your_secure_password_here'
+
+# Database (optional, the values below are the defaults)
+# The DATABASE_URL environment variable overrides DATABASE_URI
+DATABASE_URI = 'sqlite:///school_events.db'
+DATABASE_POOL_SIZE = 10       # connections kept open
+DATABASE_MAX_OVERFLOW = 10    # extra connections under load
+DATABASE_POOL_TIMEOUT = 10    # seconds to wait for a free connection
+DATABASE_POOL_RECYCLE = 3600  # seconds before a connection is reopened
+
+# Merged over the defaults and run on every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32000,
+    'temp_store': 'memory',
+}
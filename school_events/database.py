@@ -0,0 +1,61 @@
+"""
+Database engine profile.
+The URL, connection pool and SQLite pragmas come from config.py (see
+config.example.py) with DATABASE_URL in the environment taking precedence.
+In WAL mode readers work from a snapshot and never wait for the writer,
+and busy_timeout makes concurrent writers queue for the lock instead of
+failing with "database is locked".
+"""
+import os
+from sqlalchemy import event, make_url
+
+DEFAULT_DATABASE_URI = 'sqlite:///school_events.db'
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',  # Durable across app crashes, only an OS crash can lose the last commits
+    'busy_timeout': 5000,  # ms a writer waits for the lock
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32000,  # negative = KiB, i.e. ~32 MB per connection
+    'temp_store': 'memory',
+}
+
+POOL_SETTINGS = {
+    'DATABASE_POOL_SIZE': ('pool_size', 10),
+    'DATABASE_MAX_OVERFLOW': ('max_overflow', 10),
+    'DATABASE_POOL_TIMEOUT': ('pool_timeout', 10),
+    'DATABASE_POOL_RECYCLE': ('pool_recycle', 3600),
+}
+
+def load_settings():
+    """Database settings from the optional config.py, as a dict of upper-case names"""
+    try:
+        import config
+    except ImportError:
+        return {}
+    return {name: getattr(config, name) for name in dir(config) if name.startswith(('DATABASE_', 'SQLITE_'))}
+
+def configure_database(app, settings=None):
+    """Fill SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS and SQLITE_PRAGMAS on the app"""
+    settings = load_settings() if settings is None else settings
+    uri = os.environ.get('DATABASE_URL') or settings.get('DATABASE_URI', DEFAULT_DATABASE_URI)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+
+    options = {option: settings.get(name, default) for name, (option, default) in POOL_SETTINGS.items()}
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        options = {}  # In-memory databases use a single-connection pool that takes no sizing
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.config['SQLITE_PRAGMAS'] = {**SQLITE_PRAGMAS, **settings.get('SQLITE_PRAGMAS', {})}
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the pragmas on every new connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
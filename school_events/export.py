@@ -0,0 +1,158 @@
+"""
+Streaming CSV and XLSX exports.
+Rows come from queries iterated with yield_per and are written out in
+chunks as they arrive, so an export of any size keeps one batch of rows
+in memory. XLSX needs no extra package: zipfile can write to a stream it
+cannot seek, and the sheet XML is produced row by row with inline strings.
+"""
+import csv
+import io
+import re
+import zipfile
+from itertools import chain, groupby
+from xml.sax.saxutils import escape
+
+CHUNK_SIZE = 64 * 1024  # bytes handed to the server at a time
+BATCH_SIZE = 1000  # rows fetched from the database at a time
+
+CSV_MIMETYPE = 'text/csv; charset=utf-8'
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Spreadsheets run cells starting with these as formulas; names are typed in by students
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def csv_chunks(sheet_name, header, rows):
+    """Encoded CSV in chunks of about CHUNK_SIZE bytes; sheet_name is unused, CSV has no sheets"""
+    buffer = io.StringIO()
+    buffer.write('\ufeff')  # BOM, so Excel reads the Czech names as UTF-8
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([csv_cell(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+class _Pipe:
+    """Write-only file for zipfile whose output is collected until the generator yields it"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+
+# The header row stays visible while scrolling
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+# Characters XML 1.0 does not allow, even escaped
+INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Sheet names are limited to 31 characters without these
+INVALID_SHEET_NAME = re.compile(r'[\[\]:*?/\\]')
+
+def xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(INVALID_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+def xlsx_chunks(sheet_name, header, rows):
+    """A one-sheet XLSX workbook in chunks of about CHUNK_SIZE bytes"""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', WORKBOOK.format(name=escape(INVALID_SHEET_NAME.sub('', sheet_name)[:31])))
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(SHEET_START.encode())
+            for row in chain([header], rows):
+                sheet.write(('<row>' + ''.join(xlsx_cell(value) for value in row) + '</row>').encode('utf-8'))
+                if pipe.size >= CHUNK_SIZE:
+                    yield pipe.drain()
+            sheet.write(SHEET_END.encode())
+    yield pipe.drain()
+
+FORMATS = {
+    'csv': (csv_chunks, CSV_MIMETYPE),
+    'xlsx': (xlsx_chunks, XLSX_MIMETYPE),
+}
+
+def matrix_rows(events, cells, cell_value):
+    """Student x event rows from cells sorted by student
+
+    cells yields (user_id, student_name, event_id, *cell) with all cells of
+    a student together; event_id is None for a student without
+    registrations. Each row is the name followed by cell_value(*cell) in
+    the order of events, '' where the student is not registered.
+    """
+    columns = {event.id: i for i, event in enumerate(events)}
+    for (user_id, student_name), student_cells in groupby(cells, key=lambda cell: (cell[0], cell[1])):
+        row = [''] * len(columns)
+        for _, _, event_id, *cell in student_cells:
+            if event_id in columns:
+                row[columns[event_id]] = cell_value(*cell)
+        yield [student_name, *row]
@@ -85,7 +85,8 @@ with app.app_context():
         event = Event(
             name=event_data['title'],
             description=event_data['description'],
-            date=event_datetime
+            date=event_datetime,
+            capacity=event_data['max_students']
         )
         
         db.session.add(event)
@@ -3,7 +3,9 @@
 """
 Generate additional Czech school events for testing
 """
-from app import app, db, Event
+from app import app, db
+from versioning import bump_data_version
+import seeding
 from datetime import datetime, timedelta
 import random
 
@@ -84,50 +86,27 @@ past_events = [
     },
 ]
 
+def event_time(date):
+    # Random time between 8:00 and 16:00
+    return date.replace(hour=random.randint(8, 16), minute=random.choice([0, 15, 30, 45]), second=0, microsecond=0)
+
 def generate_events():
+    now = datetime.now()
+    events = [(e["name"], event_time(now + timedelta(days=e["days_ahead"])), e["description"]) for e in upcoming_events]
+    events += [(e["name"], event_time(now - timedelta(days=e["days_ago"])), e["description"]) for e in past_events]
+
     with app.app_context():
-        now = datetime.now()
-        added_count = 0
-        
-        print("🎯 Generování nadcházejících akcí...")
-        for event_data in upcoming_events:
-            # Random time between 8:00 and 16:00
-            hour = random.randint(8, 16)
-            minute = random.choice([0, 15, 30, 45])
-            
-            event_date = now + timedelta(days=event_data["days_ahead"])
-            event_date = event_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            
-            event = Event(
-                name=event_data["name"],
-                date=event_date,
-                description=event_data["description"]
-            )
-            db.session.add(event)
-            added_count += 1
-            print(f"✓ Přidána akce: {event.name} ({event_date.strftime('%d.%m.%Y %H:%M')})")
-        
-        print("\n📚 Generování minulých akcí...")
-        for event_data in past_events:
-            # Random time between 8:00 and 16:00
-            hour = random.randint(8, 16)
-            minute = random.choice([0, 15, 30, 45])
-            
-            event_date = now - timedelta(days=event_data["days_ago"])
-            event_date = event_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            
-            event = Event(
-                name=event_data["name"],
-                date=event_date,
-                description=event_data["description"]
-            )
-            db.session.add(event)
-            added_count += 1
-            print(f"✓ Přidána akce: {event.name} ({event_date.strftime('%d.%m.%Y %H:%M')})")
-        
-        db.session.commit()
-        print(f"\n🎉 Úspěšně přidáno {added_count} nových akcí!")
-        print(f"📊 Nadcházející: {len(upcoming_events)}, Minulé: {len(past_events)}")
+        stats = seeding.SeedStats()
+        with db.engine.begin() as conn:
+            seeding.insert_events(conn, events, stats)
+            bump_data_version(conn)
+        stats.finish()
+
+    print("🎯 Generování nadcházejících a minulých akcí...")
+    for name, date, _ in events:
+        print(f"✓ Přidána akce: {name} ({date.strftime('%d.%m.%Y %H:%M')})")
+    print(f"\n🎉 Úspěšně přidáno {len(events)} nových akcí! ({stats})")
+    print(f"📊 Nadcházející: {len(upcoming_events)}, Minulé: {len(past_events)}")
 
 if __name__ == "__main__":
     generate_events()
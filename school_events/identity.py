@@ -0,0 +1,67 @@
+"""
+Cached user identities for flask-login.
+Every authenticated request loads the current user; instead of a query per
+request the loader keeps a small detached copy (id, username, name,
+is_admin) in a per-process LRU cache. Commits that change a user drop its
+entry in this process, and the short TTL bounds how long a change made by
+another process (create_admin.py, a second worker) can go unnoticed.
+"""
+from flask_login import UserMixin
+from sqlalchemy import event
+
+class Identity(UserMixin):
+    """What requests need to know about the logged-in user, without a database session"""
+
+    def __init__(self, id, username, name, is_admin):
+        self.id = id
+        self.username = username
+        self.name = name
+        self.is_admin = bool(is_admin)
+
+    @property
+    def display_name(self):
+        """Return name if available, otherwise username"""
+        return self.name if self.name else self.username
+
+    def __repr__(self):
+        return f"<Identity {self.id} {self.username}>"
+
+def identity_tag(user_id):
+    return f"user:{user_id}"
+
+def load_identity(cache, user_id, fetch):
+    """Return the cached Identity for user_id, calling fetch(user_id) for a row on a miss
+
+    fetch returns (id, username, name, is_admin) or None for unknown users,
+    which are not cached so a newly created account is found right away.
+    """
+    key = ('identity', user_id)
+    identity = cache.get(key)
+    if identity is None:
+        row = fetch(user_id)
+        if row is None:
+            return None
+        identity = Identity(*row)
+        cache.set(key, identity, tags=(identity_tag(user_id),))
+    return identity
+
+def track_user_changes(session, model, cache):
+    """Drop cached identities of users changed or deleted through the session, once committed
+
+    Invalidating at commit rather than at flush keeps another request from
+    caching the old row again between the flush and the commit.
+    """
+    @event.listens_for(session, 'after_flush')
+    def collect(session, flush_context):
+        changed = {instance.id for instance in session.dirty | session.deleted if isinstance(instance, model)}
+        if changed:
+            session.info.setdefault('changed_user_ids', set()).update(changed)
+
+    @event.listens_for(session, 'after_commit')
+    def invalidate(session):
+        for user_id in session.info.pop('changed_user_ids', ()):
+            cache.invalidate(identity_tag(user_id))
+
+    @event.listens_for(session, 'after_rollback')
+    def discard(session):
+        session.info.pop('changed_user_ids', None)
@@ -0,0 +1,433 @@
+"""
+Load test harness for registration rushes and everyday traffic.
+Seeds a throwaway database, starts the app against it in a subprocess and
+drives it from many concurrent clients, each with its own login session.
+Throughput, latency percentiles and error rates are reported per endpoint
+and saved as JSON, so runs before and after a change can be compared.
+
+Usage:
+    python loadtest.py --scenario mixed --clients 50 --duration 30
+    python loadtest.py --scenario rush --clients 200 --capacity 50
+    python loadtest.py --compare loadtest_results/before.json loadtest_results/after.json
+
+To drive an app started some other way (gunicorn, another host), seed its
+database first and then point the harness at it; the users and ids it sends
+are read from that database:
+    python loadtest.py --seed-only --database loadtest.db --students 5000
+    python loadtest.py --url http://127.0.0.1:8000 --database loadtest.db --scenario rush
+
+Scenarios:
+    login       every client logs in and out in a loop (password hashing under load)
+    rush        all clients register for one event with limited seats, then cancel and retry
+    attendance  admins toggle attendance one by one and in batches
+    poll        clients poll /api/events like the events page does, revalidating with ETags
+    mixed       students polling, browsing and registering with a few admins toggling attendance
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+import seeding
+from passwords import PasswordHasher, HASH_PROFILES
+
+SCENARIOS = ['login', 'rush', 'attendance', 'poll', 'mixed']
+PASSWORD = seeding.DEFAULT_PASSWORD
+RUSH_EVENT = "Lyžařský kurz"
+RESULTS_DIR = 'loadtest_results'
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses, following them would time the next page too"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+class Client:
+    """One simulated browser: its own cookies and ETags, every request timed into the shared recorder"""
+
+    def __init__(self, base_url, recorder, timeout=30):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.timeout = timeout
+        self.etags = {}
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect
+        )
+
+    def request(self, label, path, method=None, data=None, json_body=None, headers=None, revalidate=False):
+        """Send a request and record it under label, returns (status, body)"""
+        headers = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+        if revalidate and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers,
+                                         method=method or ('POST' if body is not None else 'GET'))
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, payload = response.status, response.read()
+                etag = response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            status, payload, etag = e.code, e.read(), None
+        except (urllib.error.URLError, OSError) as e:
+            self.recorder.record(label, None, time.perf_counter() - started, error=type(e).__name__)
+            return None, b''
+        self.recorder.record(label, status, time.perf_counter() - started)
+        if revalidate and etag:
+            self.etags[path] = etag
+        return status, payload
+
+    def login(self, username, stop, attempts=5):
+        """Log in, waiting and retrying while the password pool sheds load with 503"""
+        for _ in range(attempts):
+            status, _ = self.request('POST /login', '/login', data={'username': username, 'password': PASSWORD})
+            if status != 503 or stop.wait(random.uniform(0.5, 1.5)):
+                return status == 302
+        return False
+
+    def logout(self):
+        self.request('GET /logout', '/logout')
+
+class Recorder:
+    """Thread-safe collection of (status, latency) samples per endpoint label"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, status, latency, error=None):
+        with self._lock:
+            self.samples.setdefault(label, []).append((status, latency))
+            if error:
+                self.errors.setdefault(label, {}).setdefault(error, 0)
+                self.errors[label][error] += 1
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+def summarize(recorder, elapsed):
+    """Per-endpoint statistics; 5xx responses and connection failures count as errors"""
+    endpoints = {}
+    for label, samples in sorted(recorder.samples.items()):
+        latencies = sorted(latency * 1000 for _, latency in samples)
+        statuses = {}
+        for status, _ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(1 for status, _ in samples if status is None or status >= 500)
+        endpoints[label] = {
+            'requests': len(samples),
+            'throughput': round(len(samples) / elapsed, 2),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 4),
+            'statuses': statuses,
+            'exceptions': recorder.errors.get(label, {}),
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 2),
+                'p50': round(percentile(latencies, 0.50), 2),
+                'p95': round(percentile(latencies, 0.95), 2),
+                'p99': round(percentile(latencies, 0.99), 2),
+                'max': round(latencies[-1], 2),
+            }
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    errors = sum(e['errors'] for e in endpoints.values())
+    return {
+        'elapsed': round(elapsed, 2),
+        'requests': total,
+        'throughput': round(total / elapsed, 2) if elapsed else 0,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0,
+        'endpoints': endpoints
+    }
+
+def seed_database(path, args):
+    """Seed the load test database, returns its targets like read_targets"""
+    engine = seeding.open_engine(f'sqlite:///{path}', reset=True)
+    hasher = PasswordHasher(HASH_PROFILES[args.hash_profile])
+    try:
+        with engine.begin() as conn:
+            stats = seeding.generate_dataset(conn, random.Random(args.seed), students=args.students,
+                                             events=args.events, hasher=hasher)
+            admins = [(f"loadadmin{i}", f"Load Admin {i}") for i in range(args.admins)]
+            seeding.insert_students(conn, admins, stats, hasher)
+            conn.execute(text("UPDATE user SET is_admin = 1 WHERE username LIKE 'loadadmin%'"))
+            seeding.insert_events(conn, [(RUSH_EVENT, datetime.now() + timedelta(days=30),
+                                          "Týdenní lyžařský kurz v Krkonoších")], stats)
+            rush_event_id = conn.execute(text("SELECT MAX(id) FROM event")).scalar()
+            conn.execute(text("UPDATE event SET capacity = :capacity WHERE id = :id"),
+                         {'capacity': args.capacity, 'id': rush_event_id})
+    finally:
+        engine.dispose()
+    print(f"Seeded {stats.finish()}")
+    return read_targets(path)
+
+def read_targets(path):
+    """Read the usernames, admin usernames, rush event id and registration ids of a seeded database"""
+    engine = create_engine(f'sqlite:///{path}')
+    try:
+        with engine.connect() as conn:
+            students = list(conn.execute(text("SELECT username FROM user WHERE is_admin = 0")).scalars())
+            admins = list(conn.execute(text(
+                "SELECT username FROM user WHERE is_admin = 1 AND username LIKE 'loadadmin%' ORDER BY id"
+            )).scalars())
+            rush_event_id = conn.execute(text("SELECT MAX(id) FROM event WHERE name = :name"),
+                                         {'name': RUSH_EVENT}).scalar()
+            registrations = list(conn.execute(text("SELECT id FROM registration LIMIT 5000")).scalars())
+    finally:
+        engine.dispose()
+    return students, admins, rush_event_id, registrations
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(database_path, port, hash_profile):
+    """Run the app on the seeded database, returns the process once it answers"""
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_path}', PASSWORD_HASH_PROFILE=hash_profile)
+    code = f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"
+    # Its own process group, so stop_server also reaches the password pool's workers
+    process = subprocess.Popen([sys.executable, '-c', code], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The app exited before it started serving")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/events?limit=1', timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError("The app did not start within 30 s")
+
+def stop_server(process, timeout=10):
+    """Stop the app started by start_server together with every process it started
+
+    SIGTERM goes to the whole process group; whatever is still running after
+    timeout seconds, the app or its password workers, is killed.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    deadline = time.monotonic() + timeout
+    try:
+        process.wait(timeout=timeout)
+        while time.monotonic() < deadline:
+            os.killpg(process.pid, 0)  # Raises once the last process of the group is gone
+            time.sleep(0.05)
+        os.killpg(process.pid, signal.SIGKILL)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+def student_session(client, username, rng, stop, scenario, context):
+    """Loop of one student client until stop is set"""
+    if scenario == 'login':
+        while not stop.is_set():
+            if client.login(username, stop):
+                client.logout()
+        return
+
+    client.login(username, stop)
+    rush_path = f"/api/events/{context['rush_event_id']}"
+    while not stop.is_set():
+        if scenario == 'rush':
+            status, _ = client.request('POST /api/events/:id/register', rush_path + '/register', 'POST')
+            if status in (201, 409):
+                client.request('POST /api/events/:id/unregister', rush_path + '/unregister', 'POST')
+            continue
+        if scenario == 'poll':
+            client.request('GET /api/events', '/api/events', revalidate=True)
+            time.sleep(rng.uniform(0, context['think_time']))
+            continue
+
+        # Mixed: mostly reading, some registering
+        roll = rng.random()
+        if roll < 0.5:
+            client.request('GET /api/events', '/api/events', revalidate=True)
+        elif roll < 0.65:
+            client.request('GET /', '/')
+        elif roll < 0.75:
+            client.request('GET /api/events/search', '/api/events/search?q=' + rng.choice(['kurz', 'den', 'festival']))
+        elif roll < 0.85:
+            client.request('GET /event/:id', f"/event/{context['rush_event_id']}")
+        else:
+            status, _ = client.request('POST /api/events/:id/register', rush_path + '/register', 'POST')
+            if status in (201, 409) and rng.random() < 0.5:
+                client.request('POST /api/events/:id/unregister', rush_path + '/unregister', 'POST')
+        time.sleep(rng.uniform(0, context['think_time']))
+
+def admin_session(client, username, rng, stop, scenario, context):
+    """Loop of one admin client toggling attendance until stop is set"""
+    client.login(username, stop)
+    registrations = context['registrations']
+    while not stop.is_set() and registrations:
+        if rng.random() < 0.7:
+            client.request('GET /admin/toggle_attendance/:id',
+                           f"/admin/toggle_attendance/{rng.choice(registrations)}",
+                           headers={'X-Requested-With': 'XMLHttpRequest'})
+        else:
+            updates = [{'registration_id': registration_id, 'attended': rng.random() < 0.5}
+                       for registration_id in rng.sample(registrations, min(50, len(registrations)))]
+            client.request('POST /api/attendance/batch', '/api/attendance/batch', json_body=updates)
+        if scenario == 'mixed':
+            time.sleep(rng.uniform(0, context['think_time']))
+
+def run_clients(base_url, args, students, admins, context):
+    """Start the clients, let them run for args.duration seconds, returns (recorder, elapsed)"""
+    recorder = Recorder()
+    stop = threading.Event()
+    rng = random.Random(args.seed)
+    sessions = []
+    admin_clients = args.clients if args.scenario == 'attendance' else (
+        max(1, args.clients // 10) if args.scenario == 'mixed' else 0)
+    for i in range(args.clients):
+        if i < admin_clients:
+            sessions.append((admin_session, admins[i % len(admins)]))
+        else:
+            sessions.append((student_session, students[i % len(students)]))
+
+    threads = [
+        threading.Thread(target=session, args=(Client(base_url, recorder), username, random.Random(rng.random()),
+                                               stop, args.scenario, context), daemon=True)
+        for session, username in sessions
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    return recorder, time.perf_counter() - started
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['elapsed']} s: {report['throughput']} req/s, "
+          f"error rate {report['error_rate']:.2%}")
+    print(f"{'endpoint':<38} {'reqs':>7} {'req/s':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}  statuses")
+    for label, stats in report['endpoints'].items():
+        latency = stats['latency_ms']
+        print(f"{label:<38} {stats['requests']:>7} {stats['throughput']:>8} {stats['error_rate']:>6.1%} "
+              f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8}  {stats['statuses']}")
+
+def compare(before_path, after_path):
+    """Print throughput and latency changes per endpoint between two saved runs"""
+    with open(before_path) as f:
+        before = json.load(f)['results']
+    with open(after_path) as f:
+        after = json.load(f)['results']
+    print(f"{'endpoint':<38} {'req/s':>18} {'p95 ms':>20} {'p99 ms':>20}")
+    for label in sorted(set(before['endpoints']) | set(after['endpoints'])):
+        old, new = before['endpoints'].get(label), after['endpoints'].get(label)
+        if old is None or new is None:
+            print(f"{label:<38} only in {'after' if old is None else 'before'}")
+            continue
+        cells = [f"{old['throughput']} -> {new['throughput']}"]
+        for key in ('p95', 'p99'):
+            cells.append(f"{old['latency_ms'][key]} -> {new['latency_ms'][key]}")
+        print(f"{label:<38} {cells[0]:>18} {cells[1]:>20} {cells[2]:>20}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the school events app")
+    parser.add_argument('--scenario', choices=SCENARIOS, default='mixed')
+    parser.add_argument('--clients', type=int, default=50, help="concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=30, help="seconds to run")
+    parser.add_argument('--think-time', type=float, default=0.5, help="max seconds between a client's requests")
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=100)
+    parser.add_argument('--admins', type=int, default=5)
+    parser.add_argument('--capacity', type=int, default=50, help="seats of the rush event")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--hash-profile', choices=sorted(HASH_PROFILES), default='strong')
+    parser.add_argument('--database', help="seeded SQLite file to keep (with --seed-only) or the one the --url app "
+                                           "runs on; by default a throwaway file")
+    parser.add_argument('--seed-only', action='store_true', help="seed --database for a later --url run and exit")
+    parser.add_argument('--url', help="test an already running app on the --database seeded earlier")
+    parser.add_argument('--output', help=f"JSON file for the results, default {RESULTS_DIR}/<timestamp>.json")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="compare two saved runs and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    if (args.seed_only or args.url) and not args.database:
+        parser.error("--seed-only and --url need --database")
+    if args.scenario in ('attendance', 'mixed') and not args.url and args.admins < 1:
+        parser.error(f"the {args.scenario} scenario needs --admins of at least 1")
+
+    if args.seed_only:
+        seed_database(args.database, args)
+        print(f"Start the app with DATABASE_URL=sqlite:///{os.path.abspath(args.database)}")
+        return 0
+
+    if args.database:
+        database_path = args.database
+    else:
+        fd, database_path = tempfile.mkstemp(suffix='.db', prefix='loadtest-')
+        os.close(fd)
+    process = None
+    try:
+        if args.url:
+            if not os.path.exists(database_path):
+                raise SystemExit(f"{database_path} does not exist, run with --seed-only first")
+            students, admins, rush_event_id, registrations = read_targets(database_path)
+            if rush_event_id is None:
+                raise SystemExit(f"{database_path} is not seeded, run with --seed-only first")
+            if args.scenario in ('attendance', 'mixed') and not admins:
+                raise SystemExit(f"{database_path} has no load test admins for the {args.scenario} scenario")
+            base_url = args.url.rstrip('/')
+        else:
+            students, admins, rush_event_id, registrations = seed_database(database_path, args)
+            port = free_port()
+            process = start_server(database_path, port, args.hash_profile)
+            base_url = f'http://127.0.0.1:{port}'
+        context = {'rush_event_id': rush_event_id, 'registrations': registrations, 'think_time': args.think_time}
+        print(f"Running '{args.scenario}' with {args.clients} clients for {args.duration} s against {base_url}")
+        recorder, elapsed = run_clients(base_url, args, students, admins, context)
+    finally:
+        if process is not None:
+            stop_server(process)
+        for suffix in ('', '-wal', '-shm'):
+            if not args.database and os.path.exists(database_path + suffix):
+                os.remove(database_path + suffix)
+
+    report = summarize(recorder, elapsed)
+    print_report(report)
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'config': {k: v for k, v in vars(args).items() if k != 'compare'},
+                   'started': datetime.now().isoformat(timespec='seconds'),
+                   'results': report}, f, indent=2)
+    print(f"\nSaved {output}")
+    return 1 if report['error_rate'] > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Attendance matrix for the students overview.
+Registration and attendance are two bits per (student, event) cell, packed
+row by row into one bitset each: cell (row, column) is bit
+row * len(event_ids) + column, least significant bit first within a byte.
+A 2,000 x 300 grid is 75 KB per bitset, and base64 in the JSON payload
+makes that 100 KB, whatever share of the cells is registered. Registration
+ids are not part of the matrix; the client asks for one when it needs it.
+"""
+import base64
+
+class AttendanceMatrix:
+    """Student x event bitsets of registrations and attendance"""
+
+    def __init__(self, student_ids, event_ids):
+        self.student_ids = list(student_ids)
+        self.event_ids = list(event_ids)
+        self._rows = {student_id: i for i, student_id in enumerate(self.student_ids)}
+        self._columns = {event_id: i for i, event_id in enumerate(self.event_ids)}
+        size = (len(self.student_ids) * len(self.event_ids) + 7) // 8
+        self.registered = bytearray(size)
+        self.attended = bytearray(size)
+
+    @classmethod
+    def from_rows(cls, student_ids, event_ids, rows):
+        """Build the matrix from one row per student: (user_id, registered, attended)
+
+        registered and attended are comma-separated event ids as produced by
+        GROUP BY user_id with group_concat, attended may be None; a student
+        has each event at most once. Ids not in student_ids or event_ids
+        are skipped.
+        """
+        matrix = cls(student_ids, event_ids)
+        width = len(matrix.event_ids)
+        # A row is an int with bit `column` set per registration; the ids stay text, they are only looked up
+        masks = {str(event_id): 1 << column for event_id, column in matrix._columns.items()}
+        registered = attended = 0
+        for user_id, registered_ids, attended_ids in rows:
+            row = matrix._rows.get(user_id)
+            if row is None:
+                continue
+            offset = row * width
+            registered |= sum(masks.get(event_id, 0) for event_id in str(registered_ids).split(',')) << offset
+            if attended_ids:
+                attended |= sum(masks.get(event_id, 0) for event_id in str(attended_ids).split(',')) << offset
+        # Little-endian bytes of the int are exactly the bitset, least significant bit first
+        matrix.registered = bytearray(registered.to_bytes(len(matrix.registered), 'little'))
+        matrix.attended = bytearray(attended.to_bytes(len(matrix.attended), 'little'))
+        return matrix
+
+    def _bit(self, user_id, event_id):
+        row, column = self._rows.get(user_id), self._columns.get(event_id)
+        if row is None or column is None:
+            return None
+        return row * len(self.event_ids) + column
+
+    def cell(self, user_id, event_id):
+        """(registered, attended) of a student and event, (False, False) for unknown ids"""
+        bit = self._bit(user_id, event_id)
+        if bit is None:
+            return False, False
+        mask = 1 << (bit & 7)
+        return bool(self.registered[bit >> 3] & mask), bool(self.attended[bit >> 3] & mask)
+
+    def __len__(self):
+        """Number of registered cells"""
+        return int.from_bytes(self.registered, 'little').bit_count()
+
+    def encode(self):
+        """Both bitsets as base64 strings, for JSON"""
+        return {
+            'registered': base64.b64encode(self.registered).decode('ascii'),
+            'attended': base64.b64encode(self.attended).decode('ascii'),
+        }
@@ -0,0 +1,236 @@
+"""
+Prometheus metrics for /admin/metrics.
+Request counts, latency histograms and in-flight requests are recorded
+into a fixed set of stripes picked by thread id, each with its own lock,
+so concurrent requests almost never wait on each other and recording
+costs a dict update. The stripes are only merged when metrics are
+scraped. Values owned by other components (DB pool, caches, password
+pool) are read at scrape time through collectors.
+"""
+import bisect
+import threading
+import time
+from flask import g, request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STRIPES = 16
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class _Stripe:
+    """One shard of the counters, written only under its own lock"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}  # (method, route, status) -> count
+        self.latency = {}  # (method, route) -> [count per bucket..., +Inf count, sum]
+        self.in_flight = 0
+        self.checkouts = 0
+        self.checkout_waits = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_timeouts = 0
+
+class Metrics:
+    """Request and connection pool counters plus collectors for everything else"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, stripes=STRIPES):
+        self.buckets = tuple(buckets)
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._collectors = []
+
+    def _stripe(self):
+        return self._stripes[threading.get_native_id() % len(self._stripes)]
+
+    def request_started(self):
+        stripe = self._stripe()
+        with stripe.lock:
+            stripe.in_flight += 1
+
+    def request_finished(self, method, route, status, duration):
+        """Record a finished request; must run on the thread that called request_started"""
+        stripe = self._stripe()
+        with stripe.lock:
+            stripe.in_flight -= 1
+            key = (method, route, status)
+            stripe.requests[key] = stripe.requests.get(key, 0) + 1
+            histogram = stripe.latency.get((method, route))
+            if histogram is None:
+                histogram = stripe.latency[(method, route)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[bisect.bisect_left(self.buckets, duration)] += 1
+            histogram[-1] += duration
+
+    def pool_checkout(self, wait, waited, timed_out=False):
+        stripe = self._stripe()
+        with stripe.lock:
+            stripe.checkouts += 1
+            stripe.checkout_wait_seconds += wait
+            stripe.checkout_waits += waited
+            stripe.checkout_timeouts += timed_out
+
+    def add_collector(self, collect):
+        """Register collect() -> [(name, type, help, samples)], called on every scrape
+
+        A sample is (labels, value) or (labels, value, suffix) for the
+        _bucket/_sum/_count series of a histogram.
+        """
+        self._collectors.append(collect)
+
+    def snapshot(self):
+        """Merged copy of all stripes"""
+        requests, latency = {}, {}
+        totals = {'in_flight': 0, 'checkouts': 0, 'checkout_waits': 0, 'checkout_wait_seconds': 0.0,
+                  'checkout_timeouts': 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                for key, count in stripe.requests.items():
+                    requests[key] = requests.get(key, 0) + count
+                for key, histogram in stripe.latency.items():
+                    merged = latency.setdefault(key, [0] * len(histogram))
+                    for i, value in enumerate(histogram):
+                        merged[i] += value
+                for name in totals:
+                    totals[name] += getattr(stripe, name)
+        return requests, latency, totals
+
+    def families(self):
+        """All metric families as (name, type, help, samples)"""
+        requests, latency, totals = self.snapshot()
+        families = [
+            ('http_requests_total', 'counter', 'Requests by method, route and status',
+             [({'method': m, 'route': r, 'status': s}, count) for (m, r, s), count in sorted(requests.items())]),
+            ('http_request_duration_seconds', 'histogram', 'Request latency by method and route',
+             self._histogram_samples(latency)),
+            ('http_requests_in_flight', 'gauge', 'Requests being handled right now', [({}, totals['in_flight'])]),
+            ('db_pool_checkouts_total', 'counter', 'Connections checked out of the pool',
+             [({}, totals['checkouts'])]),
+            ('db_pool_checkout_waits_total', 'counter',
+             'Checkouts that waited because the pool was saturated',
+             [({}, totals['checkout_waits'])]),
+            ('db_pool_checkout_wait_seconds_total', 'counter', 'Time spent getting connections from the pool',
+             [({}, round(totals['checkout_wait_seconds'], 6))]),
+            ('db_pool_checkout_timeouts_total', 'counter', 'Checkouts that gave up after the pool timeout',
+             [({}, totals['checkout_timeouts'])]),
+        ]
+        for collect in self._collectors:
+            families.extend(collect())
+        return families
+
+    def _histogram_samples(self, latency):
+        samples = []
+        for (method, route), histogram in sorted(latency.items()):
+            labels = {'method': method, 'route': route}
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram):
+                cumulative += count
+                samples.append(({**labels, 'le': '+Inf' if bound == float('inf') else repr(bound)}, cumulative,
+                                 '_bucket'))
+            samples.append((labels, round(histogram[-1], 6), '_sum'))
+            samples.append((labels, cumulative, '_count'))
+        return samples
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for name, kind, help_text, samples in self.families():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ''
+                lines.append(f"{name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label_value(value)}"' for key, value in labels.items()) + '}'
+
+def format_value(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def init_metrics(app, metrics):
+    """Record every request of the app; requests without a matching route share one 'unmatched' label"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        metrics.request_started()
+
+    @app.after_request
+    def keep_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        status = 500 if exc is not None else g.get('metrics_status', 500)
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.request_finished(request.method, route, str(status), time.perf_counter() - started)
+
+def metered_pool_class(metrics):
+    """QueuePool subclass reporting checkouts, waits and timeouts to metrics"""
+
+    class MeteredQueuePool(QueuePool):
+        def connect(self):
+            # Opening a new connection below pool_size + max_overflow is no wait; only a
+            # checkout finding every allowed connection in use waits for one to be returned
+            saturated = self._max_overflow >= 0 and self.checkedout() >= self.size() + self._max_overflow
+            waited = saturated and self.checkedin() == 0
+            started = time.perf_counter()
+            try:
+                connection = super().connect()
+            except PoolTimeoutError:
+                metrics.pool_checkout(time.perf_counter() - started, waited, timed_out=True)
+                raise
+            metrics.pool_checkout(time.perf_counter() - started, waited)
+            return connection
+
+    return MeteredQueuePool
+
+def pool_families(pool):
+    """Gauges of a QueuePool's current state"""
+    if not isinstance(pool, QueuePool):
+        return []
+    return [
+        ('db_pool_size', 'gauge', 'Connections the pool keeps open', [({}, pool.size())]),
+        ('db_pool_checked_out', 'gauge', 'Connections in use', [({}, pool.checkedout())]),
+        ('db_pool_idle', 'gauge', 'Idle connections in the pool', [({}, pool.checkedin())]),
+        ('db_pool_overflow', 'gauge', 'Connections open beyond the pool size', [({}, max(0, pool.overflow()))]),
+    ]
+
+def cache_families(caches):
+    """Counters and gauges from the stats() of named caches; caches without counters are skipped"""
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    stats = {name: s for name, s in stats.items() if 'hits' in s}
+    return [
+        ('cache_hits_total', 'counter', 'Cache lookups that found an entry',
+         [({'cache': name}, s['hits']) for name, s in stats.items()]),
+        ('cache_misses_total', 'counter', 'Cache lookups that found nothing',
+         [({'cache': name}, s['misses']) for name, s in stats.items()]),
+        ('cache_hit_ratio', 'gauge', 'Hits over lookups since start',
+         [({'cache': name}, s['hit_rate']) for name, s in stats.items()]),
+        ('cache_evictions_total', 'counter', 'Entries dropped to stay within max_entries',
+         [({'cache': name}, s['evictions']) for name, s in stats.items()]),
+        ('cache_entries', 'gauge', 'Entries currently cached',
+         [({'cache': name}, s['entries']) for name, s in stats.items()]),
+    ]
+
+def password_pool_families(pool):
+    return [
+        ('password_pool_pending', 'gauge', 'Hashing jobs queued or running', [({}, pool.pending)]),
+        ('password_pool_max_pending', 'gauge', 'Jobs allowed before answering 503', [({}, pool.max_pending)]),
+        ('password_pool_workers', 'gauge', 'Hashing processes, 0 means inline', [({}, pool.workers)]),
+        ('password_pool_rejected_total', 'counter', 'Logins and sign-ups turned away with 503',
+         [({}, pool.rejected)]),
+    ]
@@ -0,0 +1,87 @@
+"""
+Keyset (cursor) pagination helpers for the list endpoints.
+A cursor holds the sort key of the last row of a page, so fetching the next
+page is an index range scan from that key instead of an OFFSET that has to
+skip all of the previous rows.
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    """Return the page size from a query string value, clamped to 1..MAX_LIMIT"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_LIMIT))
+
+def encode_cursor(scope, values):
+    """Encode the sort key of the last row of a page as an opaque URL-safe token"""
+    payload = [scope, [v.isoformat() if isinstance(v, datetime) else v for v in values]]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def decode_cursor(token, types, scope=None):
+    """Decode a cursor token, returns (scope, values) or None if it is missing or invalid
+
+    types holds the type of each sort key value, datetimes travel as ISO
+    strings. A forged cursor whose values do not match them is invalid too,
+    so only well-typed keys of the right length reach keyset_after.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_scope, values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(types):
+            return None
+        values = [cursor_value(value, expected) for value, expected in zip(values, types)]
+    except (ValueError, TypeError):
+        return None
+    if scope is not None and cursor_scope != scope:
+        return None
+    return cursor_scope, values
+
+def cursor_value(value, expected):
+    """One decoded sort key value, TypeError unless it has the expected type"""
+    if expected is datetime:
+        return datetime.fromisoformat(value)
+    if type(value) is not expected:  # Also keeps true/false out of integer keys
+        raise TypeError(f"Cursor value {value!r} is not {expected.__name__}")
+    return value
+
+def keyset_order(keys):
+    """ORDER BY clauses for a list of (column, descending) pairs"""
+    return [column.desc() if descending else column for column, descending in keys]
+
+def keyset_after(keys, values):
+    """Condition selecting the rows that come after `values` in the given order
+
+    keys is a list of (column, descending) pairs matching the ORDER BY of the
+    query and values holds the same columns of the last row already returned.
+    """
+    first_column, first_descending = keys[0]
+    # Redundant bound on the leading column lets SQLite use it as an index range
+    bound = first_column <= values[0] if first_descending else first_column >= values[0]
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        after = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, after))
+    return and_(bound, or_(*clauses))
+
+def next_cursor(scope, rows, limit, key):
+    """Cursor for the page after `rows`, or None when this was the last page
+
+    The query must fetch limit + 1 rows; the extra row only signals that
+    another page exists and is removed from rows.
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    return encode_cursor(scope, key(rows[-1]))
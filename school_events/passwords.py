@@ -0,0 +1,148 @@
+"""
+Password hashing profiles and batch hashing.
+The strong profile is what production stores; the fast profile is a cheap
+pbkdf2 for test runs and throwaway databases, selected with the
+PASSWORD_HASH_PROFILE setting (or environment variable). Batch hashing
+computes each distinct password once and spreads many distinct passwords
+over a process pool, since every hash is deliberately CPU-bound. Logins
+and sign-ups use a bounded pool that sheds load instead of queueing.
+Worker processes are spawned, not forked: a fork of the threaded server
+would inherit its listening socket and keep the port open after it exits.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_PROFILES = {
+    'strong': 'scrypt:32768:8:1',
+    'fast': 'pbkdf2:sha256:1000',
+}
+
+# Below this many distinct passwords starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 8
+
+# Start method of every hashing worker, see the module docstring
+WORKER_CONTEXT = multiprocessing.get_context('spawn')
+
+class PasswordHasher:
+    """Hashes passwords with one werkzeug method string"""
+
+    def __init__(self, method=HASH_PROFILES['strong'], processes=None):
+        self.method = method
+        self.processes = processes or os.cpu_count() or 1
+
+    def hash(self, password):
+        return generate_password_hash(password, method=self.method)
+
+    def hash_many(self, passwords):
+        """Return a hash for every password, in order
+
+        Equal passwords share one hash (and salt): seeding gives thousands of
+        students the same default password, which is then hashed only once.
+        """
+        passwords = list(passwords)
+        distinct = list(dict.fromkeys(passwords))
+        if len(distinct) < PARALLEL_THRESHOLD or self.processes == 1:
+            hashes = [self.hash(password) for password in distinct]
+        else:
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=WORKER_CONTEXT) as pool:
+                hashes = list(pool.map(partial(generate_password_hash, method=self.method), distinct,
+                                       chunksize=max(1, len(distinct) // (self.processes * 4))))
+        by_password = dict(zip(distinct, hashes))
+        return [by_password[password] for password in passwords]
+
+def create_hasher(config):
+    """Create the hasher for the profile selected by PASSWORD_HASH_PROFILE"""
+    profile = config.get('PASSWORD_HASH_PROFILE', 'strong')
+    if profile not in HASH_PROFILES:
+        raise ValueError(f"Unknown password hash profile: {profile}")
+    return PasswordHasher(HASH_PROFILES[profile], processes=config.get('PASSWORD_HASH_PROCESSES'))
+
+class PasswordPoolBusy(Exception):
+    """Raised instead of queueing when the password pool already has max_pending jobs"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Password pool is busy, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+class PasswordPool:
+    """Bounded process pool for password hashing and verification on the request path
+
+    Hashing is CPU-bound by design, so running it on request threads stalls
+    every other request on the worker. Jobs go to `workers` processes (0 runs
+    them inline, for tests) and at most max_pending may be queued or running;
+    beyond that callers get PasswordPoolBusy to answer with 503 right away.
+    """
+
+    def __init__(self, hasher, workers=None, max_pending=None, retry_after=5):
+        self.hasher = hasher
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max(1, self.workers) * 8 if max_pending is None else max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        if self.workers:
+            atexit.register(self.shutdown)
+
+    def run(self, fn, *args):
+        """Run fn(*args) in the pool and wait for the result"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy(self.retry_after)
+            self.pending += 1
+        try:
+            if not self.workers:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A killed worker breaks the whole executor, start a fresh one next time
+            self.shutdown()
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def hash(self, password):
+        return self.run(partial(generate_password_hash, method=self.hasher.method), password)
+
+    def verify(self, password_hash, password):
+        return self.run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash should be upgraded to the strong profile
+
+        Only a server on the strong profile upgrades hashes: one on the fast
+        profile (tests, load tests) must never replace a stronger hash with its
+        own cheap one.
+        """
+        strong = HASH_PROFILES['strong']
+        return self.hasher.method == strong and password_hash.split('$', 1)[0] != strong
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=WORKER_CONTEXT)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+def create_password_pool(config, hasher):
+    """Create the request-path pool sized by the PASSWORD_POOL_* settings"""
+    return PasswordPool(
+        hasher,
+        workers=config.get('PASSWORD_POOL_WORKERS'),
+        max_pending=config.get('PASSWORD_POOL_MAX_PENDING'),
+        retry_after=config.get('PASSWORD_POOL_RETRY_AFTER', 5)
+    )
@@ -0,0 +1,114 @@
+"""
+On-demand profiling of single requests.
+An admin adds ?_profile=1 (or the X-Profile: 1 header) to any URL and that
+one request runs under cProfile while a sampler thread records its stack.
+Three files land in the profile directory (instance/profiles by default):
+  NAME.prof       cProfile stats, for pstats or snakeviz
+  NAME.txt        the top functions by cumulative time
+  NAME.collapsed  sampled stacks in collapsed format, for flamegraph.pl or speedscope
+Only the newest PROFILER_MAX_PROFILES profiles are kept. Requests without
+the switch only pay for one dict lookup.
+"""
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from flask import g, request
+
+EXTENSIONS = ('.prof', '.txt', '.collapsed')
+
+class RequestProfile:
+    """cProfile plus a stack sampler for the thread that created it"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.samples = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self):
+        self._sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def save(self, directory, label, keep):
+        """Write the three files, prune old profiles and return the profile name"""
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')[:60] or 'request'
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}"
+        path = os.path.join(directory, name)
+        self.profile.dump_stats(path + '.prof')
+        with open(path + '.txt', 'w') as f:
+            f.write(f"{label}\n\n")
+            pstats.Stats(self.profile, stream=f).sort_stats('cumulative').print_stats(40)
+        with open(path + '.collapsed', 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        prune_profiles(directory, keep)
+        return name
+
+def prune_profiles(directory, keep):
+    """Delete all but the newest keep profiles; names start with their timestamp"""
+    names = sorted({os.path.splitext(filename)[0] for filename in os.listdir(directory)
+                    if filename.endswith(EXTENSIONS)})
+    for name in names[:max(0, len(names) - keep)]:
+        for extension in EXTENSIONS:
+            try:
+                os.remove(os.path.join(directory, name + extension))
+            except FileNotFoundError:
+                pass
+
+def profile_directory(app):
+    return app.config.get('PROFILER_DIRECTORY') or os.path.join(app.instance_path, 'profiles')
+
+def init_profiler(app, allowed):
+    """Profile requests that ask for it when allowed() is true, e.g. for admins"""
+
+    @app.before_request
+    def start_profile():
+        if request.args.get('_profile') is None and 'X-Profile' not in request.headers:
+            return
+        if not allowed():
+            return
+        g.profile = RequestProfile(app.config.get('PROFILER_SAMPLE_INTERVAL', 0.001))
+        g.profile.start()
+
+    @app.after_request
+    def save_profile(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.stop()
+            response.headers['X-Profile-Id'] = profile.save(
+                profile_directory(app),
+                f"{request.method} {request.full_path.rstrip('?')}",
+                app.config.get('PROFILER_MAX_PROFILES', 50)
+            )
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        # A view that raised skips after_request, the profiler must not keep running on this thread
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.stop()
@@ -0,0 +1,93 @@
+"""
+Per-request SQL query statistics.
+Engine events count and time every statement executed while a request is
+handled. In debug mode (or with QUERY_STATS_HEADERS) the totals go out as
+X-Query-Count / X-Query-Time headers, which makes N+1 patterns visible in
+the browser's network tab, and statements slower than
+SLOW_QUERY_THRESHOLD_MS are logged with the route that ran them.
+assert_max_queries lets tests pin how many queries a route may take.
+"""
+import time
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+class QueryStats:
+    """Query count and total time in seconds of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def add(self, duration):
+        self.count += 1
+        self.duration += duration
+
+def current_route():
+    """The URL rule of the current request, e.g. '/event/<int:event_id>', or '-' outside requests"""
+    if not has_request_context():
+        return '-'
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f"{request.method} {rule}"
+
+def init_query_stats(app, engine):
+    """Count and time the engine's queries per request, add the headers and log slow queries"""
+    app.extensions['query_stats'] = engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_started'].pop()
+        if has_request_context():
+            if 'query_stats' not in g:
+                g.query_stats = QueryStats()
+            g.query_stats.add(duration)
+        threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+        if threshold is not None and duration * 1000 >= threshold:
+            app.logger.warning('Slow query (%.1f ms) in %s: %s',
+                               duration * 1000, current_route(), ' '.join(statement.split()))
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @app.after_request
+    def add_query_headers(response):
+        if app.debug or app.config.get('QUERY_STATS_HEADERS'):
+            stats = g.get('query_stats') or QueryStats()
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time'] = f"{stats.duration * 1000:.1f}ms"
+        return response
+
+@contextmanager
+def count_queries(engine):
+    """Collect the statements executed on engine inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def assert_max_queries(client, path, max_queries, method='GET', **kwargs):
+    """Request path with a test client and fail if it took more than max_queries queries
+
+    Returns the response. The failure message lists the statements, so an
+    N+1 shows up as the same SELECT repeated.
+    """
+    with count_queries(client.application.extensions['query_stats']) as statements:
+        response = client.open(path, method=method, **kwargs)
+    assert len(statements) <= max_queries, (
+        f"{method} {path} ran {len(statements)} queries, at most {max_queries} allowed:\n"
+        + '\n'.join(' '.join(statement.split()) for statement in statements)
+    )
+    return response
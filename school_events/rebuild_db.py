@@ -1,6 +1,7 @@
 import os
 from sqlalchemy import MetaData
 from app import app, db, User, Event, Registration
+from search import ensure_search_index, drop_search_index
 
 # Delete the database file if it exists
 db_path = os.path.join(os.path.dirname(__file__), 'school_events.db')
@@ -10,8 +11,12 @@ if os.path.exists(db_path):
 
 # Drop all tables and recreate them
 with app.app_context():
+    # The FTS tables own shadow tables that must not be dropped one by one
+    with db.engine.begin() as conn:
+        drop_search_index(conn)
     meta = MetaData()
     meta.reflect(bind=db.engine)
     meta.drop_all(bind=db.engine)
     db.create_all()
+    ensure_search_index(db.engine)
     print("Created new database with updated schema.")
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Full-text search over students and events, backed by SQLite FTS5.
+The unicode61 tokenizer with remove_diacritics folds Czech characters, so
+"novotna" matches "Novotná". The indexes are external-content tables kept
+in sync with the user and event tables by triggers, so every write path
+(ORM, bulk inserts, scripts) updates them without extra code. Lists sorted
+by name use the "czech" collation registered on every SQLite connection.
+"""
+import re
+import unicodedata
+from sqlalchemy import text, column, event
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS user_search USING fts5(
+        name, username, content='user', content_rowid='id', tokenize='{TOKENIZER}')""",
+    """CREATE TRIGGER IF NOT EXISTS user_search_insert AFTER INSERT ON user BEGIN
+        INSERT INTO user_search(rowid, name, username) VALUES (new.id, new.name, new.username);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_search_delete AFTER DELETE ON user BEGIN
+        INSERT INTO user_search(user_search, rowid, name, username) VALUES ('delete', old.id, old.name, old.username);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_search_update AFTER UPDATE OF name, username ON user BEGIN
+        INSERT INTO user_search(user_search, rowid, name, username) VALUES ('delete', old.id, old.name, old.username);
+        INSERT INTO user_search(rowid, name, username) VALUES (new.id, new.name, new.username);
+    END""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+        name, description, content='event', content_rowid='id', tokenize='{TOKENIZER}')""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_insert AFTER INSERT ON event BEGIN
+        INSERT INTO event_search(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_delete AFTER DELETE ON event BEGIN
+        INSERT INTO event_search(event_search, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_update AFTER UPDATE OF name, description ON event BEGIN
+        INSERT INTO event_search(event_search, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO event_search(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+DROP_SCHEMA = [
+    "DROP TRIGGER IF EXISTS user_search_insert",
+    "DROP TRIGGER IF EXISTS user_search_delete",
+    "DROP TRIGGER IF EXISTS user_search_update",
+    "DROP TABLE IF EXISTS user_search",
+    "DROP TRIGGER IF EXISTS event_search_insert",
+    "DROP TRIGGER IF EXISTS event_search_delete",
+    "DROP TRIGGER IF EXISTS event_search_update",
+    "DROP TABLE IF EXISTS event_search",
+]
+
+# Czech alphabetical order: č, ř, š, ž and ch are letters of their own, while the other
+# accented letters (á, ď, é, ě, ň, ...) sort with their base letter and only break ties
+CZECH_ALPHABET = ['a', 'b', 'c', 'č', 'd', 'e', 'f', 'g', 'h', 'ch', 'i', 'j', 'k', 'l', 'm', 'n', 'o',
+                  'p', 'q', 'r', 'ř', 's', 'š', 't', 'u', 'v', 'w', 'x', 'y', 'z', 'ž']
+CZECH_LETTER_RANK = {letter: rank for rank, letter in enumerate(CZECH_ALPHABET)}
+CZECH_COLLATION = 'czech'
+
+def czech_sort_key(value):
+    """Sort key placing value in Czech alphabetical order, case and accents only break ties
+
+    Characters that are not letters sort before the letters by code point,
+    and the value itself comes last so only equal strings compare equal.
+    """
+    primary, accents, cases = [], [], []
+    lowered = value.lower()
+    i = 0
+    while i < len(lowered):
+        letter = 'ch' if lowered.startswith('ch', i) else lowered[i]
+        base = letter if letter in CZECH_LETTER_RANK else unicodedata.normalize('NFD', letter)[0]
+        if base in CZECH_LETTER_RANK:
+            primary.append((1, CZECH_LETTER_RANK[base]))
+        else:
+            primary.append((0, ord(letter)))
+        accents.append(letter != base)
+        cases.append(value[i] != lowered[i])
+        i += len(letter)
+    return primary, accents, cases, value
+
+def czech_collation(a, b):
+    key_a, key_b = czech_sort_key(a), czech_sort_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+def register_czech_collation(engine):
+    """Make COLLATE czech available on every new connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def create_collation(dbapi_connection, connection_record):
+        dbapi_connection.create_collation(CZECH_COLLATION, czech_collation)
+
+_ready_engines = set()
+
+def ensure_search_index(engine):
+    """Create the search tables and triggers if missing, filling them from existing rows"""
+    if engine.url in _ready_engines:
+        return
+    with engine.begin() as conn:
+        existing = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE name IN ('user_search', 'event_search')"
+        )).scalars().all()
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        if 'user_search' not in existing:
+            conn.execute(text("INSERT INTO user_search(user_search) VALUES ('rebuild')"))
+        if 'event_search' not in existing:
+            conn.execute(text("INSERT INTO event_search(event_search) VALUES ('rebuild')"))
+    _ready_engines.add(engine.url)
+
+def drop_search_index(conn):
+    for statement in DROP_SCHEMA:
+        conn.execute(text(statement))
+    _ready_engines.clear()
+
+def match_query(search, prefix=True, columns=None):
+    """Turn user input into an FTS5 MATCH expression, None if it has no searchable words
+
+    Every word is quoted so FTS syntax in the input is matched literally, and
+    with prefix=True the words also match longer tokens ("nov" -> "Novotná").
+    """
+    words = re.findall(r'\w+', search or '')
+    if not words:
+        return None
+    terms = ' '.join('"{}"{}'.format(word, '*' if prefix else '') for word in words)
+    if columns:
+        return '{%s} : (%s)' % (' '.join(columns), terms)
+    return terms
+
+def matching_user_ids(match):
+    """Selectable of user ids matching an FTS expression, for use with in_()"""
+    return text("SELECT rowid FROM user_search WHERE user_search MATCH :user_match") \
+        .bindparams(user_match=match).columns(column('rowid'))
+
+def matching_event_ids(match):
+    """Selectable of event ids matching an FTS expression, for use with in_()"""
+    return text("SELECT rowid FROM event_search WHERE event_search MATCH :event_match") \
+        .bindparams(event_match=match).columns(column('rowid'))
+
+def search_users(session, match, limit):
+    """Return [(user_id, score)] best match first"""
+    rows = session.execute(text(
+        "SELECT rowid, bm25(user_search) FROM user_search WHERE user_search MATCH :match "
+        "ORDER BY rank LIMIT :limit"
+    ), {'match': match, 'limit': limit})
+    return [(user_id, -rank) for user_id, rank in rows]
+
+def search_events(session, match, limit):
+    """Return [(event_id, score)] best match first; a match in the name weighs more than in the description"""
+    rows = session.execute(text(
+        "SELECT rowid, bm25(event_search, 5.0, 1.0) AS score FROM event_search WHERE event_search MATCH :match "
+        "ORDER BY score LIMIT :limit"
+    ), {'match': match, 'limit': limit})
+    return [(event_id, -rank) for event_id, rank in rows]
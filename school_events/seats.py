@@ -0,0 +1,88 @@
+"""
+Seat reservation with a waitlist.
+Each operation is a single SQL statement that counts the confirmed seats
+and writes in the same step. SQLite runs one writer at a time, so two
+students can never both take the last seat, and with busy_timeout a rush
+of registrations queues for the write lock instead of failing.
+Registrations beyond the capacity are waitlisted and promoted in order of
+arrival (registration id) as soon as seats free up.
+"""
+from datetime import datetime
+from sqlalchemy import text, bindparam, DateTime
+from versioning import bump_data_version
+
+CONFIRMED = 'confirmed'
+WAITLISTED = 'waitlisted'
+
+CONFIRMED_COUNT = "(SELECT COUNT(*) FROM registration c WHERE c.event_id = e.id AND c.status = 'confirmed')"
+
+RESERVE_SQL = text(f"""
+    INSERT INTO registration (user_id, event_id, attended, registration_date, status)
+    SELECT :user_id, e.id, 0, :now,
+           CASE WHEN e.capacity IS NULL OR {CONFIRMED_COUNT} < e.capacity
+                THEN 'confirmed' ELSE 'waitlisted' END
+    FROM event e WHERE e.id = :event_id
+    RETURNING id, status
+""").bindparams(bindparam('now', type_=DateTime))
+
+# LIMIT -1 means no limit in SQLite, for events without a capacity
+PROMOTE_SQL = text(f"""
+    UPDATE registration SET status = 'confirmed'
+    WHERE id IN (
+        SELECT id FROM registration
+        WHERE event_id = :event_id AND status = 'waitlisted'
+        ORDER BY id
+        LIMIT (SELECT CASE WHEN e.capacity IS NULL THEN -1 ELSE MAX(e.capacity - {CONFIRMED_COUNT}, 0) END
+               FROM event e WHERE e.id = :event_id)
+    )
+""")
+
+FREE_SEATS_SQL = text(f"""
+    SELECT e.id, MAX(e.capacity - {CONFIRMED_COUNT}, 0) FROM event e WHERE e.capacity IS NOT NULL
+""")
+
+def free_seats(connection):
+    """{event_id: confirmed seats left} for the events that have a capacity"""
+    return dict(connection.execute(FREE_SEATS_SQL).all())
+
+def reserve_seat(connection, user_id, event_id, now=None):
+    """Register a student, returns (registration_id, status) or None if the event does not exist
+
+    The status is 'confirmed' while seats are left and 'waitlisted' after.
+    A second registration of the same student raises IntegrityError from
+    the unique (user_id, event_id) index.
+    """
+    row = connection.execute(RESERVE_SQL, {
+        'user_id': user_id, 'event_id': event_id, 'now': now or datetime.utcnow()
+    }).first()
+    if row is None:
+        return None
+    bump_data_version(connection)
+    return row.id, row.status
+
+def promote_waitlist(connection, event_id):
+    """Confirm waitlisted registrations in arrival order while seats are free, returns how many"""
+    promoted = connection.execute(PROMOTE_SQL, {'event_id': event_id}).rowcount
+    if promoted:
+        bump_data_version(connection)
+    return promoted
+
+def release_seat(connection, user_id, event_id):
+    """Cancel a registration and hand its seat to the waitlist, returns False if there was none"""
+    deleted = connection.execute(
+        text("DELETE FROM registration WHERE user_id = :user_id AND event_id = :event_id"),
+        {'user_id': user_id, 'event_id': event_id}
+    ).rowcount
+    if not deleted:
+        return False
+    bump_data_version(connection)
+    promote_waitlist(connection, event_id)
+    return True
+
+def waitlist_position(connection, registration_id):
+    """1-based position of a waitlisted registration, None if it is confirmed"""
+    return connection.execute(text("""
+        SELECT COUNT(*) FROM registration w
+        JOIN registration r ON r.id = :registration_id
+        WHERE r.status = 'waitlisted' AND w.event_id = r.event_id AND w.status = 'waitlisted' AND w.id <= r.id
+    """), {'registration_id': registration_id}).scalar() or None
@@ -0,0 +1,421 @@
+"""
+Bulk seeding of students, events and registrations.
+Rows are written with executemany in chunks inside one transaction instead
+of one ORM object per row, so a benchmark-scale database (5,000 students x
+500 events, about a million registrations) is built in seconds. Every
+generator takes a random.Random, so the same seed produces the same data.
+
+Usage:
+    python seeding.py dataset --students 5000 --events 500 --seed 42 --database sqlite:///bench.db --reset
+    python seeding.py sample | previous | event
+    python seeding.py import students.csv
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, Boolean, insert, text, bindparam
+from passwords import PasswordHasher, HASH_PROFILES
+from versioning import bump_data_version
+from seats import free_seats, CONFIRMED, WAITLISTED
+
+CHUNK_SIZE = 10000
+DEFAULT_PASSWORD = 'student123'
+
+# Just the columns seeding writes; the full models live in app.py, which imports this module
+_metadata = MetaData()
+user_table = Table('user', _metadata, Column('id', Integer, primary_key=True), Column('username', String),
+                   Column('password_hash', String), Column('name', String), Column('is_admin', Boolean))
+event_table = Table('event', _metadata, Column('id', Integer, primary_key=True), Column('name', String),
+                    Column('date', DateTime), Column('description', Text))
+
+# Registrations go through the driver directly, datetimes pre-formatted the way SQLAlchemy stores them
+REGISTRATION_INSERT = (
+    "INSERT OR IGNORE INTO registration (user_id, event_id, attended, registration_date, status) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+REGISTERED_PAIRS = text(
+    "SELECT user_id, event_id FROM registration WHERE user_id IN :user_ids"
+).bindparams(bindparam('user_ids', expanding=True))
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+SAMPLE_EVENTS = [
+    ("School Christmas Party", datetime(2025, 12, 20, 18, 0),
+     "Annual Christmas celebration with music, food, and fun activities."),
+    ("Science Fair", datetime(2025, 11, 15, 13, 0),
+     "Students present their science projects. Prizes for best projects!"),
+    ("Sports Day", datetime(2025, 10, 25, 9, 0),
+     "Annual sports competition with various athletic events and team games."),
+]
+
+SAMPLE_STUDENTS = [
+    "Anna Novotná", "Jan Svoboda", "Marie Dvořáková",
+    "Petr Novák", "Tereza Černá", "Tomáš Procházka",
+    "Lucie Kučerová", "Jakub Veselý", "Karolína Horáková", "David Král"
+]
+
+PREVIOUS_EVENTS = [
+    ("Spring Concert 2025", datetime(2025, 5, 15, 17, 30),
+     "Annual spring concert featuring student performances in choir and instrumental music."),
+    ("Math Olympics", datetime(2025, 4, 20, 9, 0),
+     "Mathematics competition with challenging problems and puzzles."),
+    ("Career Day", datetime(2025, 3, 12, 10, 0),
+     "Professional speakers sharing career insights and opportunities."),
+    ("Art Exhibition", datetime(2025, 2, 28, 14, 0),
+     "Showcase of student artwork from various mediums and styles."),
+    ("Winter Sports Tournament", datetime(2025, 1, 25, 8, 30),
+     "Indoor sports competition including basketball and volleyball."),
+    ("Literature Festival", datetime(2024, 12, 10, 13, 0),
+     "Celebration of reading and writing with author visits and workshops."),
+]
+
+PREVIOUS_STUDENTS = [
+    "Eva Malá", "Martin Horák", "Zuzana Šimková",
+    "Filip Kovář", "Nina Benešová", "Ondřej Marek",
+    "Klára Říhová", "Adam Tichý", "Barbora Vávrová",
+    "Daniel Pospíšil", "Sofie Marková", "Matěj Kříž"
+]
+
+EVENT_TYPES = [
+    ("Graduation Ceremony", "End of year graduation ceremony celebrating our students' achievements. Family and friends welcome!"),
+    ("Technology Workshop", "Hands-on workshop exploring latest technology trends and innovations."),
+    ("Drama Performance", "Student theatrical production showcasing dramatic talents."),
+    ("Field Trip", "Educational excursion to local museum and historical sites."),
+    ("Dance Competition", "Annual dance showcase with various styles and performances."),
+    ("Debate Tournament", "Inter-class debate competition on current events and social issues."),
+    ("Music Festival", "Multi-genre music festival featuring student bands and solo performers."),
+    ("Cooking Class", "Interactive culinary workshop learning international cuisines."),
+    ("Photography Exhibition", "Display of student photography from various themes and techniques."),
+    ("Environmental Day", "Activities focused on sustainability and environmental awareness.")
+]
+
+FIRST_NAMES = [
+    "Anna", "Jan", "Marie", "Petr", "Tereza", "Tomáš", "Lucie", "Jakub", "Karolína", "David",
+    "Eva", "Martin", "Zuzana", "Filip", "Nina", "Ondřej", "Klára", "Adam", "Barbora", "Daniel",
+    "Sofie", "Matěj", "Eliška", "Vojtěch", "Natálie", "Lukáš", "Kristýna", "Štěpán", "Veronika", "Michal"
+]
+
+LAST_NAMES = [
+    "Novák", "Svoboda", "Dvořák", "Černý", "Procházka", "Kučera", "Veselý", "Horák", "Král", "Malý",
+    "Šimek", "Kovář", "Beneš", "Marek", "Říha", "Tichý", "Vávra", "Pospíšil", "Kříž", "Němec",
+    "Pokorný", "Hájek", "Jelínek", "Růžička", "Fiala", "Sedláček", "Doležal", "Zeman", "Kolář", "Navrátil"
+]
+
+class SeedStats:
+    """Rows inserted per table and the time it took"""
+
+    def __init__(self):
+        self.rows = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, table_name, count):
+        self.rows[table_name] = self.rows.get(table_name, 0) + count
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def total(self):
+        return sum(self.rows.values())
+
+    @property
+    def rows_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        counts = ', '.join(f"{name}: {count}" for name, count in self.rows.items())
+        return f"{counts} in {self.elapsed:.2f} s ({self.rows_per_second:,.0f} rows/s)"
+
+def username_for(name):
+    """Login name derived from a full name: lowercase ASCII without spaces ("Anna Novotná" -> "annanovotna")"""
+    folded = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return ''.join(ch for ch in folded.lower() if ch.isalnum() or ch == '.')
+
+def db_datetime(value):
+    """Datetime as stored by SQLAlchemy in SQLite; strings are assumed to be formatted already"""
+    return value if isinstance(value, str) else value.strftime(DATETIME_FORMAT)
+
+def chunks(rows, size=CHUNK_SIZE):
+    """Split an iterable into lists of at most size items"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def insert_events(conn, events, stats):
+    """Insert (name, date, description) tuples, returns the new ids in the same order"""
+    ids = []
+    for chunk in chunks(events):
+        result = conn.execute(
+            insert(event_table).returning(event_table.c.id, sort_by_parameter_order=True),
+            [{'name': name, 'date': date, 'description': description} for name, date, description in chunk]
+        )
+        ids.extend(result.scalars().all())
+    stats.add('events', len(ids))
+    return ids
+
+def insert_students(conn, students, stats, hasher=None):
+    """Insert (username, name) or (username, name, password) tuples, returns the new ids
+
+    Usernames that already exist are skipped. Students without a password
+    get DEFAULT_PASSWORD; each distinct password is hashed only once.
+    """
+    hasher = hasher or PasswordHasher()
+    existing = set(conn.execute(text("SELECT username FROM user")).scalars())
+    new_students = []
+    for username, name, *password in students:
+        if username not in existing:
+            existing.add(username)
+            new_students.append((username, name, password[0] if password else DEFAULT_PASSWORD))
+    if not new_students:
+        return []
+
+    hashes = hasher.hash_many(password for _, _, password in new_students)
+    ids = []
+    for chunk in chunks(zip(new_students, hashes)):
+        result = conn.execute(
+            insert(user_table).returning(user_table.c.id, sort_by_parameter_order=True),
+            [{'username': username, 'password_hash': password_hash, 'name': name, 'is_admin': False}
+             for (username, name, _), password_hash in chunk]
+        )
+        ids.extend(result.scalars().all())
+    stats.add('students', len(ids))
+    return ids
+
+def named_students(names):
+    return [(username_for(name), name) for name in names]
+
+def insert_registrations(conn, rows, stats, chunk_size=CHUNK_SIZE):
+    """Insert (user_id, event_id, attended, registration_date) tuples from any iterable
+
+    Rows are consumed lazily in chunks, so generators of millions of rows do
+    not have to fit in memory. Pairs that are already registered are skipped
+    before any seat is given out. Events with a capacity are filled up to it
+    like registrations through the app; the rows beyond it are waitlisted, and
+    waitlisted students have not attended.
+    """
+    seats = free_seats(conn)
+
+    def values(user_id, event_id, attended, registration_date):
+        status = CONFIRMED
+        if event_id in seats:
+            if seats[event_id] > 0:
+                seats[event_id] -= 1
+            else:
+                status, attended = WAITLISTED, False
+        return user_id, event_id, int(attended), db_datetime(registration_date), status
+
+    inserted = 0
+    for chunk in chunks(rows, chunk_size):
+        user_ids = list({row[0] for row in chunk})
+        registered = {tuple(pair) for pair in conn.execute(REGISTERED_PAIRS, {'user_ids': user_ids})}
+        new_rows = []
+        for row in chunk:
+            if (row[0], row[1]) not in registered:
+                registered.add((row[0], row[1]))
+                new_rows.append(values(*row))
+        if new_rows:
+            result = conn.exec_driver_sql(REGISTRATION_INSERT, new_rows)
+            inserted += result.rowcount
+    stats.add('registrations', inserted)
+    return inserted
+
+def student_ids(conn):
+    return list(conn.execute(text("SELECT id FROM user WHERE is_admin = 0 ORDER BY id")).scalars())
+
+def create_sample_data(conn, rng, now=None, hasher=None):
+    """Sample upcoming events and students, each student registered for about 70% of all events"""
+    stats = SeedStats()
+    now = now or datetime.now()
+    insert_events(conn, SAMPLE_EVENTS, stats)
+    insert_students(conn, named_students(SAMPLE_STUDENTS), stats, hasher)
+
+    events = list(conn.execute(text("SELECT id FROM event ORDER BY id")).scalars())
+    insert_registrations(conn, (
+        (user_id, event_id, rng.random() < 0.8, now - timedelta(days=rng.randint(1, 30)))
+        for user_id in student_ids(conn)
+        for event_id in events
+        if rng.random() < 0.7
+    ), stats)
+    bump_data_version(conn)
+    return stats.finish()
+
+def create_previous_data(conn, rng, hasher=None):
+    """Past events with registrations; students are created only if there are none yet"""
+    stats = SeedStats()
+    event_ids = insert_events(conn, PREVIOUS_EVENTS, stats)
+    students = student_ids(conn)
+    if not students:
+        students = insert_students(conn, named_students(PREVIOUS_STUDENTS), stats, hasher)
+
+    rows = []
+    for event_id, (name, date, _) in zip(event_ids, PREVIOUS_EVENTS):
+        if "Concert" in name or "Exhibition" in name:
+            count = rng.randint(15, 20)  # Popular events
+        elif "Olympics" in name or "Tournament" in name:
+            count = rng.randint(8, 12)   # Competitive events
+        else:
+            count = rng.randint(10, 15)
+        attendance_rate = 0.75 if "Olympics" in name else 0.85
+        for user_id in rng.sample(students, min(count, len(students))):
+            rows.append((user_id, event_id, rng.random() < attendance_rate,
+                         date - timedelta(days=rng.randint(5, 20))))
+    insert_registrations(conn, rows, stats)
+    bump_data_version(conn)
+    return stats.finish()
+
+def generate_event(conn, rng, now=None):
+    """One random upcoming event with about 60% of the students registered, returns (name, stats)"""
+    stats = SeedStats()
+    now = now or datetime.now()
+    name, description = rng.choice(EVENT_TYPES)
+    date = (now + timedelta(days=rng.randint(30, 180))).replace(
+        hour=rng.choice([9, 10, 13, 14, 15, 17, 18]), minute=rng.choice([0, 30]), second=0, microsecond=0
+    )
+    [event_id] = insert_events(conn, [(name, date, description)], stats)
+    insert_registrations(conn, (
+        (user_id, event_id, False, now) for user_id in student_ids(conn) if rng.random() < 0.6
+    ), stats)
+    bump_data_version(conn)
+    return name, stats.finish()
+
+def generate_dataset(conn, rng, students=1000, events=100, registration_rate=0.4, attendance_rate=0.8,
+                     past_ratio=0.5, base_date=None, chunk_size=CHUNK_SIZE, hasher=None):
+    """Benchmark-scale dataset: `students` x `events` with each pair registered with registration_rate
+
+    Events are spread over the year before and half a year after base_date
+    (past_ratio of them in the past); only past events have attendance.
+    """
+    stats = SeedStats()
+    base_date = base_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    event_rows = []
+    for i in range(events):
+        name, description = rng.choice(EVENT_TYPES)
+        if rng.random() < past_ratio:
+            date = base_date - timedelta(days=rng.randint(1, 365))
+        else:
+            date = base_date + timedelta(days=rng.randint(1, 180))
+        date = date.replace(hour=rng.choice([8, 9, 10, 13, 14, 15, 17, 18]), minute=rng.choice([0, 15, 30, 45]))
+        event_rows.append((f"{name} #{i + 1}", date, description))
+    event_ids = insert_events(conn, event_rows, stats)
+    past = [date < base_date for _, date, _ in event_rows]
+
+    # The row number keeps usernames unique however many students share a name
+    offset = conn.execute(text("SELECT COUNT(*) FROM user")).scalar()
+    names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(students)]
+    user_ids = insert_students(conn, [
+        (f"{username_for(name)}{offset + i + 1}", name) for i, name in enumerate(names)
+    ], stats, hasher)
+
+    # Students register 1-30 days before the event; formatting those dates once per event
+    # instead of once per row matters at a million rows
+    events = [
+        (event_id, is_past, [db_datetime(date - timedelta(days=days)) for days in range(1, 31)])
+        for event_id, (_, date, _), is_past in zip(event_ids, event_rows, past)
+    ]
+
+    def registrations():
+        random = rng.random
+        for user_id in user_ids:
+            for event_id, is_past, dates in events:
+                if random() < registration_rate:
+                    yield user_id, event_id, is_past and random() < attendance_rate, dates[int(random() * 30)]
+
+    insert_registrations(conn, registrations(), stats, chunk_size)
+    bump_data_version(conn)
+    return stats.finish()
+
+def import_students(conn, rows, hasher=None):
+    """Import students from dicts with name, password and optionally username (e.g. csv.DictReader rows)
+
+    Imported students usually all have different passwords, so the hashing
+    fans out over the hasher's process pool.
+    """
+    stats = SeedStats()
+    insert_students(conn, [
+        ((row.get('username') or username_for(row['name'])).strip(), row['name'].strip(),
+         row.get('password') or DEFAULT_PASSWORD)
+        for row in rows
+    ], stats, hasher)
+    bump_data_version(conn)
+    return stats.finish()
+
+def open_engine(database=None, reset=False):
+    """Engine for the given database URL (the app's database by default) with the schema in place"""
+    from sqlalchemy import create_engine
+    from app import app, db
+    from search import ensure_search_index, drop_search_index
+    from database import apply_sqlite_pragmas, SQLITE_PRAGMAS
+
+    if database:
+        engine = create_engine(database)
+        apply_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+    else:
+        with app.app_context():
+            engine = db.engine
+    if reset:
+        with engine.begin() as conn:
+            drop_search_index(conn)
+        db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    ensure_search_index(engine)
+    return engine
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the school events database")
+    parser.add_argument('command', choices=['dataset', 'sample', 'previous', 'event', 'import'])
+    parser.add_argument('file', nargs='?', help="CSV with name, password (and username) columns for import")
+    parser.add_argument('--database', help="SQLAlchemy URL, defaults to the app's database")
+    parser.add_argument('--reset', action='store_true', help="drop and recreate all tables first")
+    parser.add_argument('--seed', type=int, help="random seed, same seed gives the same data")
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--registration-rate', type=float, default=0.4)
+    parser.add_argument('--attendance-rate', type=float, default=0.8)
+    parser.add_argument('--base-date', type=datetime.fromisoformat,
+                        help="date the generated events are spread around, defaults to today")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--hash-profile', choices=sorted(HASH_PROFILES),
+                        default=os.environ.get('PASSWORD_HASH_PROFILE', 'strong'),
+                        help="'fast' is only meant for test and benchmark databases")
+    args = parser.parse_args(argv)
+    if args.command == 'import' and not args.file:
+        parser.error("import needs a CSV file")
+
+    rng = random.Random(args.seed)
+    hasher = PasswordHasher(HASH_PROFILES[args.hash_profile])
+    engine = open_engine(args.database, args.reset)
+    with engine.begin() as conn:
+        if args.command == 'dataset':
+            stats = generate_dataset(
+                conn, rng, students=args.students, events=args.events,
+                registration_rate=args.registration_rate, attendance_rate=args.attendance_rate,
+                base_date=args.base_date, chunk_size=args.chunk_size, hasher=hasher
+            )
+        elif args.command == 'sample':
+            stats = create_sample_data(conn, rng, hasher=hasher)
+        elif args.command == 'previous':
+            stats = create_previous_data(conn, rng, hasher=hasher)
+        elif args.command == 'import':
+            with open(args.file, newline='', encoding='utf-8') as f:
+                stats = import_students(conn, csv.DictReader(f), hasher)
+        else:
+            name, stats = generate_event(conn, rng)
+            print(f"Generated new event: {name}")
+    print(f"Inserted {stats}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,115 +1,164 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import ReactDOM from 'react-dom/client';
+import { swrJSON, patchCached } from '../lib/fetchJSON';
+import { usePagedList } from '../lib/pagedList';
+import VirtualGrid, { LoadError } from './VirtualGrid';
+
+const EVENT_ROW_HEIGHT = 400;
+const EVENT_COLUMN_WIDTH = 350;
+
+// Events without a capacity (max_students null) never fill up
+const isFull = (event) => event.max_students != null && event.registered_count >= event.max_students;
+
+const EventCard = ({ event, isPrevious, onRegister }) => (
+  <div className="event-card" style={{ opacity: isPrevious ? 0.7 : 1 }}>
+    <div className="event-header">
+      <h3>{event.title}</h3>
+      <span className={`event-status ${isPrevious ? 'past' : 'upcoming'}`}>
+        {isPrevious ? 'Proběhlo' : 'Nadcházející'}
+      </span>
+    </div>
+    <div className="event-details">
+      <p className="event-description">{event.description}</p>
+      <div className="event-info">
+        <div className="info-item">
+          <span className="icon">📅</span>
+          <span>{new Date(event.date).toLocaleDateString('cs-CZ')}</span>
+        </div>
+        <div className="info-item">
+          <span className="icon">⏰</span>
+          <span>{event.time}</span>
+        </div>
+        <div className="info-item">
+          <span className="icon">📍</span>
+          <span>{event.location}</span>
+        </div>
+        <div className="info-item">
+          <span className="icon">👥</span>
+          <span>
+            {event.max_students
+              ? `${event.registered_count}/${event.max_students} registrováno`
+              : `${event.registered_count} registrováno`}
+            {event.waitlist_count > 0 && ` (${event.waitlist_count} čeká)`}
+          </span>
+        </div>
+      </div>
+    </div>
+    {!isPrevious && !event.is_registered && (
+      <div className="event-actions">
+        {isFull(event) ? (
+          <button
+            className="btn btn-secondary"
+            onClick={() => onRegister(event)}
+          >
+            Plně obsazeno – čekací listina
+          </button>
+        ) : (
+          <button
+            className="btn btn-primary"
+            onClick={() => onRegister(event)}
+          >
+            Registrovat se
+          </button>
+        )}
+        <a href={`/event/${event.id}`} className="btn btn-secondary">
+          Detail akce
+        </a>
+      </div>
+    )}
+    {!isPrevious && event.is_registered && (
+      <div className="event-actions">
+        <span className="registered-badge">
+          {event.is_waitlisted ? '⏳ Na čekací listině' : '✓ Zaregistrován'}
+        </span>
+        <a href={`/event/${event.id}`} className="btn btn-secondary">
+          Detail akce
+        </a>
+      </div>
+    )}
+  </div>
+);
+
+// One of the two lists: /api/events page by page, or the ranked search results while searching
+const useEventList = (scope, term) => usePagedList(async (cursor, revalidated) => {
+  const onUpdate = (fresh) => revalidated({ items: fresh[scope] });
+  if (term) {
+    const data = await swrJSON(`/api/events/search?q=${encodeURIComponent(term)}`, onUpdate);
+    return { items: data[scope], nextCursor: null, total: data[scope].length };
+  }
+  const data = await swrJSON(cursor ? `/api/events?cursor=${cursor}` : '/api/events', onUpdate);
+  return { items: data[scope], nextCursor: data.next_cursor[scope], total: data.total && data.total[scope] };
+}, term);
 
 const EventsList = () => {
-  const [events, setEvents] = useState({ current: [], previous: [] });
   const [searchTerm, setSearchTerm] = useState('');
-  const [loading, setLoading] = useState(true);
+  const [query, setQuery] = useState('');
   const [filter, setFilter] = useState('all'); // 'all', 'current', 'previous'
+  const currentEvents = useEventList('current', query);
+  const previousEvents = useEventList('previous', query);
+  const loaded = useRef(false);
 
+  // Search runs on the server; wait for typing to pause before querying
   useEffect(() => {
-    fetchEvents();
-  }, []);
-
-  const fetchEvents = async () => {
-    try {
-      const response = await fetch('/api/events');
-      const data = await response.json();
-      setEvents(data);
-      setLoading(false);
-    } catch (error) {
-      console.error('Error fetching events:', error);
-      setLoading(false);
-    }
-  };
+    const term = searchTerm.trim();
+    const timeout = setTimeout(() => setQuery(term), term ? 250 : 0);
+    return () => clearTimeout(timeout);
+  }, [searchTerm]);
 
-  const filterEvents = (eventsList) => {
-    return eventsList.filter(event =>
-      event.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      event.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      event.location.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+  // Change one event in the list on screen and in every cached /api/events response
+  const patchEvent = (eventId, changes) => {
+    const update = (event) => (event.id === eventId ? { ...event, ...changes } : event);
+    currentEvents.patch(update);
+    patchCached('/api/events', (data) => ({
+      ...data,
+      ...(data.current && { current: data.current.map(update) }),
+      ...(data.previous && { previous: data.previous.map(update) })
+    }));
   };
 
-  const handleRegister = async (eventId) => {
+  // The card shows the registration at once; the server's counts replace the guess,
+  // a failed request puts the event back the way it was
+  const handleRegister = async (event) => {
+    const original = {
+      is_registered: event.is_registered,
+      is_waitlisted: event.is_waitlisted,
+      registered_count: event.registered_count,
+      waitlist_count: event.waitlist_count
+    };
+    patchEvent(event.id, isFull(event)
+      ? { is_registered: true, is_waitlisted: true, waitlist_count: event.waitlist_count + 1 }
+      : { is_registered: true, registered_count: event.registered_count + 1 });
     try {
-      const response = await fetch(`/register_event/${eventId}`, {
+      const response = await fetch(`/api/events/${event.id}/register`, {
         method: 'POST',
       });
+      const data = await response.json();
       if (response.ok) {
-        fetchEvents(); // Refresh events
-        alert('Úspěšně jste se zaregistrovali na akci!');
+        patchEvent(event.id, {
+          is_waitlisted: data.status === 'waitlisted',
+          registered_count: data.registered_count,
+          waitlist_count: data.waitlist_count
+        });
+        alert(data.status === 'waitlisted'
+          ? `Akce je plně obsazena, jste ${data.waitlist_position}. na čekací listině.`
+          : 'Úspěšně jste se zaregistrovali na akci!');
+      } else if (response.status === 409) {
+        patchEvent(event.id, { ...original, is_registered: true });
+        alert('Na tuto akci jste již registrováni.');
       } else {
-        const data = await response.json();
-        alert(data.message || 'Chyba při registraci');
+        patchEvent(event.id, original);
+        alert(data.error || 'Chyba při registraci');
       }
     } catch (error) {
       console.error('Error registering:', error);
+      patchEvent(event.id, original);
       alert('Chyba při registraci');
     }
   };
 
-  const EventCard = ({ event, isPrevious }) => (
-    <div className="event-card" style={{ 
-      opacity: isPrevious ? 0.7 : 1,
-      animation: 'fadeIn 0.5s ease-in'
-    }}>
-      <div className="event-header">
-        <h3>{event.title}</h3>
-        <span className={`event-status ${isPrevious ? 'past' : 'upcoming'}`}>
-          {isPrevious ? 'Proběhlo' : 'Nadcházející'}
-        </span>
-      </div>
-      <div className="event-details">
-        <p className="event-description">{event.description}</p>
-        <div className="event-info">
-          <div className="info-item">
-            <span className="icon">📅</span>
-            <span>{new Date(event.date).toLocaleDateString('cs-CZ')}</span>
-          </div>
-          <div className="info-item">
-            <span className="icon">⏰</span>
-            <span>{event.time}</span>
-          </div>
-          <div className="info-item">
-            <span className="icon">📍</span>
-            <span>{event.location}</span>
-          </div>
-          <div className="info-item">
-            <span className="icon">👥</span>
-            <span>{event.registered_count}/{event.max_students} registrováno</span>
-          </div>
-        </div>
-      </div>
-      {!isPrevious && !event.is_registered && (
-        <div className="event-actions">
-          {event.registered_count >= event.max_students ? (
-            <button className="btn btn-disabled" disabled>Plně obsazeno</button>
-          ) : (
-            <button 
-              className="btn btn-primary" 
-              onClick={() => handleRegister(event.id)}
-            >
-              Registrovat se
-            </button>
-          )}
-          <a href={`/event/${event.id}`} className="btn btn-secondary">
-            Detail akce
-          </a>
-        </div>
-      )}
-      {!isPrevious && event.is_registered && (
-        <div className="event-actions">
-          <span className="registered-badge">✓ Zaregistrován</span>
-          <a href={`/event/${event.id}`} className="btn btn-secondary">
-            Detail akce
-          </a>
-        </div>
-      )}
-    </div>
-  );
-
-  if (loading) {
+  // The spinner is only for the first load; later searches keep the page in place
+  loaded.current = loaded.current || (currentEvents.ready && previousEvents.ready);
+  if (!loaded.current) {
     return (
       <div className="loading-container">
         <div className="spinner"></div>
@@ -118,11 +167,40 @@ const EventsList = () => {
     );
   }
 
-  const filteredCurrentEvents = filterEvents(events.current);
-  const filteredPreviousEvents = filterEvents(events.previous);
   const showCurrent = filter === 'all' || filter === 'current';
   const showPrevious = filter === 'all' || filter === 'previous';
 
+  // Only the cards in view are mounted; items of pages not fetched yet show as placeholders
+  const eventGrid = (events, isPrevious, emptyMessage) => {
+    if (!events.ready) {
+      return <div className="loading-container"><div className="spinner"></div></div>;
+    }
+    if (events.error && events.count === 0) {
+      return <LoadError message="Akce se nepodařilo načíst." onRetry={events.retry} />;
+    }
+    if (events.count === 0) {
+      return <p className="no-events">{emptyMessage}</p>;
+    }
+    return (
+      <>
+        {events.error && <LoadError message="Část akcí se nepodařilo načíst." onRetry={events.retry} />}
+        <VirtualGrid
+          key={query}
+          count={events.count}
+          rowHeight={EVENT_ROW_HEIGHT}
+          minColumnWidth={EVENT_COLUMN_WIDTH}
+          onRangeChange={events.setRange}
+          renderItem={(index) => {
+            const event = events.item(index);
+            return event
+              ? <EventCard event={event} isPrevious={isPrevious} onRegister={handleRegister} />
+              : <div className="card-placeholder"></div>;
+          }}
+        />
+      </>
+    );
+  };
+
   return (
     <div className="events-container">
       <div className="search-filter-bar">
@@ -130,14 +208,14 @@ const EventsList = () => {
           <span className="search-icon">🔍</span>
           <input
             type="text"
-            placeholder="Hledat akce podle názvu, popisu nebo místa..."
+            placeholder="Hledat akce podle názvu nebo popisu..."
             value={searchTerm}
             onChange={(e) => setSearchTerm(e.target.value)}
             className="search-input"
           />
           {searchTerm && (
-            <button 
-              className="clear-search" 
+            <button
+              className="clear-search"
               onClick={() => setSearchTerm('')}
               aria-label="Vymazat hledání"
             >
@@ -156,13 +234,13 @@ const EventsList = () => {
             className={`filter-btn ${filter === 'current' ? 'active' : ''}`}
             onClick={() => setFilter('current')}
           >
-            Nadcházející ({events.current.length})
+            Nadcházející ({currentEvents.total || 0})
           </button>
           <button
             className={`filter-btn ${filter === 'previous' ? 'active' : ''}`}
             onClick={() => setFilter('previous')}
           >
-            Minulé ({events.previous.length})
+            Minulé ({previousEvents.total || 0})
           </button>
         </div>
       </div>
@@ -171,19 +249,10 @@ const EventsList = () => {
         <div className="events-section">
           <h2 className="section-title">
             Nadcházející akce
-            {searchTerm && ` (${filteredCurrentEvents.length})`}
+            {query && ` (${currentEvents.total || 0})`}
           </h2>
-          <div className="events-grid scrollable">
-            {filteredCurrentEvents.length > 0 ? (
-              filteredCurrentEvents.map(event => (
-                <EventCard key={event.id} event={event} isPrevious={false} />
-              ))
-            ) : (
-              <p className="no-events">
-                {searchTerm ? 'Žádné nadcházející akce nevyhovují vašemu hledání.' : 'Momentálně nejsou žádné nadcházející akce.'}
-              </p>
-            )}
-          </div>
+          {eventGrid(currentEvents, false,
+            query ? 'Žádné nadcházející akce nevyhovují vašemu hledání.' : 'Momentálně nejsou žádné nadcházející akce.')}
         </div>
       )}
 
@@ -191,19 +260,10 @@ const EventsList = () => {
         <div className="events-section">
           <h2 className="section-title">
             Minulé akce
-            {searchTerm && ` (${filteredPreviousEvents.length})`}
+            {query && ` (${previousEvents.total || 0})`}
           </h2>
-          <div className="events-grid scrollable">
-            {filteredPreviousEvents.length > 0 ? (
-              filteredPreviousEvents.map(event => (
-                <EventCard key={event.id} event={event} isPrevious={true} />
-              ))
-            ) : (
-              <p className="no-events">
-                {searchTerm ? 'Žádné minulé akce nevyhovují vašemu hledání.' : 'Zatím nejsou žádné minulé akce.'}
-              </p>
-            )}
-          </div>
+          {eventGrid(previousEvents, true,
+            query ? 'Žádné minulé akce nevyhovují vašemu hledání.' : 'Zatím nejsou žádné minulé akce.')}
         </div>
       )}
     </div>
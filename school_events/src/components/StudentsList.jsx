@@ -1,76 +1,92 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import ReactDOM from 'react-dom/client';
+import { swrJSON } from '../lib/fetchJSON';
+import { usePagedList } from '../lib/pagedList';
+import AttendanceGrid from './AttendanceGrid';
+import VirtualGrid, { LoadError } from './VirtualGrid';
+
+const STUDENT_ROW_HEIGHT = 140;
+const STUDENT_COLUMN_WIDTH = 300;
+
+const StudentCard = ({ student }) => (
+  <div className="student-card">
+    <div className="student-avatar">
+      <span className="avatar-text">
+        {student.name.split(' ').map(n => n[0]).join('').toUpperCase()}
+      </span>
+    </div>
+    <div className="student-info">
+      <h3 className="student-name">{student.name}</h3>
+      <p className="student-username">@{student.username}</p>
+      <div className="student-stats">
+        <div className="stat-item">
+          <span className="stat-icon">📅</span>
+          <span className="stat-value">{student.event_count}</span>
+          <span className="stat-label">akcí</span>
+        </div>
+        <div className="stat-item">
+          <span className="stat-icon">✓</span>
+          <span className="stat-value">{Math.round(student.attendance_rate * 100)}%</span>
+          <span className="stat-label">účast</span>
+        </div>
+      </div>
+    </div>
+    <div className="student-actions">
+      <a href={`/student/${student.id}/events`} className="btn btn-small">
+        Zobrazit akce
+      </a>
+    </div>
+  </div>
+);
 
 const StudentsList = () => {
-  const [students, setStudents] = useState([]);
   const [searchTerm, setSearchTerm] = useState('');
-  const [loading, setLoading] = useState(true);
-  const [sortBy, setSortBy] = useState('name'); // 'name', 'username', 'events'
+  const [sortBy, setSortBy] = useState('name'); // 'name', 'username', 'events', 'attendance'
+  const [query, setQuery] = useState({ term: '', sort: 'name' });
+  const [totalCount, setTotalCount] = useState(0);
+  const [showMatrix, setShowMatrix] = useState(false);
+  const loaded = useRef(false);
 
+  // Filtering and sorting happen on the server; wait for typing to pause before searching
   useEffect(() => {
-    fetchStudents();
-  }, []);
+    const term = searchTerm.trim();
+    const timeout = setTimeout(() => setQuery({ term, sort: sortBy }), term ? 300 : 0);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, sortBy]);
 
-  const fetchStudents = async () => {
-    try {
-      const response = await fetch('/api/students');
-      const data = await response.json();
-      setStudents(data);
-      setLoading(false);
-    } catch (error) {
-      console.error('Error fetching students:', error);
-      setLoading(false);
+  // The cursor encodes the sort order and position, the search term still applies
+  const queryKey = `${query.sort}:${query.term}`;
+  const students = usePagedList(async (cursor, revalidated) => {
+    const params = new URLSearchParams({ sort: query.sort });
+    if (query.term) {
+      params.set('q', query.term);
     }
-  };
-
-  const filterAndSortStudents = () => {
-    let filtered = students.filter(student =>
-      student.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      student.username.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
-    // Sort students
-    filtered.sort((a, b) => {
-      if (sortBy === 'name') {
-        return a.name.localeCompare(b.name, 'cs');
-      } else if (sortBy === 'username') {
-        return a.username.localeCompare(b.username);
-      } else if (sortBy === 'events') {
-        return b.event_count - a.event_count;
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const data = await swrJSON(`/api/students?${params}`, (fresh) => {
+      if (fresh.students) {
+        revalidated({ items: fresh.students });
       }
-      return 0;
     });
+    if (data.error === 'Unauthorized') {
+      return { items: [], nextCursor: null, total: 0 }; // Only admins may list students, everyone sees the matrix
+    }
+    if (!data.students) {
+      throw new Error(data.error);
+    }
+    return { items: data.students, nextCursor: data.next_cursor, total: data.total };
+  }, queryKey);
 
-    return filtered;
-  };
-
-  const StudentCard = ({ student }) => (
-    <div className="student-card">
-      <div className="student-avatar">
-        <span className="avatar-text">
-          {student.name.split(' ').map(n => n[0]).join('').toUpperCase()}
-        </span>
-      </div>
-      <div className="student-info">
-        <h3 className="student-name">{student.name}</h3>
-        <p className="student-username">@{student.username}</p>
-        <div className="student-stats">
-          <div className="stat-item">
-            <span className="stat-icon">📅</span>
-            <span className="stat-value">{student.event_count}</span>
-            <span className="stat-label">akcí</span>
-          </div>
-        </div>
-      </div>
-      <div className="student-actions">
-        <a href={`/student/${student.id}/events`} className="btn btn-small">
-          Zobrazit akce
-        </a>
-      </div>
-    </div>
-  );
+  useEffect(() => {
+    if (!query.term && students.total != null) {
+      setTotalCount(students.total);
+    }
+  }, [query.term, students.total]);
 
-  if (loading) {
+  // The spinner is only for the first load; later searches keep the page in place
+  loaded.current = loaded.current || students.ready;
+  if (!loaded.current) {
     return (
       <div className="loading-container">
         <div className="spinner"></div>
@@ -79,8 +95,6 @@ const StudentsList = () => {
     );
   }
 
-  const filteredStudents = filterAndSortStudents();
-
   return (
     <div className="students-container">
       <div className="students-header">
@@ -113,32 +127,55 @@ const StudentsList = () => {
             <option value="name">Jméno</option>
             <option value="username">Uživatelské jméno</option>
             <option value="events">Počet akcí</option>
+            <option value="attendance">Účast</option>
           </select>
         </div>
       </div>
 
       <div className="students-stats">
         <div className="stat-card">
-          <span className="stat-number">{students.length}</span>
+          <span className="stat-number">{totalCount}</span>
           <span className="stat-title">Celkem studentů</span>
         </div>
         <div className="stat-card">
-          <span className="stat-number">{filteredStudents.length}</span>
+          <span className="stat-number">{students.total || 0}</span>
           <span className="stat-title">Zobrazeno</span>
         </div>
       </div>
 
-      <div className="students-grid scrollable">
-        {filteredStudents.length > 0 ? (
-          filteredStudents.map(student => (
-            <StudentCard key={student.id} student={student} />
-          ))
-        ) : (
-          <p className="no-results">
-            {searchTerm ? 'Žádní studenti nevyhovují vašemu hledání.' : 'Zatím nejsou žádní studenti.'}
-          </p>
-        )}
-      </div>
+      {students.error && (
+        <LoadError
+          message={students.count > 0 ? 'Část studentů se nepodařilo načíst.' : 'Studenty se nepodařilo načíst.'}
+          onRetry={students.retry}
+        />
+      )}
+
+      {!students.ready ? (
+        <div className="loading-container"><div className="spinner"></div></div>
+      ) : students.count > 0 ? (
+        // Only the cards in view are mounted; items of pages not fetched yet show as placeholders
+        <VirtualGrid
+          key={queryKey}
+          count={students.count}
+          rowHeight={STUDENT_ROW_HEIGHT}
+          minColumnWidth={STUDENT_COLUMN_WIDTH}
+          onRangeChange={students.setRange}
+          renderItem={(index) => {
+            const student = students.item(index);
+            return student ? <StudentCard student={student} /> : <div className="card-placeholder"></div>;
+          }}
+        />
+      ) : !students.error && (
+        <p className="no-results">
+          {query.term ? 'Žádní studenti nevyhovují vašemu hledání.' : 'Zatím nejsou žádní studenti.'}
+        </p>
+      )}
+
+      {/* The matrix is only fetched and rendered once it is opened */}
+      <details className="matrix-details" onToggle={(e) => setShowMatrix(e.currentTarget.open)}>
+        <summary>Zobrazit kompletní přehled účasti na akcích</summary>
+        {showMatrix && <AttendanceGrid />}
+      </details>
     </div>
   );
 };
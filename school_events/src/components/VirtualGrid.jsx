@@ -0,0 +1,55 @@
+import React, { useEffect } from 'react';
+import { visibleRange, useViewport } from '../lib/windowing';
+
+const GRID_GAP = 24;
+
+// Grid of equally tall cards in a scrolling box; only the rows in view are mounted.
+// renderItem(index) renders one card, onRangeChange(first, last) hears which items are in view.
+const VirtualGrid = ({ count, rowHeight, minColumnWidth, renderItem, onRangeChange }) => {
+  const [viewportRef, viewport, onScroll] = useViewport();
+  const columns = Math.max(1, Math.floor((viewport.width + GRID_GAP) / (minColumnWidth + GRID_GAP)));
+  const rowCount = Math.ceil(count / columns);
+  const [firstRow, lastRow] = visibleRange(viewport.top, viewport.height, rowHeight + GRID_GAP, rowCount);
+  const first = firstRow * columns;
+  const last = Math.min(count, lastRow * columns);
+
+  useEffect(() => {
+    onRangeChange(first, last);
+  }, [first, last]);
+
+  const rows = [];
+  for (let row = firstRow; row < lastRow; row++) {
+    const cells = [];
+    for (let index = row * columns; index < Math.min(count, (row + 1) * columns); index++) {
+      cells.push(<React.Fragment key={index}>{renderItem(index)}</React.Fragment>);
+    }
+    rows.push(
+      <div key={row} className="virtual-row" style={{
+        top: row * (rowHeight + GRID_GAP),
+        height: rowHeight,
+        gap: GRID_GAP,
+        gridTemplateColumns: `repeat(${columns}, minmax(0, 1fr))`
+      }}>
+        {cells}
+      </div>
+    );
+  }
+
+  return (
+    <div className="virtual-grid scrollable" ref={viewportRef} onScroll={onScroll}>
+      <div className="virtual-grid-body" style={{ height: Math.max(0, rowCount * (rowHeight + GRID_GAP) - GRID_GAP) }}>
+        {rows}
+      </div>
+    </div>
+  );
+};
+
+// Shown instead of a list whose first page failed to load, or above one missing a later page
+export const LoadError = ({ message, onRetry }) => (
+  <div className="load-error">
+    <p>{message}</p>
+    <button className="btn btn-secondary" onClick={onRetry}>Zkusit znovu</button>
+  </div>
+);
+
+export default VirtualGrid;
@@ -0,0 +1,159 @@
+// Client data layer shared by the React components (vanilla JS via CDN)
+// Responses are kept in memory and mirrored to sessionStorage, so a list shown again
+// renders at once from its stored copy while a conditional request checks it in the
+// background (stale-while-revalidate); unchanged data costs the server an ETag comparison.
+// Identical requests in flight at the same time share one fetch, and optimistic updates
+// change the stored copies of a record with patchCached instead of refetching lists.
+
+const MAX_CACHED_RESPONSES = 100; // the least recently used URLs are forgotten first
+const REVALIDATE_AFTER = 2000; // ms; copies checked more recently are served without asking again
+const STORAGE_PREFIX = 'api:';
+
+// Stored copies belong to the logged-in user, the page names them in <meta name="api-cache-scope">
+const scopeMeta = document.querySelector('meta[name="api-cache-scope"]');
+const storagePrefix = `${STORAGE_PREFIX}${scopeMeta ? scopeMeta.content : 'anon'}:`;
+
+const apiResponses = new Map(); // url -> { etag, data, checkedAt }, in order of use
+const inFlight = new Map(); // url -> promise of the data
+
+const storage = (() => {
+  try {
+    return window.sessionStorage;
+  } catch (error) {
+    return null; // Disabled by the browser, the memory copy still works
+  }
+})();
+
+const storedKeys = () => {
+  const keys = [];
+  for (let i = 0; storage && i < storage.length; i++) {
+    if (storage.key(i).startsWith(STORAGE_PREFIX)) {
+      keys.push(storage.key(i));
+    }
+  }
+  return keys;
+};
+
+// Copies of another user's responses are dropped, this user's are loaded oldest first
+const restore = () => {
+  const entries = [];
+  for (const key of storedKeys()) {
+    if (!key.startsWith(storagePrefix)) {
+      storage.removeItem(key);
+      continue;
+    }
+    try {
+      entries.push([key.slice(storagePrefix.length), JSON.parse(storage.getItem(key))]);
+    } catch (error) {
+      storage.removeItem(key);
+    }
+  }
+  entries.sort((a, b) => a[1].checkedAt - b[1].checkedAt);
+  entries.forEach(([url, entry]) => remember(url, entry, false));
+};
+
+// A full sessionStorage gives up its least recently used copies until the entry fits
+const store = (url, entry) => {
+  if (!storage) {
+    return;
+  }
+  const value = JSON.stringify(entry);
+  for (const oldest of [null, ...apiResponses.keys()]) {
+    if (oldest !== null && oldest !== url) {
+      storage.removeItem(storagePrefix + oldest);
+    }
+    try {
+      storage.setItem(storagePrefix + url, value);
+      return;
+    } catch (error) {
+      // QuotaExceededError, try again with less stored
+    }
+  }
+};
+
+const remember = (url, entry, persist = true) => {
+  apiResponses.delete(url);
+  apiResponses.set(url, entry);
+  if (apiResponses.size > MAX_CACHED_RESPONSES) {
+    const oldest = apiResponses.keys().next().value;
+    apiResponses.delete(oldest);
+    if (storage) {
+      storage.removeItem(storagePrefix + oldest);
+    }
+  }
+  if (persist) {
+    store(url, entry);
+  }
+};
+
+const lookup = (url) => {
+  const entry = apiResponses.get(url);
+  if (entry) {
+    apiResponses.delete(url);
+    apiResponses.set(url, entry); // Map order is the order of use
+  }
+  return entry;
+};
+
+// Conditional GET of url; callers asking while it is in flight get the same promise
+const revalidate = (url) => {
+  if (inFlight.has(url)) {
+    return inFlight.get(url);
+  }
+  const request = (async () => {
+    const cached = lookup(url);
+    const response = await fetch(url, {
+      headers: cached ? { 'If-None-Match': cached.etag } : {}
+    });
+    if (response.status === 304 && cached) {
+      cached.checkedAt = Date.now();
+      store(url, cached); // Restored copies would otherwise look stale on every page load
+      return cached.data;
+    }
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+      remember(url, { etag, data, checkedAt: Date.now() });
+    }
+    return data;
+  })().finally(() => inFlight.delete(url));
+  inFlight.set(url, request);
+  return request;
+};
+
+restore();
+
+// Current data of url, checked with the server
+function fetchJSON(url) {
+  return revalidate(url);
+}
+
+// The cached copy of url at once when there is one, checked in the background;
+// onUpdate(data) gets the server's data if it turns out to differ from the copy
+function swrJSON(url, onUpdate) {
+  const cached = lookup(url);
+  if (!cached) {
+    return revalidate(url);
+  }
+  if (Date.now() - cached.checkedAt >= REVALIDATE_AFTER) {
+    revalidate(url)
+      .then(data => {
+        if (data !== cached.data) {
+          onUpdate(data);
+        }
+      })
+      .catch(error => console.error('Error revalidating', url, error));
+  }
+  return Promise.resolve(cached.data);
+}
+
+// Replace the cached data of every URL starting with prefix by patch(data, url),
+// e.g. to show an optimistic update when the list is read from the cache again
+function patchCached(prefix, patch) {
+  for (const [url, entry] of apiResponses) {
+    if (url.startsWith(prefix)) {
+      entry.data = patch(entry.data, url);
+      store(url, entry);
+    }
+  }
+}
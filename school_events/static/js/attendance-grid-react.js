@@ -0,0 +1,159 @@
+// Attendance Matrix React Component (vanilla JS with React via CDN)
+const MATRIX_ROW_HEIGHT = 44;
+const MATRIX_COLUMN_WIDTH = 160;
+const MATRIX_NAME_WIDTH = 220;
+const MATRIX_HEADER_HEIGHT = 64;
+
+// /api/matrix sends the bitsets in base64; cell (row, column) is bit row * columns + column
+function decodeBitset(encoded) {
+  return Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+}
+
+// Inverse of decodeBitset, in chunks that stay below the argument limit of fromCharCode
+function encodeBitset(bits) {
+  let binary = '';
+  for (let i = 0; i < bits.length; i += 0x8000) {
+    binary += String.fromCharCode(...bits.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+}
+
+function getBit(bits, i) {
+  return (bits[i >> 3] >> (i & 7)) & 1;
+}
+
+function setBit(bits, i, value) {
+  if (value) {
+    bits[i >> 3] |= 1 << (i & 7);
+  } else {
+    bits[i >> 3] &= ~(1 << (i & 7));
+  }
+}
+
+function AttendanceGrid() {
+  const [matrix, setMatrix] = React.useState(null);
+  const [, setRevision] = React.useState(0); // bumped when a bit of the matrix changes in place
+  const registrationIds = React.useRef(new Map());
+  const [viewportRef, viewport, onScroll] = useViewport();
+
+  // A matrix cached earlier in the session shows at once and is replaced if it changed since
+  React.useEffect(() => {
+    const show = data => setMatrix({
+      ...data,
+      registered: decodeBitset(data.registered),
+      attended: decodeBitset(data.attended)
+    });
+    swrJSON('/api/matrix', show)
+      .then(show)
+      .catch(error => console.error('Error fetching attendance matrix:', error));
+  }, []);
+
+  // Only changing attendance needs the registration id, so it is fetched on the first change of a cell
+  const registrationId = async (studentId, eventId) => {
+    const key = `${studentId}:${eventId}`;
+    if (!registrationIds.current.has(key)) {
+      const data = await fetchJSON(`/api/matrix/registration?student=${studentId}&event=${eventId}`);
+      if (!data.registration_id) {
+        throw new Error(data.error);
+      }
+      registrationIds.current.set(key, data.registration_id);
+    }
+    return registrationIds.current.get(key);
+  };
+
+  const toggleAttendance = async (row, column) => {
+    const bit = row * matrix.events.ids.length + column;
+    try {
+      const id = await registrationId(matrix.students.ids[row], matrix.events.ids[column]);
+      // Batched with the page's other attendance changes and reverted if saving fails (base.html)
+      queueAttendance(id, !getBit(matrix.attended, bit), attended => {
+        setBit(matrix.attended, bit, attended);
+        setRevision(revision => revision + 1);
+        // Keep the cached copy in step, the next visit must not show the old attendance
+        patchCached('/api/matrix', data => ({ ...data, attended: encodeBitset(matrix.attended) }));
+      });
+    } catch (error) {
+      console.error('Error changing attendance:', error);
+    }
+  };
+
+  if (!matrix) {
+    return React.createElement('div', { className: 'loading-container' },
+      React.createElement('div', { className: 'spinner' }),
+      React.createElement('p', null, 'Načítání přehledu účasti...')
+    );
+  }
+
+  const { students, events } = matrix;
+  if (!students.ids.length || !events.ids.length) {
+    return React.createElement('p', { className: 'no-results' }, 'Zatím nejsou žádní studenti ani akce.');
+  }
+
+  const renderCell = (row, column) => {
+    const bit = row * events.ids.length + column;
+    if (!getBit(matrix.registered, bit)) {
+      return React.createElement('span', { className: 'status not-registered' }, '-');
+    }
+    const attended = getBit(matrix.attended, bit) === 1;
+    if (!matrix.can_edit) {
+      return React.createElement('span', { className: `status ${attended ? 'attended' : 'registered'}` },
+        attended ? 'Zúčastněn' : 'Přihlášen');
+    }
+    return React.createElement('label', { className: 'matrix-toggle' },
+      React.createElement('input', {
+        type: 'checkbox',
+        checked: attended,
+        onChange: () => toggleAttendance(row, column)
+      }),
+      React.createElement('span', { className: `status-text ${attended ? 'attended' : 'not-attended'}` },
+        attended ? 'Zúčastněn' : 'Nezúčastněn')
+    );
+  };
+
+  // Only the rows and columns in view are rendered; the header row and name column stay put via position: sticky
+  const [firstRow, lastRow] = visibleRange(
+    viewport.top, viewport.height - MATRIX_HEADER_HEIGHT, MATRIX_ROW_HEIGHT, students.ids.length);
+  const [firstColumn, lastColumn] = visibleRange(
+    viewport.left, viewport.width - MATRIX_NAME_WIDTH, MATRIX_COLUMN_WIDTH, events.ids.length);
+  const rows = Array.from({ length: lastRow - firstRow }, (_, i) => firstRow + i);
+  const columns = Array.from({ length: lastColumn - firstColumn }, (_, i) => firstColumn + i);
+  const width = MATRIX_NAME_WIDTH + events.ids.length * MATRIX_COLUMN_WIDTH;
+  const skippedColumns = { width: firstColumn * MATRIX_COLUMN_WIDTH };
+
+  return React.createElement('div', { className: 'matrix-viewport scrollable', ref: viewportRef, onScroll },
+    React.createElement('div', { className: 'matrix-row matrix-header', style: { width, height: MATRIX_HEADER_HEIGHT } },
+      React.createElement('div', { className: 'matrix-corner', style: { width: MATRIX_NAME_WIDTH } }, 'Jméno studenta'),
+      React.createElement('div', { style: skippedColumns }),
+      columns.map(column =>
+        React.createElement('div', {
+          key: column,
+          className: 'matrix-cell matrix-event',
+          style: { width: MATRIX_COLUMN_WIDTH }
+        },
+          React.createElement('span', { className: 'event-name', title: events.names[column] }, events.names[column]),
+          React.createElement('span', { className: 'event-date' }, events.dates[column])
+        )
+      )
+    ),
+    React.createElement('div', {
+      className: 'matrix-body',
+      style: { width, height: students.ids.length * MATRIX_ROW_HEIGHT }
+    },
+      rows.map(row =>
+        React.createElement('div', {
+          key: row,
+          className: 'matrix-row',
+          style: { top: row * MATRIX_ROW_HEIGHT, width, height: MATRIX_ROW_HEIGHT }
+        },
+          React.createElement('div', { className: 'matrix-name', style: { width: MATRIX_NAME_WIDTH } },
+            students.names[row]),
+          React.createElement('div', { style: skippedColumns }),
+          columns.map(column =>
+            React.createElement('div', { key: column, className: 'matrix-cell', style: { width: MATRIX_COLUMN_WIDTH } },
+              renderCell(row, column))
+          )
+        )
+      )
+    )
+  );
+}
@@ -1,123 +1,196 @@
 // Events List React Component (vanilla JS with React via CDN)
-const { useState, useEffect } = React;
+const { useState, useEffect, useRef } = React;
+
+const EVENT_ROW_HEIGHT = 400;
+const EVENT_COLUMN_WIDTH = 350;
+
+// Events without a capacity (max_students null) never fill up
+const isFull = (event) => event.max_students != null && event.registered_count >= event.max_students;
+
+function EventCard({ event, isPrevious, onRegister }) {
+  return React.createElement('div', {
+    className: 'event-card',
+    style: { opacity: isPrevious ? 0.7 : 1 }
+  },
+    React.createElement('div', { className: 'event-header' },
+      React.createElement('h3', null, event.title),
+      React.createElement('span', {
+        className: `event-status ${isPrevious ? 'past' : 'upcoming'}`
+      }, isPrevious ? 'Proběhlo' : 'Nadcházející')
+    ),
+    React.createElement('div', { className: 'event-details' },
+      React.createElement('p', { className: 'event-description' }, event.description),
+      React.createElement('div', { className: 'event-info' },
+        React.createElement('div', { className: 'info-item' },
+          React.createElement('span', { className: 'icon' }, '📅'),
+          React.createElement('span', null, new Date(event.date).toLocaleDateString('cs-CZ'))
+        ),
+        event.time && React.createElement('div', { className: 'info-item' },
+          React.createElement('span', { className: 'icon' }, '⏰'),
+          React.createElement('span', null, event.time)
+        ),
+        event.location && React.createElement('div', { className: 'info-item' },
+          React.createElement('span', { className: 'icon' }, '📍'),
+          React.createElement('span', null, event.location)
+        ),
+        React.createElement('div', { className: 'info-item' },
+          React.createElement('span', { className: 'icon' }, '👥'),
+          React.createElement('span', null,
+            event.max_students
+              ? `${event.registered_count}/${event.max_students} registrováno`
+              : `${event.registered_count} registrováno`,
+            event.waitlist_count > 0 && ` (${event.waitlist_count} čeká)`
+          )
+        )
+      )
+    ),
+    !isPrevious && !event.is_registered && React.createElement('div', { className: 'event-actions' },
+      isFull(event)
+        ? React.createElement('button', {
+            className: 'btn btn-secondary',
+            onClick: () => onRegister(event)
+          }, 'Plně obsazeno – čekací listina')
+        : React.createElement('button', {
+            className: 'btn btn-primary',
+            onClick: () => onRegister(event)
+          }, 'Registrovat se'),
+      React.createElement('a', {
+        href: `/event/${event.id}`,
+        className: 'btn btn-secondary'
+      }, 'Detail akce')
+    ),
+    !isPrevious && event.is_registered && React.createElement('div', { className: 'event-actions' },
+      React.createElement('span', { className: 'registered-badge' },
+        event.is_waitlisted ? '⏳ Na čekací listině' : '✓ Zaregistrován'),
+      React.createElement('a', {
+        href: `/event/${event.id}`,
+        className: 'btn btn-secondary'
+      }, 'Detail akce')
+    )
+  );
+}
+
+// One of the two lists: /api/events page by page, or the ranked search results while searching
+function useEventList(scope, term) {
+  return usePagedList(async (cursor, revalidated) => {
+    const onUpdate = (fresh) => revalidated({ items: fresh[scope] });
+    if (term) {
+      const data = await swrJSON(`/api/events/search?q=${encodeURIComponent(term)}`, onUpdate);
+      return { items: data[scope], nextCursor: null, total: data[scope].length };
+    }
+    const data = await swrJSON(cursor ? `/api/events?cursor=${cursor}` : '/api/events', onUpdate);
+    return { items: data[scope], nextCursor: data.next_cursor[scope], total: data.total && data.total[scope] };
+  }, term);
+}
 
 function EventsList() {
-  const [events, setEvents] = useState({ current: [], previous: [] });
   const [searchTerm, setSearchTerm] = useState('');
-  const [loading, setLoading] = useState(true);
+  const [query, setQuery] = useState('');
   const [filter, setFilter] = useState('all');
+  const currentEvents = useEventList('current', query);
+  const previousEvents = useEventList('previous', query);
+  const loaded = useRef(false);
 
+  // Search runs on the server; wait for typing to pause before querying
   useEffect(() => {
-    fetchEvents();
-  }, []);
-
-  const fetchEvents = async () => {
-    try {
-      const response = await fetch('/api/events');
-      const data = await response.json();
-      setEvents(data);
-      setLoading(false);
-    } catch (error) {
-      console.error('Error fetching events:', error);
-      setLoading(false);
-    }
-  };
+    const term = searchTerm.trim();
+    const timeout = setTimeout(() => setQuery(term), term ? 250 : 0);
+    return () => clearTimeout(timeout);
+  }, [searchTerm]);
 
-  const filterEvents = (eventsList) => {
-    return eventsList.filter(event =>
-      event.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      event.description.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+  // Change one event in the list on screen and in every cached /api/events response
+  const patchEvent = (eventId, changes) => {
+    const update = (event) => (event.id === eventId ? { ...event, ...changes } : event);
+    currentEvents.patch(update);
+    patchCached('/api/events', (data) => ({
+      ...data,
+      ...(data.current && { current: data.current.map(update) }),
+      ...(data.previous && { previous: data.previous.map(update) })
+    }));
   };
 
-  const handleRegister = async (eventId) => {
+  // The card shows the registration at once; the server's counts replace the guess,
+  // a failed request puts the event back the way it was
+  const handleRegister = async (event) => {
+    const original = {
+      is_registered: event.is_registered,
+      is_waitlisted: event.is_waitlisted,
+      registered_count: event.registered_count,
+      waitlist_count: event.waitlist_count
+    };
+    patchEvent(event.id, isFull(event)
+      ? { is_registered: true, is_waitlisted: true, waitlist_count: event.waitlist_count + 1 }
+      : { is_registered: true, registered_count: event.registered_count + 1 });
     try {
-      const response = await fetch(`/register_event/${eventId}`, {
+      const response = await fetch(`/api/events/${event.id}/register`, {
         method: 'POST',
       });
+      const data = await response.json();
       if (response.ok) {
-        fetchEvents();
-        alert('Úspěšně jste se zaregistrovali na akci!');
+        patchEvent(event.id, {
+          is_waitlisted: data.status === 'waitlisted',
+          registered_count: data.registered_count,
+          waitlist_count: data.waitlist_count
+        });
+        alert(data.status === 'waitlisted'
+          ? `Akce je plně obsazena, jste ${data.waitlist_position}. na čekací listině.`
+          : 'Úspěšně jste se zaregistrovali na akci!');
+      } else if (response.status === 409) {
+        patchEvent(event.id, { ...original, is_registered: true });
+        alert('Na tuto akci jste již registrováni.');
       } else {
-        const data = await response.json();
-        alert(data.message || 'Chyba při registraci');
+        patchEvent(event.id, original);
+        alert(data.error || 'Chyba při registraci');
       }
     } catch (error) {
       console.error('Error registering:', error);
+      patchEvent(event.id, original);
       alert('Chyba při registraci');
     }
   };
 
-  const EventCard = ({ event, isPrevious }) => (
-    React.createElement('div', { 
-      className: 'event-card', 
-      style: { opacity: isPrevious ? 0.7 : 1, animation: 'fadeIn 0.5s ease-in' }
-    },
-      React.createElement('div', { className: 'event-header' },
-        React.createElement('h3', null, event.title),
-        React.createElement('span', { 
-          className: `event-status ${isPrevious ? 'past' : 'upcoming'}` 
-        }, isPrevious ? 'Proběhlo' : 'Nadcházející')
-      ),
-      React.createElement('div', { className: 'event-details' },
-        React.createElement('p', { className: 'event-description' }, event.description),
-        React.createElement('div', { className: 'event-info' },
-          React.createElement('div', { className: 'info-item' },
-            React.createElement('span', { className: 'icon' }, '📅'),
-            React.createElement('span', null, new Date(event.date).toLocaleDateString('cs-CZ'))
-          ),
-          event.time && React.createElement('div', { className: 'info-item' },
-            React.createElement('span', { className: 'icon' }, '⏰'),
-            React.createElement('span', null, event.time)
-          ),
-          event.location && React.createElement('div', { className: 'info-item' },
-            React.createElement('span', { className: 'icon' }, '📍'),
-            React.createElement('span', null, event.location)
-          ),
-          React.createElement('div', { className: 'info-item' },
-            React.createElement('span', { className: 'icon' }, '👥'),
-            React.createElement('span', null, 
-              event.max_students 
-                ? `${event.registered_count}/${event.max_students} registrováno`
-                : `${event.registered_count} registrováno`
-            )
-          )
-        )
-      ),
-      !isPrevious && !event.is_registered && React.createElement('div', { className: 'event-actions' },
-        event.registered_count >= event.max_students 
-          ? React.createElement('button', { className: 'btn btn-disabled', disabled: true }, 'Plně obsazeno')
-          : React.createElement('button', { 
-              className: 'btn btn-primary', 
-              onClick: () => handleRegister(event.id) 
-            }, 'Registrovat se'),
-        React.createElement('a', { 
-          href: `/event/${event.id}`, 
-          className: 'btn btn-secondary' 
-        }, 'Detail akce')
-      ),
-      !isPrevious && event.is_registered && React.createElement('div', { className: 'event-actions' },
-        React.createElement('span', { className: 'registered-badge' }, '✓ Zaregistrován'),
-        React.createElement('a', { 
-          href: `/event/${event.id}`, 
-          className: 'btn btn-secondary' 
-        }, 'Detail akce')
-      )
-    )
-  );
-
-  if (loading) {
+  // The spinner is only for the first load; later searches keep the page in place
+  loaded.current = loaded.current || (currentEvents.ready && previousEvents.ready);
+  if (!loaded.current) {
     return React.createElement('div', { className: 'loading-container' },
       React.createElement('div', { className: 'spinner' }),
       React.createElement('p', null, 'Načítání akcí...')
     );
   }
 
-  const filteredCurrentEvents = filterEvents(events.current);
-  const filteredPreviousEvents = filterEvents(events.previous);
   const showCurrent = filter === 'all' || filter === 'current';
   const showPrevious = filter === 'all' || filter === 'previous';
 
+  // Only the cards in view are mounted; items of pages not fetched yet show as placeholders
+  const eventGrid = (events, isPrevious, emptyMessage) => {
+    if (!events.ready) {
+      return React.createElement('div', { className: 'loading-container' },
+        React.createElement('div', { className: 'spinner' }));
+    }
+    if (events.error && events.count === 0) {
+      return React.createElement(LoadError, { message: 'Akce se nepodařilo načíst.', onRetry: events.retry });
+    }
+    if (events.count === 0) {
+      return React.createElement('p', { className: 'no-events' }, emptyMessage);
+    }
+    return React.createElement(React.Fragment, null,
+      events.error && React.createElement(LoadError, { message: 'Část akcí se nepodařilo načíst.', onRetry: events.retry }),
+      React.createElement(VirtualGrid, {
+        key: query,
+        count: events.count,
+        rowHeight: EVENT_ROW_HEIGHT,
+        minColumnWidth: EVENT_COLUMN_WIDTH,
+        onRangeChange: events.setRange,
+        renderItem: (index) => {
+          const event = events.item(index);
+          return event
+            ? React.createElement(EventCard, { event, isPrevious, onRegister: handleRegister })
+            : React.createElement('div', { className: 'card-placeholder' });
+        }
+      })
+    );
+  };
+
   return React.createElement('div', { className: 'events-container' },
     React.createElement('div', { className: 'search-filter-bar' },
       React.createElement('div', { className: 'search-box' },
@@ -150,34 +223,26 @@ function EventsList() {
         React.createElement('button', {
           className: `filter-btn ${filter === 'current' ? 'active' : ''}`,
           onClick: () => setFilter('current')
-        }, `Nadcházející (${events.current.length})`),
+        }, `Nadcházející (${currentEvents.total || 0})`),
         React.createElement('button', {
           className: `filter-btn ${filter === 'previous' ? 'active' : ''}`,
           onClick: () => setFilter('previous')
-        }, `Minulé (${events.previous.length})`)
+        }, `Minulé (${previousEvents.total || 0})`)
       )
     ),
     showCurrent && React.createElement('div', { className: 'events-section' },
       React.createElement('h2', { className: 'section-title' },
-        `Nadcházející akce${searchTerm ? ` (${filteredCurrentEvents.length})` : ''}`
+        `Nadcházející akce${query ? ` (${currentEvents.total || 0})` : ''}`
       ),
-      React.createElement('div', { className: 'events-grid scrollable' },
-        filteredCurrentEvents.length > 0
-          ? filteredCurrentEvents.map(event => React.createElement(EventCard, { key: event.id, event, isPrevious: false }))
-          : React.createElement('p', { className: 'no-events' },
-              searchTerm ? 'Žádné nadcházející akce nevyhovují vašemu hledání.' : 'Momentálně nejsou žádné nadcházející akce.')
-      )
+      eventGrid(currentEvents, false,
+        query ? 'Žádné nadcházející akce nevyhovují vašemu hledání.' : 'Momentálně nejsou žádné nadcházející akce.')
     ),
     showPrevious && React.createElement('div', { className: 'events-section' },
       React.createElement('h2', { className: 'section-title' },
-        `Minulé akce${searchTerm ? ` (${filteredPreviousEvents.length})` : ''}`
+        `Minulé akce${query ? ` (${previousEvents.total || 0})` : ''}`
       ),
-      React.createElement('div', { className: 'events-grid scrollable' },
-        filteredPreviousEvents.length > 0
-          ? filteredPreviousEvents.map(event => React.createElement(EventCard, { key: event.id, event, isPrevious: true }))
-          : React.createElement('p', { className: 'no-events' },
-              searchTerm ? 'Žádné minulé akce nevyhovují vašemu hledání.' : 'Zatím nejsou žádné minulé akce.')
-      )
+      eventGrid(previousEvents, true,
+        query ? 'Žádné minulé akce nevyhovují vašemu hledání.' : 'Zatím nejsou žádné minulé akce.')
     )
   );
 }
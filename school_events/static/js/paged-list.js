@@ -0,0 +1,156 @@
+// Keyset-paged list for the windowed React components (vanilla JS via CDN)
+// Pages are fetched as the viewport reaches them and only the pages around the viewport
+// are kept; a dropped page keeps its cursor and is fetched again when scrolled back to,
+// which the cache of fetchJSON serves at once and checks with a 304. Memory stays the same
+// however far the list is scrolled.
+const KEEP_PAGES = 2; // pages kept on each side of the visible ones
+
+function emptyList() {
+  return {
+    pages: [], // items of page i, null when not fetched or dropped
+    lengths: [], // item count of page i, kept after the page is dropped
+    cursors: [null], // cursor that fetches page i; page 0 needs none
+    loading: new Set(),
+    done: false,
+    total: null,
+    failed: new Set() // pages whose last fetch failed, fetched again on the next update
+  };
+}
+
+// loadPage(cursor, revalidated) resolves to { items, nextCursor, total }, a page served
+// from the cache may later be corrected by calling revalidated({ items }); key identifies
+// the query (search term, sort...) and a new key starts over from the first page.
+function usePagedList(loadPage, key) {
+  const list = React.useRef(emptyList());
+  const query = React.useRef(key);
+  const generation = React.useRef(0);
+  const visible = React.useRef([0, 0]);
+  const load = React.useRef(loadPage);
+  const [, setRevision] = React.useState(0);
+  load.current = loadPage;
+
+  const rerender = () => setRevision(revision => revision + 1);
+
+  const fetchPage = (page) => {
+    const current = list.current;
+    if (current.loading.has(page) || page >= current.cursors.length) {
+      return;
+    }
+    const started = generation.current;
+    current.loading.add(page);
+    // The server's copy of a page that was served from the cache, if it turned out different
+    const revalidated = ({ items }) => {
+      if (started !== generation.current || !current.pages[page]) {
+        return;
+      }
+      if (items.length === current.lengths[page]) {
+        current.pages[page] = items;
+        rerender();
+      } else {
+        // Items moved between pages, start over; the pages in view are fetched again
+        generation.current += 1;
+        list.current = emptyList();
+        fetchPage(0);
+      }
+    };
+    load.current(current.cursors[page], revalidated)
+      .then(({ items, nextCursor, total }) => {
+        if (started !== generation.current) {
+          return; // The query changed while the page was on its way
+        }
+        current.loading.delete(page);
+        current.failed.delete(page);
+        current.pages[page] = items;
+        current.lengths[page] = items.length;
+        if (page === current.cursors.length - 1) {
+          if (nextCursor) {
+            current.cursors.push(nextCursor);
+          } else {
+            current.done = true;
+          }
+        }
+        if (total != null) {
+          current.total = total;
+        }
+        update();
+      })
+      .catch(error => {
+        if (started !== generation.current) {
+          return;
+        }
+        console.error('Error fetching page:', error);
+        current.loading.delete(page);
+        current.failed.add(page);
+        rerender();
+      });
+  };
+
+  // Fetch the pages in view, drop the ones far from it
+  const update = () => {
+    const current = list.current;
+    const pageSize = current.lengths[0];
+    if (!pageSize) {
+      if (current.failed.has(0)) {
+        fetchPage(0);
+      }
+      rerender();
+      return;
+    }
+    const [first, last] = visible.current;
+    const firstPage = Math.floor(first / pageSize);
+    const lastPage = Math.floor(Math.max(first, last - 1) / pageSize);
+    for (let page = firstPage; page <= lastPage; page++) {
+      if (!current.pages[page]) {
+        fetchPage(page);
+      }
+    }
+    current.pages.forEach((items, page) => {
+      if (items && (page < firstPage - KEEP_PAGES || page > lastPage + KEEP_PAGES)) {
+        current.pages[page] = null;
+      }
+    });
+    rerender();
+  };
+
+  // Reset while rendering, so nothing renders the previous query's items under the new key
+  if (query.current !== key) {
+    query.current = key;
+    generation.current += 1;
+    list.current = emptyList();
+    visible.current = [0, 0];
+  }
+
+  React.useEffect(() => {
+    fetchPage(0);
+  }, [key]);
+
+  const current = list.current;
+  const pageSize = current.lengths[0] || 0;
+  const loaded = current.lengths.reduce((sum, length) => sum + length, 0);
+
+  return {
+    ready: current.lengths.length > 0 || current.failed.has(0),
+    total: current.total,
+    // A page failed to load; it is fetched again by the next setRange or retry
+    error: current.failed.size > 0,
+    // Unfetched items of the next page count too, scrolling onto them fetches the page
+    count: current.done ? loaded : loaded + pageSize,
+    // The item at index, undefined while its page is not in memory
+    item: (index) => {
+      const page = current.pages[Math.floor(index / pageSize)];
+      return page ? page[index % pageSize] : undefined;
+    },
+    // Tell the list which items [first, last) are in view
+    setRange: (first, last) => {
+      visible.current = [first, last];
+      update();
+    },
+    // Fetch the failed pages in view again, e.g. from a retry button when the first page failed
+    retry: () => update(),
+    // Replace every loaded item by update(item), e.g. to show a change before the server confirms it
+    patch: (update) => {
+      current.pages = current.pages.map(items => items && items.map(update));
+      rerender();
+    }
+  };
+}
@@ -1,84 +1,95 @@
 // Students List React Component (vanilla JS with React via CDN)
-const { useState, useEffect } = React;
+const { useState, useEffect, useRef } = React;
+
+const STUDENT_ROW_HEIGHT = 140;
+const STUDENT_COLUMN_WIDTH = 300;
+
+function StudentCard({ student }) {
+  return React.createElement('div', { className: 'student-card' },
+    React.createElement('div', { className: 'student-avatar' },
+      React.createElement('span', { className: 'avatar-text' },
+        student.name.split(' ').map(n => n[0]).join('').toUpperCase()
+      )
+    ),
+    React.createElement('div', { className: 'student-info' },
+      React.createElement('h3', { className: 'student-name' }, student.name),
+      React.createElement('div', { className: 'student-stats' },
+        React.createElement('div', { className: 'stat-item' },
+          React.createElement('span', { className: 'stat-icon' }, '📅'),
+          React.createElement('span', { className: 'stat-value' }, student.event_count),
+          React.createElement('span', { className: 'stat-label' }, 'akcí')
+        ),
+        React.createElement('div', { className: 'stat-item' },
+          React.createElement('span', { className: 'stat-icon' }, '✓'),
+          React.createElement('span', { className: 'stat-value' }, `${Math.round(student.attendance_rate * 100)}%`),
+          React.createElement('span', { className: 'stat-label' }, 'účast')
+        )
+      ),
+      React.createElement('p', { className: 'student-username' }, `@${student.username}`)
+    ),
+    React.createElement('div', { className: 'student-actions' },
+      React.createElement('a', {
+        href: `/student/${student.id}/events`,
+        className: 'btn btn-small'
+      }, 'Zobrazit akce')
+    )
+  );
+}
 
 function StudentsList() {
-  const [students, setStudents] = useState([]);
   const [searchTerm, setSearchTerm] = useState('');
-  const [loading, setLoading] = useState(true);
   const [sortBy, setSortBy] = useState('name');
+  const [query, setQuery] = useState({ term: '', sort: 'name' });
+  const [totalCount, setTotalCount] = useState(0);
+  const [showMatrix, setShowMatrix] = useState(false);
+  const loaded = useRef(false);
 
+  // Filtering and sorting happen on the server; wait for typing to pause before searching
   useEffect(() => {
-    fetchStudents();
-  }, []);
+    const term = searchTerm.trim();
+    const timeout = setTimeout(() => setQuery({ term, sort: sortBy }), term ? 300 : 0);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, sortBy]);
 
-  const fetchStudents = async () => {
-    try {
-      const response = await fetch('/api/students');
-      const data = await response.json();
-      setStudents(data);
-      setLoading(false);
-    } catch (error) {
-      console.error('Error fetching students:', error);
-      setLoading(false);
+  // The cursor encodes the sort order and position, the search term still applies
+  const queryKey = `${query.sort}:${query.term}`;
+  const students = usePagedList(async (cursor, revalidated) => {
+    const params = new URLSearchParams({ sort: query.sort });
+    if (query.term) {
+      params.set('q', query.term);
     }
-  };
-
-  const filterAndSortStudents = () => {
-    let filtered = students.filter(student =>
-      student.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      student.username.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
-    filtered.sort((a, b) => {
-      if (sortBy === 'name') {
-        return a.name.localeCompare(b.name, 'cs');
-      } else if (sortBy === 'username') {
-        return a.username.localeCompare(b.username);
-      } else if (sortBy === 'events') {
-        return b.event_count - a.event_count;
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const data = await swrJSON(`/api/students?${params}`, (fresh) => {
+      if (fresh.students) {
+        revalidated({ items: fresh.students });
       }
-      return 0;
     });
+    if (data.error === 'Unauthorized') {
+      return { items: [], nextCursor: null, total: 0 }; // Only admins may list students, everyone sees the matrix
+    }
+    if (!data.students) {
+      throw new Error(data.error);
+    }
+    return { items: data.students, nextCursor: data.next_cursor, total: data.total };
+  }, queryKey);
 
-    return filtered;
-  };
-
-  const StudentCard = ({ student }) => (
-    React.createElement('div', { className: 'student-card' },
-      React.createElement('div', { className: 'student-avatar' },
-        React.createElement('span', { className: 'avatar-text' },
-          student.name.split(' ').map(n => n[0]).join('').toUpperCase()
-        )
-      ),
-      React.createElement('div', { className: 'student-info' },
-        React.createElement('h3', { className: 'student-name' }, student.name),
-        React.createElement('div', { className: 'student-stats' },
-          React.createElement('div', { className: 'stat-item' },
-            React.createElement('span', { className: 'stat-icon' }, '📅'),
-            React.createElement('span', { className: 'stat-value' }, student.event_count),
-            React.createElement('span', { className: 'stat-label' }, 'akcí')
-          )
-        ),
-        React.createElement('p', { className: 'student-username' }, `@${student.username}`)
-      ),
-      React.createElement('div', { className: 'student-actions' },
-        React.createElement('a', { 
-          href: `/student/${student.id}/events`, 
-          className: 'btn btn-small' 
-        }, 'Zobrazit akce')
-      )
-    )
-  );
+  useEffect(() => {
+    if (!query.term && students.total != null) {
+      setTotalCount(students.total);
+    }
+  }, [query.term, students.total]);
 
-  if (loading) {
+  // The spinner is only for the first load; later searches keep the page in place
+  loaded.current = loaded.current || students.ready;
+  if (!loaded.current) {
     return React.createElement('div', { className: 'loading-container' },
       React.createElement('div', { className: 'spinner' }),
       React.createElement('p', null, 'Načítání studentů...')
     );
   }
 
-  const filteredStudents = filterAndSortStudents();
-
   return React.createElement('div', { className: 'students-container' },
     React.createElement('div', { className: 'students-header' },
       React.createElement('div', { className: 'search-box' },
@@ -111,25 +122,52 @@ function StudentsList() {
           className: 'sort-select'
         },
           React.createElement('option', { value: 'name' }, 'Jméno'),
-          React.createElement('option', { value: 'events' }, 'Počet akcí')
+          React.createElement('option', { value: 'events' }, 'Počet akcí'),
+          React.createElement('option', { value: 'attendance' }, 'Účast')
         )
       )
     ),
     React.createElement('div', { className: 'students-stats' },
       React.createElement('div', { className: 'stat-card' },
-        React.createElement('span', { className: 'stat-number' }, students.length),
+        React.createElement('span', { className: 'stat-number' }, totalCount),
         React.createElement('span', { className: 'stat-title' }, 'Celkem studentů')
       ),
       React.createElement('div', { className: 'stat-card' },
-        React.createElement('span', { className: 'stat-number' }, filteredStudents.length),
+        React.createElement('span', { className: 'stat-number' }, students.total || 0),
         React.createElement('span', { className: 'stat-title' }, 'Zobrazeno')
       )
     ),
-    React.createElement('div', { className: 'students-grid scrollable' },
-      filteredStudents.length > 0
-        ? filteredStudents.map(student => React.createElement(StudentCard, { key: student.id, student }))
-        : React.createElement('p', { className: 'no-results' },
-            searchTerm ? 'Žádní studenti nevyhovují vašemu hledání.' : 'Zatím nejsou žádní studenti.')
+    students.error && React.createElement(LoadError, {
+      message: students.count > 0 ? 'Část studentů se nepodařilo načíst.' : 'Studenty se nepodařilo načíst.',
+      onRetry: students.retry
+    }),
+    !students.ready
+      ? React.createElement('div', { className: 'loading-container' },
+          React.createElement('div', { className: 'spinner' }))
+      : students.count > 0
+        // Only the cards in view are mounted; items of pages not fetched yet show as placeholders
+        ? React.createElement(VirtualGrid, {
+            key: queryKey,
+            count: students.count,
+            rowHeight: STUDENT_ROW_HEIGHT,
+            minColumnWidth: STUDENT_COLUMN_WIDTH,
+            onRangeChange: students.setRange,
+            renderItem: (index) => {
+              const student = students.item(index);
+              return student
+                ? React.createElement(StudentCard, { student })
+                : React.createElement('div', { className: 'card-placeholder' });
+            }
+          })
+        : !students.error && React.createElement('p', { className: 'no-results' },
+            query.term ? 'Žádní studenti nevyhovují vašemu hledání.' : 'Zatím nejsou žádní studenti.'),
+    // The matrix is only fetched and rendered once it is opened
+    React.createElement('details', {
+      className: 'matrix-details',
+      onToggle: (e) => setShowMatrix(e.currentTarget.open)
+    },
+      React.createElement('summary', null, 'Zobrazit kompletní přehled účasti na akcích'),
+      showMatrix && React.createElement(AttendanceGrid)
     )
   );
 }
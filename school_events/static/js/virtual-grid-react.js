@@ -0,0 +1,50 @@
+// Virtual Grid React Component (vanilla JS with React via CDN)
+const GRID_GAP = 24;
+
+// Grid of equally tall cards in a scrolling box; only the rows in view are mounted.
+// renderItem(index) renders one card, onRangeChange(first, last) hears which items are in view.
+function VirtualGrid({ count, rowHeight, minColumnWidth, renderItem, onRangeChange }) {
+  const [viewportRef, viewport, onScroll] = useViewport();
+  const columns = Math.max(1, Math.floor((viewport.width + GRID_GAP) / (minColumnWidth + GRID_GAP)));
+  const rowCount = Math.ceil(count / columns);
+  const [firstRow, lastRow] = visibleRange(viewport.top, viewport.height, rowHeight + GRID_GAP, rowCount);
+  const first = firstRow * columns;
+  const last = Math.min(count, lastRow * columns);
+
+  React.useEffect(() => {
+    onRangeChange(first, last);
+  }, [first, last]);
+
+  const rows = [];
+  for (let row = firstRow; row < lastRow; row++) {
+    const cells = [];
+    for (let index = row * columns; index < Math.min(count, (row + 1) * columns); index++) {
+      cells.push(React.createElement(React.Fragment, { key: index }, renderItem(index)));
+    }
+    rows.push(React.createElement('div', {
+      key: row,
+      className: 'virtual-row',
+      style: {
+        top: row * (rowHeight + GRID_GAP),
+        height: rowHeight,
+        gap: GRID_GAP,
+        gridTemplateColumns: `repeat(${columns}, minmax(0, 1fr))`
+      }
+    }, cells));
+  }
+
+  return React.createElement('div', { className: 'virtual-grid scrollable', ref: viewportRef, onScroll },
+    React.createElement('div', {
+      className: 'virtual-grid-body',
+      style: { height: Math.max(0, rowCount * (rowHeight + GRID_GAP) - GRID_GAP) }
+    }, rows)
+  );
+}
+
+// Shown instead of a list whose first page failed to load, or above one missing a later page
+function LoadError({ message, onRetry }) {
+  return React.createElement('div', { className: 'load-error' },
+    React.createElement('p', null, message),
+    React.createElement('button', { className: 'btn btn-secondary', onClick: onRetry }, 'Zkusit znovu')
+  );
+}
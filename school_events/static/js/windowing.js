@@ -0,0 +1,52 @@
+// Windowed rendering shared by the React components (vanilla JS via CDN)
+// Only the items inside the scrolled viewport, plus a few on each side, are mounted,
+// so the DOM stays the same size however long the list or wide the grid gets.
+const OVERSCAN = 4;
+
+// [first, last) indexes of fixed-size items shown when a viewport of extent is scrolled to offset
+function visibleRange(offset, extent, itemSize, count, overscan = OVERSCAN) {
+  return [
+    Math.max(0, Math.floor(offset / itemSize) - overscan),
+    Math.min(count, Math.ceil((offset + Math.max(extent, 0)) / itemSize) + overscan)
+  ];
+}
+
+// Scroll position and size of a scrolling element, read at most once per animation frame.
+// Returns [ref callback for the element, { top, left, width, height }, onScroll handler].
+function useViewport() {
+  const element = React.useRef(null);
+  const frame = React.useRef(0);
+  const [viewport, setViewport] = React.useState({ top: 0, left: 0, width: 0, height: 0 });
+
+  const measure = React.useCallback(() => {
+    cancelAnimationFrame(frame.current);
+    frame.current = requestAnimationFrame(() => {
+      const node = element.current;
+      if (node) {
+        setViewport({
+          top: node.scrollTop,
+          left: node.scrollLeft,
+          width: node.clientWidth,
+          height: node.clientHeight
+        });
+      }
+    });
+  }, []);
+
+  const ref = React.useCallback(node => {
+    element.current = node;
+    if (node) {
+      measure();
+    }
+  }, [measure]);
+
+  React.useEffect(() => {
+    window.addEventListener('resize', measure);
+    return () => {
+      window.removeEventListener('resize', measure);
+      cancelAnimationFrame(frame.current);
+    };
+  }, [measure]);
+
+  return [ref, viewport, measure];
+}
@@ -2,8 +2,7 @@
 Test script for admin data creation functions
 This script tests all three admin functions to ensure they work correctly
 """
-from app import app, db, User, Event, Registration
-from werkzeug.security import generate_password_hash
+from app import app, db, User, Event, Registration, password_hasher
 
 def test_database_setup():
     """Test if database is set up correctly"""
@@ -40,7 +39,7 @@ def test_admin_exists():
             try:
                 admin = User(
                     username='admin',
-                    password_hash=generate_password_hash('admin123'),
+                    password_hash=password_hasher.hash('admin123'),
                     name='Administrator',
                     is_admin=True
                 )
@@ -0,0 +1,230 @@
+"""
+Tests for the JSON API used by the React components
+"""
+from datetime import datetime
+from app import app, db, User, Event, Registration
+from versioning import current_data_version
+from pagination import encode_cursor
+
+def login_client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+def fetch_all_events(client):
+    """Follow the cursors of both event lists and return every event"""
+    data = client.get('/api/events').get_json()
+    events = data['current'] + data['previous']
+    for scope, cursor in data['next_cursor'].items():
+        while cursor:
+            page = client.get(f'/api/events?cursor={cursor}').get_json()
+            events += page[scope]
+            cursor = page['next_cursor'][scope]
+    return events
+
+def fetch_all_students(client, params=''):
+    data = client.get(f'/api/students?{params}').get_json()
+    students = data['students']
+    while data['next_cursor']:
+        data = client.get(f'/api/students?{params}&cursor={data["next_cursor"]}').get_json()
+        students += data['students']
+    return students
+
+def test_api_events_counts():
+    """Aggregated counts and is_registered match the registrations table"""
+    with app.app_context():
+        registration = Registration.query.join(User).filter(User.is_admin == False).first()
+        if registration is None:
+            print("No student registrations in the database, skipping")
+            return
+        student_id = registration.user_id
+        expected_counts = {event.id: sum(r.status == 'confirmed' for r in event.registrations) for event in Event.query.all()}
+        expected_registered = {r.event_id for r in Registration.query.filter_by(user_id=student_id)}
+
+    events = fetch_all_events(login_client(student_id))
+
+    assert len(events) == len(expected_counts)
+    for event in events:
+        assert set(event) == {'id', 'title', 'description', 'date', 'max_students', 'registered_count',
+                              'waitlist_count', 'is_registered', 'is_waitlisted'}
+        assert event['registered_count'] == expected_counts[event['id']]
+        assert event['is_registered'] == (event['id'] in expected_registered)
+
+def test_api_events_anonymous():
+    """Anonymous visitors get the same list with is_registered always false"""
+    events = fetch_all_events(app.test_client())
+    assert all(not event['is_registered'] for event in events)
+
+def test_api_events_pagination():
+    """Small pages walked with cursors return every event exactly once, in order"""
+    client = app.test_client()
+    data = client.get('/api/events?limit=2').get_json()
+    assert data['limit'] == 2
+    for scope in ('current', 'previous'):
+        events = list(data[scope])
+        cursor = data['next_cursor'][scope]
+        while cursor:
+            page = client.get(f'/api/events?limit=2&cursor={cursor}').get_json()
+            assert len(page[scope]) <= 2
+            events += page[scope]
+            cursor = page['next_cursor'][scope]
+        assert len(events) == data['total'][scope]
+        assert len({event['id'] for event in events}) == len(events)
+        dates = [event['date'] for event in events]
+        assert dates == sorted(dates, reverse=(scope == 'previous'))
+
+    assert client.get('/api/events?cursor=not-a-cursor').status_code == 400
+
+def test_api_forged_cursors():
+    """Well-formed cursors with too few values or values of the wrong type are rejected"""
+    for values in ([], ['2025-01-01'], ['2025-01-01', 1, 2], ['2025-01-01', 'x'], [5, 1], ['2025-01-01', True]):
+        assert app.test_client().get(f'/api/events?cursor={encode_cursor("current", values)}').status_code == 400
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        if admin is None:
+            return
+        admin_id = admin.id
+    client = login_client(admin_id)
+    for sort, values in (('name', []), ('name', [1, 1]), ('events', ['a', 1]), ('attendance', [None, 1])):
+        response = client.get(f'/api/students?sort={sort}&cursor={encode_cursor(sort, values)}')
+        assert response.status_code == 400
+    assert client.get(f'/api/students?sort=name&cursor={encode_cursor("name", ["Novák", 1])}').status_code == 200
+
+def test_api_students_aggregates():
+    """event_count, attended_count and attendance_rate come from one aggregate query"""
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        if admin is None:
+            print("No admin user in the database, skipping")
+            return
+        admin_id = admin.id
+        expected = {}
+        for student in User.query.filter_by(is_admin=False):
+            # Waitlisted registrations are not counted as events of the student
+            confirmed = [r for r in student.registrations if r.status == 'confirmed']
+            expected[student.id] = (len(confirmed), sum(1 for r in confirmed if r.attended))
+
+    client = login_client(admin_id)
+    data = fetch_all_students(client)
+    assert len(data) == len(expected)
+    for student in data:
+        event_count, attended_count = expected[student['id']]
+        assert student['event_count'] == event_count
+        assert student['attended_count'] == attended_count
+        if event_count:
+            assert student['attendance_rate'] == round(attended_count / event_count, 2)
+
+    by_events = fetch_all_students(client, 'sort=events&limit=3')
+    counts = [student['event_count'] for student in by_events]
+    assert counts == sorted(counts, reverse=True)
+
+    if data:
+        username = data[0]['username']
+        matches = fetch_all_students(client, f'q={username}')
+        assert username in [student['username'] for student in matches]
+
+def test_api_students_czech_order_and_search():
+    """Names sort in Czech alphabetical order as displayed, search ignores case and diacritics"""
+    names = ['Žák Ondřej', 'Chalupa Jan', 'Černá Eva', 'bílá Jana', 'Hrubý Ota', 'Celý Adam', 'Adámek Petr', '']
+    with app.app_context():
+        admin = User(username='czsort_admin', password_hash='x', is_admin=True)
+        students = [User(username=f'czsort_{i}', name=name, password_hash='x', is_admin=False)
+                    for i, name in enumerate(names)]
+        db.session.add_all([admin, *students])
+        db.session.commit()
+        admin_id = admin.id
+        ids = {student.id for student in students}
+    try:
+        client = login_client(admin_id)
+        ordered = [s['name'] for s in fetch_all_students(client, 'sort=name&limit=3') if s['id'] in ids]
+        # An empty name is shown and sorted as the username; ch comes after h, č after c, ž after z
+        assert ordered == ['Adámek Petr', 'bílá Jana', 'Celý Adam', 'czsort_7', 'Černá Eva',
+                           'Hrubý Ota', 'Chalupa Jan', 'Žák Ondřej']
+
+        for query in ('černá', 'CERNA', 'cern'):
+            matches = fetch_all_students(client, f'q={query}')
+            assert [s['name'] for s in matches if s['id'] in ids] == ['Černá Eva']
+        assert client.get('/api/students?q=%20.%20').get_json()['students'] == []
+    finally:
+        with app.app_context():
+            # Deleted through the session, so the cached login identities are dropped too
+            for user in User.query.filter(User.id.in_(ids | {admin_id})):
+                db.session.delete(user)
+            db.session.commit()
+
+def test_api_students_requires_admin():
+    with app.app_context():
+        student = User.query.filter_by(is_admin=False).first()
+        if student is None:
+            return
+        student_id = student.id
+    assert login_client(student_id).get('/api/students').status_code == 403
+
+def test_attendance_batch():
+    """A batch of attendance changes is applied in one request and bumps the data version
+
+    Waitlisted registrations keep their attendance and are reported back.
+    """
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        if admin is None:
+            return
+        admin_id = admin.id
+        students = [User(username=f"batchtest{i}", password_hash='x', name=f"Batch {i}") for i in range(3)]
+        event = Event(name="Batch test", date=datetime(2030, 5, 1, 10, 0), description="Test")
+        db.session.add_all(students + [event])
+        db.session.commit()
+        registrations = [Registration(user_id=student.id, event_id=event.id, attended=False) for student in students]
+        registrations[2].status = 'waitlisted'
+        db.session.add_all(registrations)
+        db.session.commit()
+        ids = [r.id for r in registrations]
+        student_ids = [student.id for student in students]
+        event_id = event.id
+        version = current_data_version(db.session.connection())[0]
+
+    try:
+        client = login_client(admin_id)
+        response = client.post('/api/attendance/batch', json=[
+            {'registration_id': ids[0], 'attended': True},
+            {'registration_id': ids[1], 'attended': True},
+            {'registration_id': ids[1], 'attended': False},
+            {'registration_id': ids[2], 'attended': True},
+            {'registration_id': 0, 'attended': True},
+        ])
+        data = response.get_json()
+        assert data['status'] == 'success'
+        assert data['missing'] == [0]
+        assert data['waitlisted'] == [ids[2]]
+        assert {r['registration_id']: r['attended'] for r in data['registrations']} == {
+            ids[0]: True, ids[1]: False, ids[2]: False
+        }
+        with app.app_context():
+            stored = dict(db.session.query(Registration.id, Registration.attended).filter(Registration.id.in_(ids)))
+            assert stored == {ids[0]: True, ids[1]: False, ids[2]: False}
+            assert current_data_version(db.session.connection())[0] > version
+
+        toggle = client.get(f'/admin/toggle_attendance/{ids[2]}', headers={'X-Requested-With': 'XMLHttpRequest'})
+        assert toggle.status_code == 409
+        assert client.post('/api/attendance/batch', json={'updates': 'x'}).status_code == 400
+        assert client.post('/api/attendance/batch', json=[{'registration_id': ids[0]}]).status_code == 400
+        student_client = login_client(student_ids[0])
+        assert student_client.post('/api/attendance/batch', json=[]).status_code == 403
+    finally:
+        with app.app_context():
+            Registration.query.filter(Registration.id.in_(ids)).delete()
+            User.query.filter(User.id.in_(student_ids)).delete()
+            db.session.delete(db.session.get(Event, event_id))
+            db.session.commit()
+
+if __name__ == "__main__":
+    test_api_events_counts()
+    test_api_events_anonymous()
+    test_api_events_pagination()
+    test_api_forged_cursors()
+    test_api_students_aggregates()
+    test_api_students_czech_order_and_search()
+    test_api_students_requires_admin()
+    test_attendance_batch()
+    print("✓ API tests passed")
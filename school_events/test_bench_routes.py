@@ -0,0 +1,58 @@
+"""
+Tests for the route benchmark suite
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from bench_routes import ROUTES, parse_sizes, timing_stats, scaling_exponent, compare
+
+def test_parse_sizes_and_stats():
+    assert parse_sizes('100x50, 1000X500') == [(100, 50), (1000, 500)]
+    stats = timing_stats([0.004, 0.001, 0.002, 0.003])
+    assert stats['runs'] == 4
+    assert stats['median'] == 2.5
+    assert stats['min'] == 1.0
+    assert stats['p95'] == 4.0
+
+def test_scaling_exponent():
+    small = {'median': 2.0, 'registrations': 1000}
+    assert scaling_exponent(small, {'median': 20.0, 'registrations': 10000}) == 1.0
+    assert scaling_exponent(small, {'median': 2.0, 'registrations': 10000}) == 0.0
+    assert scaling_exponent(small, {'median': 5.0, 'registrations': 1000}) is None
+
+def test_compare_flags_regressions():
+    baseline = {'routes': {'GET /students': {'100x50': {'median': 10.0}, '1000x500': {'median': 100.0}},
+                           'GET /': {'100x50': {'median': 1.0}}}}
+    report = {'routes': {'GET /students': {'100x50': {'median': 10.5}, '1000x500': {'median': 140.0},
+                                           'scaling': 1.0},
+                         'GET /': {'100x50': {'median': 1.4}},
+                         'GET /api/events': {'100x50': {'median': 3.0}}}}
+    # 1.0 -> 1.4 ms is 40% but below min_delta; routes missing from the baseline are not compared
+    assert compare(baseline, report, threshold=0.25, min_delta=0.5) == [('GET /students', '1000x500', 100.0, 140.0)]
+
+def test_small_run():
+    """A tiny run of the script times every route and writes the report"""
+    fd, output = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        result = subprocess.run([sys.executable, 'bench_routes.py', '--sizes', '20x5,40x5', '--repeat', '1',
+                                 '--warmup', '0', '--output', output],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                                timeout=120)
+        assert result.returncode == 0, result.stderr
+        with open(output) as f:
+            report = json.load(f)
+    finally:
+        os.remove(output)
+    assert [size['label'] for size in report['sizes']] == ['20x5', '40x5']
+    assert len(report['routes']) == len(ROUTES)
+    assert report['routes']['GET /students']['40x5']['runs'] == 1
+
+if __name__ == "__main__":
+    test_parse_sizes_and_stats()
+    test_scaling_exponent()
+    test_compare_flags_regressions()
+    test_small_run()
+    print("✓ Route benchmark tests passed")
@@ -0,0 +1,83 @@
+"""
+Tests for the in-process response cache
+"""
+import time
+from datetime import datetime
+from app import app, db, User, Event, Registration, response_cache
+from cache import LRUCache, NullCache, create_cache
+
+def test_lru_eviction_and_ttl():
+    cache = LRUCache(max_entries=2, ttl=0.05)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1      # 'a' is now most recently used
+    cache.set('c', 3)               # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    time.sleep(0.06)
+    assert cache.get('a') is None   # expired
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['evictions'] == 1
+
+def test_tag_invalidation():
+    cache = LRUCache()
+    cache.set('events', 1, tags=('events',))
+    cache.set('both', 2, tags=('events', 'registrations'))
+    cache.set('other', 3, tags=('attendance',))
+    cache.invalidate('registrations')
+    assert cache.get('events') == 1
+    assert cache.get('both') is None
+    assert cache.get('other') == 3
+
+def test_create_cache_backends():
+    assert isinstance(create_cache({'RESPONSE_CACHE_BACKEND': 'null'}), NullCache)
+    cache = create_cache({'RESPONSE_CACHE_MAX_ENTRIES': 5, 'RESPONSE_CACHE_TTL': 10})
+    assert cache.max_entries == 5 and cache.ttl == 10
+
+def test_api_events_cache_hit_and_invalidation():
+    """Repeated anonymous requests hit the cache, registering for an event invalidates it"""
+    with app.app_context():
+        student = User(username="cachetest", password_hash='x', name="Cache Test", is_admin=False)
+        event = Event(name="Cache test event", date=datetime(2030, 3, 1, 10, 0), description="Test")
+        db.session.add_all([student, event])
+        db.session.commit()
+        student_id, event_id = student.id, event.id
+
+    try:
+        response_cache.clear()
+        client = app.test_client()
+        hits = response_cache.stats()['hits']
+        first = client.get('/api/events?limit=200').get_json()
+        second = client.get('/api/events?limit=200').get_json()
+        assert first == second
+        assert response_cache.stats()['hits'] == hits + 1
+
+        student_client = app.test_client()
+        with student_client.session_transaction() as session:
+            session['_user_id'] = str(student_id)
+        student_client.get(f'/event/{event_id}/register')
+
+        # Per-user is_registered is merged in, the shared count is rebuilt after invalidation
+        data = student_client.get('/api/events?limit=200').get_json()
+        event_data = next(e for e in data['current'] if e['id'] == event_id)
+        assert event_data['is_registered'] is True
+        assert event_data['registered_count'] == 1
+        anonymous = client.get('/api/events?limit=200').get_json()
+        assert next(e for e in anonymous['current'] if e['id'] == event_id)['is_registered'] is False
+    finally:
+        with app.app_context():
+            Registration.query.filter_by(user_id=student_id).delete()
+            db.session.delete(db.session.get(Event, event_id))
+            db.session.delete(db.session.get(User, student_id))
+            db.session.commit()
+        response_cache.clear()
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_tag_invalidation()
+    test_create_cache_backends()
+    test_api_events_cache_hit_and_invalidation()
+    print("✓ Cache tests passed")
@@ -0,0 +1,37 @@
+"""
+Tests for the page side of the client data cache (static/js/api-fetch.js)
+"""
+from app import app, db, User
+
+def scope_meta(user_id):
+    return f'<meta name="api-cache-scope" content="{user_id}">'.encode()
+
+def test_cache_scope_follows_user():
+    """Stored API responses are scoped to the logged-in user, so another login in the tab never sees them"""
+    with app.app_context():
+        students = [User(username=f'cache_scope_{i}', name=f'Cache Scope {i}', password_hash='x', is_admin=False)
+                    for i in range(2)]
+        db.session.add_all(students)
+        db.session.commit()
+        ids = [student.id for student in students]
+    try:
+        response = app.test_client().get('/login')
+        assert scope_meta('anon') in response.data
+
+        for user_id in ids:
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+            response = client.get('/')
+            assert response.status_code == 200
+            assert scope_meta(user_id) in response.data
+            assert scope_meta('anon') not in response.data
+    finally:
+        with app.app_context():
+            for user in User.query.filter(User.id.in_(ids)):
+                db.session.delete(user)
+            db.session.commit()
+
+if __name__ == "__main__":
+    test_cache_scope_follows_user()
+    print("✓ Client cache tests passed")
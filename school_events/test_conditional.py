@@ -0,0 +1,108 @@
+"""
+Tests for the data version counter and conditional GET responses
+"""
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from app import app, db, User, Event
+from versioning import current_data_version, conditional_get
+
+def read_version():
+    with app.app_context():
+        return current_data_version(db.session.connection())[0]
+
+def test_version_bumps_on_commit_only():
+    """Committed writes bump the version, rolled back writes leave it unchanged"""
+    before = read_version()
+    with app.app_context():
+        event = Event(name="Version test", date=datetime(2030, 4, 1, 10, 0), description="Test")
+        db.session.add(event)
+        db.session.flush()
+        db.session.rollback()
+    assert read_version() == before
+
+    with app.app_context():
+        event = Event(name="Version test", date=datetime(2030, 4, 1, 10, 0), description="Test")
+        db.session.add(event)
+        db.session.commit()
+        after_insert = current_data_version(db.session.connection())[0]
+        db.session.delete(event)
+        db.session.commit()
+    assert after_insert > before
+    assert read_version() > after_insert
+
+def test_api_events_not_modified():
+    """A client sending the current ETag gets an empty 304, any write makes it stale"""
+    client = app.test_client()
+    first = client.get('/api/events')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    # The response differs per user, so it is private and validated by ETag only
+    assert 'Last-Modified' not in first.headers
+    assert first.cache_control.private and first.cache_control.no_cache
+
+    second = client.get('/api/events', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+
+    with app.app_context():
+        event = Event(name="ETag test", date=datetime(2030, 4, 2, 10, 0), description="Test")
+        db.session.add(event)
+        db.session.commit()
+        event_id = event.id
+    try:
+        third = client.get('/api/events', headers={'If-None-Match': etag})
+        assert third.status_code == 200
+        assert third.headers['ETag'] != etag
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(Event, event_id))
+            db.session.commit()
+
+def test_etag_differs_per_user():
+    """is_registered differs per student, so each user gets their own ETag"""
+    with app.app_context():
+        student = User.query.filter_by(is_admin=False).first()
+        if student is None:
+            return
+        student_id = student.id
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+    anonymous_etag = app.test_client().get('/api/events').headers['ETag']
+    assert client.get('/api/events').headers['ETag'] != anonymous_etag
+    assert client.get('/api/events', headers={'If-None-Match': anonymous_etag}).status_code == 200
+
+def conditional_app(updated_at, vary=None):
+    """Throwaway app with one conditional view at data version 1, last written at updated_at"""
+    test_app = Flask(__name__)
+    test_app.add_url_rule('/', 'view', conditional_get(lambda: (1, updated_at), vary=vary)(lambda: 'body'))
+    return test_app.test_client()
+
+def test_if_modified_since():
+    """Last-Modified is honored for shared responses, once the second of the last write is over"""
+    written = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=5)
+    client = conditional_app(written)
+    first = client.get('/')
+    assert first.last_modified == written
+    assert client.get('/', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+
+    # A second write in the same second would get the same timestamp
+    assert 'Last-Modified' not in conditional_app(datetime.now(timezone.utc)).get('/').headers
+
+def test_if_modified_since_ignored_for_variants():
+    """A varying response never answers If-Modified-Since, it could be another user's variant"""
+    written = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=5)
+    client = conditional_app(written, vary=lambda: 'u1')
+    since = (written + timedelta(minutes=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')
+    response = client.get('/', headers={'If-Modified-Since': since})
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
+    assert response.cache_control.private
+
+if __name__ == "__main__":
+    test_version_bumps_on_commit_only()
+    test_api_events_not_modified()
+    test_etag_differs_per_user()
+    test_if_modified_since()
+    test_if_modified_since_ignored_for_variants()
+    print("✓ Conditional GET tests passed")
@@ -0,0 +1,65 @@
+"""
+Tests for the database engine profile
+"""
+import os
+import tempfile
+import time
+from flask import Flask
+from sqlalchemy import create_engine, text
+from app import app, db
+from database import configure_database, apply_sqlite_pragmas, SQLITE_PRAGMAS
+
+def test_pragmas_applied():
+    with app.app_context():
+        conn = db.session.connection()
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+def test_settings_and_environment():
+    """config.py values override the defaults and DATABASE_URL overrides config.py"""
+    test_app = Flask(__name__)
+    configure_database(test_app, {'DATABASE_URI': 'sqlite:////tmp/configured.db', 'DATABASE_POOL_SIZE': 3,
+                                  'SQLITE_PRAGMAS': {'cache_size': -1000}})
+    assert test_app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:////tmp/configured.db'
+    assert test_app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 3
+    assert test_app.config['SQLITE_PRAGMAS']['cache_size'] == -1000
+    assert test_app.config['SQLITE_PRAGMAS']['journal_mode'] == 'wal'
+
+    os.environ['DATABASE_URL'] = 'sqlite://'
+    try:
+        configure_database(test_app, {'DATABASE_URI': 'sqlite:////tmp/configured.db'})
+    finally:
+        del os.environ['DATABASE_URL']
+    assert test_app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://'
+    assert test_app.config['SQLALCHEMY_ENGINE_OPTIONS'] == {}
+
+def test_reader_not_blocked_by_writer():
+    """In WAL mode a read succeeds at once while another connection holds the write lock"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{path}')
+    apply_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO item (id) VALUES (1)"))
+        with engine.connect() as writer, engine.connect() as reader:
+            writer.exec_driver_sql("BEGIN IMMEDIATE")
+            writer.execute(text("INSERT INTO item (id) VALUES (2)"))
+            started = time.monotonic()
+            # The reader sees the last committed state, not the open write
+            assert reader.execute(text("SELECT COUNT(*) FROM item")).scalar() == 1
+            assert time.monotonic() - started < 1
+            writer.rollback()
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    test_pragmas_applied()
+    test_settings_and_environment()
+    test_reader_not_blocked_by_writer()
+    print("✓ Database profile tests passed")
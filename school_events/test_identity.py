@@ -0,0 +1,78 @@
+"""
+Tests for the cached flask-login user loader
+"""
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import app, db, User, load_user, user_cache, password_hasher
+
+@contextmanager
+def count_queries():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def create_user():
+    with app.app_context():
+        user = User(username='identity_test_user', name='Identity Test',
+                    password_hash=password_hasher.hash('test123'))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def delete_user(user_id):
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+def test_loader_is_cached():
+    user_id = create_user()
+    user_cache.clear()
+    try:
+        with count_queries() as statements:
+            first = load_user(str(user_id))
+            assert len(statements) == 1
+            second = load_user(str(user_id))
+            assert len(statements) == 1
+        assert first is second
+        assert second.id == user_id and second.display_name == 'Identity Test' and not second.is_admin
+    finally:
+        delete_user(user_id)
+
+def test_commit_invalidates_identity():
+    """Promoting a user to admin is visible on the next request"""
+    user_id = create_user()
+    try:
+        with app.app_context():
+            assert not load_user(str(user_id)).is_admin
+            db.session.get(User, user_id).is_admin = True
+            db.session.commit()
+            assert load_user(str(user_id)).is_admin
+    finally:
+        delete_user(user_id)
+    with app.app_context():
+        assert load_user(str(user_id)) is None
+
+def test_authenticated_request_uses_cache():
+    user_id = create_user()
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+        client.get('/api/events')
+        with count_queries() as statements:
+            client.get('/api/events', headers={'If-None-Match': '*'})
+        assert not any('FROM user' in statement for statement in statements)
+    finally:
+        delete_user(user_id)
+
+if __name__ == "__main__":
+    test_loader_is_cached()
+    test_commit_invalidates_identity()
+    test_authenticated_request_uses_cache()
+    print("✓ User loader tests passed")
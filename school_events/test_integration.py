@@ -1,7 +1,7 @@
 """
 Integration test - Actually test the admin functions by calling them
 """
-from app import app, db, User, Event, Registration
+from app import app, db, User, Event, Registration, password_hasher
 from werkzeug.security import check_password_hash
 
 def test_full_integration():
@@ -27,7 +27,6 @@ def test_full_integration():
         print("-"*60)
         
         try:
-            from werkzeug.security import generate_password_hash
             import random
             from datetime import timedelta, datetime
             
@@ -55,7 +54,7 @@ def test_full_integration():
             # Create sample student
             test_student = User(
                 username="testuser123",
-                password_hash=generate_password_hash('test123'),
+                password_hash=password_hasher.hash('test123'),
                 name="Test User",
                 is_admin=False
             )
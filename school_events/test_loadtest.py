@@ -0,0 +1,100 @@
+"""
+Tests for the load test harness
+"""
+import json
+import os
+import shutil
+import tempfile
+import loadtest
+from loadtest import Recorder, percentile, summarize
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+def test_summarize():
+    """5xx responses and connection failures are errors, 4xx answers are not"""
+    recorder = Recorder()
+    for latency in (0.01, 0.02, 0.03):
+        recorder.record('GET /api/events', 200, latency)
+    recorder.record('POST /login', 302, 0.1)
+    recorder.record('POST /login', 503, 0.001)
+    recorder.record('POST /api/events/:id/register', 409, 0.005)
+    recorder.record('POST /api/events/:id/register', None, 0.5, error='ConnectionResetError')
+    report = summarize(recorder, 2.0)
+
+    assert report['requests'] == 7
+    assert report['errors'] == 2
+    events = report['endpoints']['GET /api/events']
+    assert events['throughput'] == 1.5
+    assert events['latency_ms']['p50'] == 20.0
+    assert report['endpoints']['POST /login']['statuses'] == {'302': 1, '503': 1}
+    register = report['endpoints']['POST /api/events/:id/register']
+    assert register['error_rate'] == 0.5
+    assert register['exceptions'] == {'ConnectionResetError': 1}
+
+def test_short_run():
+    """A short poll run against a real app process saves a report without errors"""
+    fd, output = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        status = loadtest.main(['--scenario', 'poll', '--clients', '3', '--duration', '1.5', '--students', '20',
+                                '--events', '5', '--admins', '1', '--hash-profile', 'fast', '--output', output])
+        with open(output) as f:
+            saved = json.load(f)
+    finally:
+        os.remove(output)
+    assert status == 0
+    assert saved['config']['scenario'] == 'poll'
+    endpoints = saved['results']['endpoints']
+    assert endpoints['POST /login']['statuses'] == {'302': 3}
+    assert endpoints['GET /api/events']['requests'] > 0
+
+def test_external_app_on_seeded_database():
+    """--seed-only keeps the database, an app started on it is driven with --url using its ids"""
+    directory = tempfile.mkdtemp()
+    database, output = os.path.join(directory, 'seeded.db'), os.path.join(directory, 'report.json')
+    process = None
+    try:
+        assert loadtest.main(['--seed-only', '--database', database, '--students', '20', '--events', '5',
+                              '--admins', '1', '--capacity', '3', '--hash-profile', 'fast']) == 0
+        assert os.path.exists(database)
+        port = loadtest.free_port()
+        process = loadtest.start_server(database, port, 'fast')
+        status = loadtest.main(['--url', f'http://127.0.0.1:{port}', '--database', database, '--scenario', 'rush',
+                                '--clients', '3', '--duration', '1', '--output', output])
+        with open(output) as f:
+            endpoints = json.load(f)['results']['endpoints']
+    finally:
+        if process is not None:
+            loadtest.stop_server(process)
+        shutil.rmtree(directory)
+    assert status == 0
+    try:
+        os.killpg(process.pid, 0)
+        assert False, "processes of the app outlived it"
+    except ProcessLookupError:
+        pass
+    assert endpoints['POST /login']['statuses'] == {'302': 3}
+    # The rush event id came from the database the app runs on, so registering finds it
+    assert set(endpoints['POST /api/events/:id/register']['statuses']) <= {'201', '409'}
+
+def test_admin_scenarios_need_admins():
+    for argv in (['--scenario', 'attendance', '--admins', '0'], ['--url', 'http://127.0.0.1:1']):
+        try:
+            loadtest.main(argv)
+            assert False, f"{argv} accepted"
+        except SystemExit as exit:
+            assert exit.code == 2
+
+if __name__ == "__main__":
+    test_percentile()
+    test_summarize()
+    test_short_run()
+    test_external_app_on_seeded_database()
+    test_admin_scenarios_need_admins()
+    print("✓ Load test harness tests passed")
@@ -0,0 +1,152 @@
+"""
+Tests for the bitset attendance matrix behind /api/matrix
+"""
+import base64
+import json
+from datetime import datetime
+from app import app, db, User, Event, Registration
+from matrix import AttendanceMatrix
+
+def bit(bitset, i):
+    return bool(bitset[i >> 3] & (1 << (i & 7)))
+
+def test_matrix_from_rows():
+    """Cells are bit row * events + column of the two bitsets, unknown ids are skipped"""
+    matrix = AttendanceMatrix.from_rows([1, 2], [10, 11, 12], [
+        (1, '10,11', '10'),
+        (2, '12,99', None),
+        (3, '10', '10'),
+    ])
+
+    assert len(matrix) == 3
+    assert matrix.cell(1, 10) == (True, True)
+    assert matrix.cell(1, 11) == (True, False)
+    assert matrix.cell(2, 12) == (True, False)
+    assert matrix.cell(2, 10) == (False, False)
+    assert matrix.cell(3, 10) == (False, False)
+
+    encoded = matrix.encode()
+    registered = base64.b64decode(encoded['registered'])
+    attended = base64.b64decode(encoded['attended'])
+    assert len(registered) == 1  # 6 cells fit in one byte
+    assert [bit(registered, i) for i in range(6)] == [True, True, False, False, False, True]
+    assert [bit(attended, i) for i in range(6)] == [True, False, False, False, False, False]
+
+def test_matrix_payload_size():
+    """A 2,000 x 300 grid is tens of kilobytes, however many cells are registered"""
+    students, events = list(range(2000)), list(range(300))
+    rows = [(s, ','.join(str(e) for e in events if (s + e) % 2 == 0),
+             ','.join(str(e) for e in events if (s + e) % 6 == 0)) for s in students]
+    matrix = AttendanceMatrix.from_rows(students, events, rows)
+
+    assert len(matrix) == 300000
+    payload = json.dumps(matrix.encode())
+    assert len(payload) < 250 * 1024
+
+def test_api_matrix():
+    """/api/matrix decodes to the registrations in the database; only admins can edit and look up ids"""
+    with app.app_context():
+        student = User.query.filter_by(is_admin=False).first()
+        admin = User.query.filter_by(is_admin=True).first()
+        if student is None or admin is None:
+            print("No students or admins in the database, skipping")
+            return
+        expected = {(r.user_id, r.event_id): bool(r.attended) for r in Registration.query.filter_by(status='confirmed')}
+        student_id, admin_id = student.id, admin.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+
+    response = client.get('/api/matrix')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['can_edit'] is False
+    assert len(data['events']['ids']) == len(data['events']['names']) == len(data['events']['dates'])
+    assert len(data['students']['ids']) == len(data['students']['names'])
+    assert admin_id not in data['students']['ids']
+
+    registered = base64.b64decode(data['registered'])
+    attended = base64.b64decode(data['attended'])
+    columns = len(data['events']['ids'])
+    found = {}
+    for row, user_id in enumerate(data['students']['ids']):
+        for column, event_id in enumerate(data['events']['ids']):
+            if bit(registered, row * columns + column):
+                found[(user_id, event_id)] = bit(attended, row * columns + column)
+    assert found == {key: value for key, value in expected.items() if key[0] in data['students']['ids']}
+
+    assert client.get('/api/matrix', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get(f'/api/matrix/registration?student={student_id}&event=1').status_code == 403
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+    assert client.get('/api/matrix').get_json()['can_edit'] is True
+    if found:
+        (user_id, event_id), is_attended = next(iter(found.items()))
+        lookup = client.get(f'/api/matrix/registration?student={user_id}&event={event_id}').get_json()
+        with app.app_context():
+            registration = Registration.query.filter_by(user_id=user_id, event_id=event_id).one()
+            assert lookup == {'registration_id': registration.id, 'attended': is_attended}
+    assert client.get('/api/matrix/registration?student=0&event=0').status_code == 404
+
+def test_api_matrix_leaves_out_waitlisted():
+    """A waitlisted registration is no cell of the matrix and its id cannot be looked up"""
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        if admin is None:
+            print("No admins in the database, skipping")
+            return
+        admin_id = admin.id
+        student = User(username='matrix_waitlist', name='Matrix Waitlist', password_hash='x')
+        event = Event(name='Matrix waitlist test', date=datetime(2030, 6, 1, 10, 0), description='Test', capacity=0)
+        db.session.add_all([student, event])
+        db.session.commit()
+        db.session.add(Registration(user_id=student.id, event_id=event.id, attended=True, status='waitlisted'))
+        db.session.commit()
+        student_id, event_id = student.id, event.id
+
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+        data = client.get('/api/matrix').get_json()
+        row, column = data['students']['ids'].index(student_id), data['events']['ids'].index(event_id)
+        index = row * len(data['events']['ids']) + column
+        assert not bit(base64.b64decode(data['registered']), index)
+        assert not bit(base64.b64decode(data['attended']), index)
+        assert client.get(f'/api/matrix/registration?student={student_id}&event={event_id}').status_code == 404
+    finally:
+        with app.app_context():
+            # Deleted through the session, so the cached login identities are dropped too
+            Registration.query.filter_by(user_id=student_id).delete()
+            db.session.delete(db.session.get(User, student_id))
+            db.session.delete(db.session.get(Event, event_id))
+            db.session.commit()
+
+def test_students_page_leaves_matrix_to_react():
+    """/students no longer renders a table cell per student and event"""
+    with app.app_context():
+        student = User.query.filter_by(is_admin=False).first()
+        if student is None:
+            print("No students in the database, skipping")
+            return
+        student_id = student.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+
+    response = client.get('/students')
+    assert response.status_code == 200
+    assert b'students-react-root' in response.data
+    assert b'attendance-grid-react.js' in response.data
+    assert b'status-cell' not in response.data
+
+if __name__ == "__main__":
+    test_matrix_from_rows()
+    test_matrix_payload_size()
+    test_api_matrix()
+    test_api_matrix_leaves_out_waitlisted()
+    test_students_page_leaves_matrix_to_react()
+    print("✓ Matrix tests passed")
@@ -0,0 +1,130 @@
+"""
+Tests for the Prometheus metrics endpoint
+"""
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app import app, db, User, password_hasher
+from metrics import Metrics, metered_pool_class, pool_families
+
+def test_render_histogram_and_labels():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    for duration in (0.05, 0.5, 5.0):
+        metrics.request_started()
+        metrics.request_finished('GET', '/event/<int:event_id>', '200', duration)
+    metrics.add_collector(lambda: [('odd_label', 'gauge', 'Escaping', [({'name': 'say "hi"\\n'}, 1.0)])])
+    text = metrics.render()
+
+    assert 'http_requests_total{method="GET",route="/event/<int:event_id>",status="200"} 3' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/event/<int:event_id>",le="0.1"} 1' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/event/<int:event_id>",le="1.0"} 2' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/event/<int:event_id>",le="+Inf"} 3' in text
+    assert 'http_request_duration_seconds_sum{method="GET",route="/event/<int:event_id>"} 5.55' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/event/<int:event_id>"} 3' in text
+    assert 'http_requests_in_flight 0' in text
+    assert 'odd_label{name="say \\"hi\\"\\\\n"} 1' in text
+
+def test_concurrent_recording():
+    metrics = Metrics()
+
+    def work():
+        for _ in range(1000):
+            metrics.request_started()
+            metrics.request_finished('GET', '/', '200', 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests, latency, totals = metrics.snapshot()
+    assert requests[('GET', '/', '200')] == 8000
+    assert latency[('GET', '/')][0] == 8000
+    assert totals['in_flight'] == 0
+
+def test_pool_waits_and_timeouts():
+    metrics = Metrics()
+    engine = create_engine('sqlite://', poolclass=metered_pool_class(metrics), pool_size=1, max_overflow=0,
+                           pool_timeout=0.1)
+    try:
+        held = engine.connect()
+        try:
+            engine.connect()
+        except PoolTimeoutError:
+            pass
+        else:
+            raise AssertionError("the second checkout must time out")
+        gauges = {name: samples[0][1] for name, _, _, samples in pool_families(engine.pool)}
+        assert gauges['db_pool_checked_out'] == 1
+        held.close()
+    finally:
+        engine.dispose()
+    _, _, totals = metrics.snapshot()
+    assert totals['checkouts'] == 2
+    assert totals['checkout_waits'] == 1  # the first opened a connection, only the second had to wait
+    assert totals['checkout_timeouts'] == 1
+    assert totals['checkout_wait_seconds'] >= 0.1
+
+def test_pool_warm_up_is_no_wait():
+    """Opening connections while the pool is below its limit does not count as waiting"""
+    metrics = Metrics()
+    engine = create_engine('sqlite://', poolclass=metered_pool_class(metrics), pool_size=2, max_overflow=1)
+    try:
+        connections = [engine.connect() for _ in range(3)]
+        for connection in connections:
+            connection.close()
+        engine.connect().close()
+    finally:
+        engine.dispose()
+    _, _, totals = metrics.snapshot()
+    assert totals['checkouts'] == 4
+    assert totals['checkout_waits'] == 0
+
+def test_metrics_endpoint_access():
+    with app.app_context():
+        student = User(username='metrics_student', password_hash=password_hasher.hash('test123'))
+        admin = User(username='metrics_admin', password_hash=password_hasher.hash('test123'), is_admin=True)
+        db.session.add_all([student, admin])
+        db.session.commit()
+        student_id, admin_id = student.id, admin.id
+    try:
+        assert app.test_client().get('/admin/metrics').status_code == 302
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(student_id)
+        assert client.get('/admin/metrics').status_code == 403
+
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+        client.get('/api/events')
+        response = client.get('/admin/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        text = response.get_data(as_text=True)
+        for name in ('http_requests_total{method="GET",route="/api/events",status="200"}',
+                     'http_requests_in_flight 1', 'db_pool_checked_out', 'cache_hits_total{cache="response"}',
+                     'cache_hit_ratio{cache="user"}', 'password_pool_pending 0', 'password_pool_rejected_total'):
+            assert name in text, name
+
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        try:
+            scraper = app.test_client()
+            assert scraper.get('/admin/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+            assert scraper.get('/admin/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 302
+        finally:
+            app.config['METRICS_TOKEN'] = None
+    finally:
+        with app.app_context():
+            # Through the session, so the cached identities of the reused ids are dropped
+            for user in User.query.filter(User.username.in_(['metrics_student', 'metrics_admin'])):
+                db.session.delete(user)
+            db.session.commit()
+
+if __name__ == "__main__":
+    test_render_histogram_and_labels()
+    test_concurrent_recording()
+    test_pool_waits_and_timeouts()
+    test_pool_warm_up_is_no_wait()
+    test_metrics_endpoint_access()
+    print("✓ Metrics tests passed")
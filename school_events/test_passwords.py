@@ -0,0 +1,153 @@
+"""
+Tests for password hash profiles and batch hashing
+"""
+import os
+import socket
+import threading
+import time
+from werkzeug.security import check_password_hash, generate_password_hash
+import app as app_module
+from app import app, db, User
+from passwords import (PasswordHasher, PasswordPool, PasswordPoolBusy, HASH_PROFILES,
+                       PARALLEL_THRESHOLD, create_hasher)
+
+def occupied_pool(seconds):
+    """Inline pool with a single slot, held by a background job for `seconds`"""
+    pool = PasswordPool(PasswordHasher(HASH_PROFILES['fast']), workers=0, max_pending=1, retry_after=7)
+    thread = threading.Thread(target=pool.run, args=(time.sleep, seconds))
+    thread.start()
+    while pool.pending == 0:
+        time.sleep(0.001)
+    return pool, thread
+
+def test_hash_many_hashes_each_password_once():
+    hasher = PasswordHasher(HASH_PROFILES['fast'])
+    hashes = hasher.hash_many(['student123'] * 50 + ['other'])
+    assert len(set(hashes)) == 2
+    assert check_password_hash(hashes[0], 'student123')
+    assert check_password_hash(hashes[-1], 'other')
+
+def test_hash_many_in_process_pool():
+    """Many distinct passwords go through worker processes and keep their order"""
+    passwords = [f"password{i}" for i in range(PARALLEL_THRESHOLD * 2)]
+    hashes = PasswordHasher(HASH_PROFILES['fast'], processes=2).hash_many(passwords)
+    assert len(hashes) == len(passwords)
+    assert all(check_password_hash(h, p) for h, p in zip(hashes, passwords))
+
+def test_profiles():
+    assert create_hasher({}).method == HASH_PROFILES['strong']
+    fast = create_hasher({'PASSWORD_HASH_PROFILE': 'fast'})
+    assert fast.hash('secret').startswith('pbkdf2:sha256:1000$')
+    try:
+        create_hasher({'PASSWORD_HASH_PROFILE': 'plain'})
+        assert False, "unknown profile accepted"
+    except ValueError:
+        pass
+
+def test_pool_sheds_load():
+    pool, thread = occupied_pool(0.3)
+    try:
+        pool.hash('secret')
+        assert False, "job queued beyond max_pending"
+    except PasswordPoolBusy as busy:
+        assert busy.retry_after == 7
+    thread.join()
+    assert pool.pending == 0 and pool.rejected == 1
+    assert pool.verify(pool.hash('secret'), 'secret')
+
+def test_pool_max_pending_zero():
+    """An explicit max_pending of 0 is kept, not replaced by the default"""
+    pool = PasswordPool(PasswordHasher(HASH_PROFILES['fast']), workers=0, max_pending=0)
+    try:
+        pool.hash('secret')
+        assert False, "job accepted with max_pending=0"
+    except PasswordPoolBusy:
+        pass
+
+def test_pool_worker_processes():
+    """Workers are spawned, so they do not hold the server's listening socket"""
+    pool = PasswordPool(PasswordHasher(HASH_PROFILES['fast']), workers=1)
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        try:
+            password_hash = pool.hash('secret')
+            assert pool.verify(password_hash, 'secret')
+            assert not pool.verify(password_hash, 'wrong')
+            try:
+                pool.run(os.fstat, listener.fileno())
+                assert False, "worker inherited the listening socket"
+            except OSError:
+                pass
+        finally:
+            pool.shutdown()
+
+def test_login_busy_returns_503():
+    with app.app_context():
+        user = User.query.first()
+        if user is None:
+            return
+        username = user.username
+    original = app_module.password_pool
+    app_module.password_pool, thread = occupied_pool(0.5)
+    try:
+        response = app.test_client().post('/login', data={'username': username, 'password': 'wrong'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '7'
+    finally:
+        thread.join()
+        app_module.password_pool = original
+
+def test_needs_rehash_only_upgrades():
+    strong_hash = generate_password_hash('secret', method=HASH_PROFILES['strong'])
+    fast_hash = generate_password_hash('secret', method=HASH_PROFILES['fast'])
+    strong = PasswordPool(PasswordHasher(HASH_PROFILES['strong']), workers=0)
+    fast = PasswordPool(PasswordHasher(HASH_PROFILES['fast']), workers=0)
+    assert strong.needs_rehash(fast_hash)
+    assert not strong.needs_rehash(strong_hash)
+    assert not fast.needs_rehash(strong_hash)
+    assert not fast.needs_rehash(generate_password_hash('secret', method='pbkdf2:sha256:500'))
+
+def login_with_profile(profile, password_hash):
+    """Log a new user in with password 'test123' under profile, return the stored hash afterwards"""
+    with app.app_context():
+        user = User(username='rehash_test_user', name='Rehash Test', password_hash=password_hash)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    original = app_module.password_pool
+    app_module.password_pool = PasswordPool(PasswordHasher(HASH_PROFILES[profile]), workers=0)
+    try:
+        response = app.test_client().post('/login', data={'username': 'rehash_test_user', 'password': 'test123'})
+        assert response.status_code == 302
+        with app.app_context():
+            return db.session.get(User, user_id).password_hash
+    finally:
+        app_module.password_pool = original
+        with app.app_context():
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+def test_login_rehashes_outdated_hash():
+    """A hash made with other parameters is replaced by the strong profile on login"""
+    password_hash = login_with_profile('strong', generate_password_hash('test123', method='pbkdf2:sha256:500'))
+    assert password_hash.startswith(HASH_PROFILES['strong'] + '$')
+    assert check_password_hash(password_hash, 'test123')
+
+def test_fast_profile_keeps_strong_hash():
+    """Logging in on a server with the fast profile never weakens a stored strong hash"""
+    strong_hash = generate_password_hash('test123', method=HASH_PROFILES['strong'])
+    assert login_with_profile('fast', strong_hash) == strong_hash
+
+if __name__ == "__main__":
+    test_hash_many_hashes_each_password_once()
+    test_hash_many_in_process_pool()
+    test_profiles()
+    test_pool_sheds_load()
+    test_pool_max_pending_zero()
+    test_pool_worker_processes()
+    test_login_busy_returns_503()
+    test_needs_rehash_only_upgrades()
+    test_login_rehashes_outdated_hash()
+    test_fast_profile_keeps_strong_hash()
+    print("✓ Password hashing tests passed")
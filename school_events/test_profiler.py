@@ -0,0 +1,87 @@
+"""
+Tests for the on-demand request profiler
+"""
+import os
+import pstats
+import shutil
+import tempfile
+import time
+from app import app, db, User, password_hasher
+from profiler import RequestProfile
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_request_profile_samples_stacks():
+    directory = tempfile.mkdtemp()
+    try:
+        profile = RequestProfile(interval=0.001)
+        profile.start()
+        busy_loop(0.1)
+        profile.stop()
+        name = profile.save(directory, 'GET /students?x=1', keep=5)
+
+        assert name.endswith('GET_students_x_1')
+        assert any('busy_loop' in stack for stack in profile.samples)
+        with open(os.path.join(directory, name + '.collapsed')) as f:
+            lines = f.read().splitlines()
+        assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        stats = pstats.Stats(os.path.join(directory, name + '.prof'))
+        assert any(function[2] == 'busy_loop' for function in stats.stats)
+        with open(os.path.join(directory, name + '.txt')) as f:
+            assert 'cumulative' in f.read()
+    finally:
+        shutil.rmtree(directory)
+
+def test_profile_switch_admin_only_with_retention():
+    directory = tempfile.mkdtemp()
+    app.config['PROFILER_DIRECTORY'] = directory
+    app.config['PROFILER_MAX_PROFILES'] = 2
+    with app.app_context():
+        student = User(username='profiler_student', password_hash=password_hasher.hash('test123'))
+        admin = User(username='profiler_admin', password_hash=password_hasher.hash('test123'), is_admin=True)
+        db.session.add_all([student, admin])
+        db.session.commit()
+        student_id, admin_id = student.id, admin.id
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(student_id)
+        response = client.get('/students?_profile=1')
+        assert response.status_code == 200 and 'X-Profile-Id' not in response.headers
+        assert os.listdir(directory) == []
+        assert client.get('/admin/profiles/anything.prof').status_code == 403
+
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+        assert 'X-Profile-Id' not in client.get('/students').headers
+
+        names = []
+        for path in ('/students?_profile=1', '/admin/registrations?_profile=1', '/admin/events'):
+            headers = {'X-Profile': '1'} if path == '/admin/events' else {}
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200
+            names.append(response.headers['X-Profile-Id'])
+        assert 'GET_admin_registrations_profile_1' in names[1]
+
+        # Only the two newest profiles are kept, three files each
+        assert sorted(os.listdir(directory)) == sorted(name + extension for name in names[1:]
+                                                       for extension in ('.prof', '.txt', '.collapsed'))
+        download = client.get(f'/admin/profiles/{names[2]}.collapsed')
+        assert download.status_code == 200
+        assert 'attachment' in download.headers['Content-Disposition']
+    finally:
+        app.config['PROFILER_DIRECTORY'] = None
+        app.config['PROFILER_MAX_PROFILES'] = 50
+        shutil.rmtree(directory)
+        with app.app_context():
+            for user in User.query.filter(User.username.in_(['profiler_student', 'profiler_admin'])):
+                db.session.delete(user)
+            db.session.commit()
+
+if __name__ == "__main__":
+    test_request_profile_samples_stacks()
+    test_profile_switch_admin_only_with_retention()
+    print("✓ Profiler tests passed")
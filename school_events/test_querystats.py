@@ -0,0 +1,109 @@
+"""
+Tests for the per-request query statistics and the query budgets of the hot routes
+"""
+import logging
+from datetime import datetime, timedelta
+from app import app, db, User, Event, Registration, response_cache, password_hasher
+from querystats import assert_max_queries
+
+STUDENTS = 12
+
+def create_data():
+    """An admin, an event and more registered students than any budget below, returns their ids"""
+    with app.app_context():
+        admin = User(username='querystats_admin', password_hash=password_hasher.hash('test123'), is_admin=True)
+        students = [User(username=f'querystats_student{i}', name=f'Query Student {i}',
+                         password_hash=password_hasher.hash('test123')) for i in range(STUDENTS)]
+        event = Event(name='Query Stats Event', date=datetime.now() + timedelta(days=10),
+                      description='Query budget test', capacity=STUDENTS - 2)
+        db.session.add_all([admin, event, *students])
+        db.session.flush()
+        for i, student in enumerate(students):
+            db.session.add(Registration(user_id=student.id, event_id=event.id,
+                                        status='confirmed' if i < STUDENTS - 2 else 'waitlisted'))
+        db.session.commit()
+        return admin.id, students[0].id, event.id
+
+def delete_data():
+    with app.app_context():
+        Event.query.filter_by(name='Query Stats Event').delete()
+        Registration.query.filter(Registration.user_id.in_(
+            db.session.query(User.id).filter(User.username.like('querystats_%'))
+        )).delete(synchronize_session=False)
+        # Through the session, so the cached identities of the reused ids are dropped
+        for user in User.query.filter(User.username.like('querystats_%')):
+            db.session.delete(user)
+        db.session.commit()
+
+def logged_in(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+def test_route_query_budgets():
+    """The number of queries per route does not grow with the number of events or registrations"""
+    admin_id, student_id, event_id = create_data()
+    try:
+        admin, student = logged_in(admin_id), logged_in(student_id)
+        budgets = [
+            (app.test_client(), '/', 3),
+            (student, '/', 3),
+            (student, '/students', 1),
+            (student, '/api/matrix', 4),
+            (student, '/api/events', 6),
+            (admin, '/api/students', 4),
+            (admin, '/admin/registrations', 3),
+            (admin, '/admin/events', 3),
+            (student, f'/event/{event_id}', 4),
+            (admin, f'/admin/events/{event_id}/edit', 2),
+        ]
+        for client, path, budget in budgets:
+            response_cache.clear()
+            response = assert_max_queries(client, path, budget)
+            assert response.status_code == 200, path
+
+        response_cache.clear()
+        page = assert_max_queries(admin, '/admin/events', 3).get_data(as_text=True)
+        assert f'{STUDENTS - 2} studentů (2 čeká)' in page
+        page = assert_max_queries(admin, f'/admin/events/{event_id}/edit', 2).get_data(as_text=True)
+        assert 'Query Student 11' in page
+    finally:
+        delete_data()
+
+def test_assert_max_queries_reports_statements():
+    client = app.test_client()
+    response_cache.clear()
+    try:
+        assert_max_queries(client, '/', 0)
+    except AssertionError as e:
+        assert 'GET / ran' in str(e) and 'SELECT' in str(e)
+    else:
+        raise AssertionError("a zero budget must fail")
+
+def test_headers_and_slow_query_log():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    app.logger.addHandler(handler)
+    app.config['QUERY_STATS_HEADERS'] = True
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    try:
+        response_cache.clear()
+        response = app.test_client().get('/')
+    finally:
+        app.config['QUERY_STATS_HEADERS'] = False
+        app.config['SLOW_QUERY_THRESHOLD_MS'] = 100
+        app.logger.removeHandler(handler)
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert response.headers['X-Query-Time'].endswith('ms')
+    assert records and all('in GET /:' in record.getMessage() for record in records)
+
+    response = app.test_client().get('/')
+    assert 'X-Query-Count' not in response.headers
+
+if __name__ == "__main__":
+    test_route_query_budgets()
+    test_assert_max_queries_reports_statements()
+    test_headers_and_slow_query_log()
+    print("✓ Query statistics tests passed")
@@ -0,0 +1,55 @@
+"""
+Tests for event registration through the web routes
+"""
+from datetime import datetime
+from app import app, db, User, Event, Registration, password_hasher
+
+def create_test_data():
+    """Create a throwaway student and event, returns their ids"""
+    with app.app_context():
+        student = User(
+            username="registrationtest",
+            password_hash=password_hasher.hash('test123'),
+            name="Registration Test",
+            is_admin=False
+        )
+        event = Event(
+            name="Registration Test Event",
+            date=datetime(2030, 1, 1, 10, 0),
+            description="Test event"
+        )
+        db.session.add_all([student, event])
+        db.session.commit()
+        return student.id, event.id
+
+def delete_test_data(student_id, event_id):
+    with app.app_context():
+        Registration.query.filter_by(user_id=student_id).delete()
+        db.session.delete(db.session.get(Event, event_id))
+        db.session.delete(db.session.get(User, student_id))
+        db.session.commit()
+
+def login_client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+def test_register_twice_creates_one_registration():
+    """The unique (user_id, event_id) index turns a repeated registration into a no-op"""
+    student_id, event_id = create_test_data()
+    try:
+        client = login_client(student_id)
+        first = client.get(f'/event/{event_id}/register', follow_redirects=True)
+        second = client.get(f'/event/{event_id}/register', follow_redirects=True)
+
+        assert b'Successfully registered' in first.data
+        assert b'already registered' in second.data
+        with app.app_context():
+            assert Registration.query.filter_by(user_id=student_id, event_id=event_id).count() == 1
+    finally:
+        delete_test_data(student_id, event_id)
+
+if __name__ == "__main__":
+    test_register_twice_creates_one_registration()
+    print("✓ Registration tests passed")
@@ -0,0 +1,109 @@
+"""
+Tests for the full-text search index over students and events
+"""
+from datetime import datetime
+from app import app, db, User, Event, Registration
+from search import match_query, ensure_search_index, search_users
+from werkzeug.security import generate_password_hash
+
+def login_admin():
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        admin_id = admin.id if admin else None
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+    return client, admin_id
+
+def test_match_query():
+    """User input is quoted word by word, so FTS syntax is matched literally"""
+    assert match_query('Novotná') == '"Novotná"*'
+    assert match_query('anna nov', prefix=False) == '"anna" "nov"'
+    assert match_query('" OR 1=1 --') == '"OR"* "1"* "1"*'
+    assert match_query('ski', columns=['name']) == '{name} : ("ski"*)'
+    assert match_query('  -- ') is None
+
+def test_search_folds_diacritics_and_follows_updates():
+    """Names typed without diacritics match, and the index follows inserts, updates and deletes"""
+    with app.app_context():
+        ensure_search_index(db.engine)
+        student = User(
+            username="searchtest",
+            password_hash=generate_password_hash('test123'),
+            name="Žofie Přílišová",
+            is_admin=False
+        )
+        db.session.add(student)
+        db.session.commit()
+        try:
+            assert student.id in dict(search_users(db.session, match_query('zofie prilis'), 10))
+
+            student.name = "Zdeňka Nováčková"
+            db.session.commit()
+            assert student.id not in dict(search_users(db.session, match_query('zofie'), 10))
+            assert student.id in dict(search_users(db.session, match_query('novackova'), 10))
+        finally:
+            student_id = student.id
+            db.session.delete(student)
+            db.session.commit()
+        assert student_id not in dict(search_users(db.session, match_query('novackova'), 10))
+
+def test_admin_registrations_filter_uses_index():
+    """The admin filter finds registrations by the student's name without diacritics"""
+    client, admin_id = login_admin()
+    if admin_id is None:
+        return
+    with app.app_context():
+        student = User(username="filtertest", password_hash='x', name="Řehoř Šťastný", is_admin=False)
+        event = Event(name="Filtr test", date=datetime(2030, 1, 1, 10, 0), description="Test")
+        db.session.add_all([student, event])
+        db.session.commit()
+        db.session.add(Registration(user_id=student.id, event_id=event.id))
+        db.session.commit()
+        student_id, event_id = student.id, event.id
+
+    try:
+        response = client.get('/admin/registrations?query=rehor+stastny')
+        assert 'Řehoř Šťastný'.encode() in response.data
+
+        results = client.get('/api/search?q=stastn').get_json()
+        assert student_id in [s['id'] for s in results['students']]
+        results = client.get('/api/search?q=filtr').get_json()
+        assert event_id in [e['id'] for e in results['events']]
+    finally:
+        with app.app_context():
+            Registration.query.filter_by(user_id=student_id).delete()
+            db.session.delete(db.session.get(Event, event_id))
+            db.session.delete(db.session.get(User, student_id))
+            db.session.commit()
+
+def test_events_search_api():
+    """Prefix, diacritic-insensitive event search with name matches ranked first"""
+    with app.app_context():
+        in_name = Event(name="Lyžařský výcvik", date=datetime(2030, 2, 1, 8, 0), description="Týden na horách")
+        in_description = Event(name="Zimní pobyt", date=datetime(2030, 2, 2, 8, 0), description="Kurz lyžování pro začátečníky")
+        db.session.add_all([in_name, in_description])
+        db.session.commit()
+        ids = [in_name.id, in_description.id]
+
+    try:
+        client = app.test_client()
+        data = client.get('/api/events/search?q=lyz').get_json()
+        found = [event['id'] for event in data['current'] if event['id'] in ids]
+        assert found == ids
+        assert set(data['current'][0]) == {'id', 'title', 'description', 'date', 'max_students', 'registered_count',
+                                           'waitlist_count', 'is_registered', 'is_waitlisted'}
+
+        empty = client.get('/api/events/search?q=').get_json()
+        assert empty['current'] == [] and empty['previous'] == []
+    finally:
+        with app.app_context():
+            Event.query.filter(Event.id.in_(ids)).delete()
+            db.session.commit()
+
+if __name__ == "__main__":
+    test_match_query()
+    test_search_folds_diacritics_and_follows_updates()
+    test_admin_registrations_filter_uses_index()
+    test_events_search_api()
+    print("✓ Search tests passed")
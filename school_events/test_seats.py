@@ -0,0 +1,135 @@
+"""
+Tests for event capacity and the waitlist
+"""
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime
+from sqlalchemy import text
+from app import app, db, User, Event, Registration, password_hasher
+from passwords import PasswordHasher, HASH_PROFILES
+import seats
+import seeding
+
+def create_event_with_students(capacity, students):
+    """Create an event with the given capacity and throwaway students, returns (event_id, [student_ids])"""
+    with app.app_context():
+        event = Event(name="Capacity Test Event", date=datetime(2030, 2, 1, 9, 0),
+                      description="Test event", capacity=capacity)
+        users = [User(username=f"capacitytest{i}", name=f"Capacity Test {i}",
+                      password_hash=password_hasher.hash('test123')) for i in range(students)]
+        db.session.add(event)
+        db.session.add_all(users)
+        db.session.commit()
+        return event.id, [user.id for user in users]
+
+def delete_test_data(event_id, student_ids):
+    with app.app_context():
+        Registration.query.filter_by(event_id=event_id).delete()
+        db.session.delete(db.session.get(Event, event_id))
+        User.query.filter(User.id.in_(student_ids)).delete()
+        db.session.commit()
+
+def login_client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+def statuses(event_id):
+    with app.app_context():
+        rows = Registration.query.filter_by(event_id=event_id).order_by(Registration.id).all()
+        return [(r.user_id, r.status) for r in rows]
+
+def test_waitlist_and_promotion():
+    event_id, students = create_event_with_students(capacity=2, students=4)
+    try:
+        responses = [login_client(s).post(f'/api/events/{event_id}/register') for s in students]
+        assert [r.status_code for r in responses] == [201] * 4
+        assert [r.get_json()['status'] for r in responses] == ['confirmed', 'confirmed', 'waitlisted', 'waitlisted']
+        assert [r.get_json()['waitlist_position'] for r in responses] == [None, None, 1, 2]
+        assert login_client(students[0]).post(f'/api/events/{event_id}/register').status_code == 409
+
+        # A freed seat goes to the first student on the waitlist
+        response = login_client(students[1]).post(f'/api/events/{event_id}/unregister')
+        assert response.get_json()['registered_count'] == 2
+        assert statuses(event_id) == [(students[0], 'confirmed'), (students[2], 'confirmed'), (students[3], 'waitlisted')]
+
+        # Raising the capacity promotes the rest
+        admin_id = None
+        with app.app_context():
+            admin = User.query.filter_by(is_admin=True).first()
+            admin_id = admin and admin.id
+        if admin_id:
+            login_client(admin_id).post(f'/admin/events/{event_id}/edit', data={
+                'name': "Capacity Test Event", 'date': '2030-02-01T09:00',
+                'description': "Test event", 'capacity': '5'
+            })
+            assert [status for _, status in statuses(event_id)] == ['confirmed'] * 3
+    finally:
+        delete_test_data(event_id, students)
+
+def test_api_exposes_capacity():
+    event_id, students = create_event_with_students(capacity=1, students=2)
+    try:
+        for student_id in students:
+            login_client(student_id).post(f'/api/events/{event_id}/register')
+        data = login_client(students[1]).get('/api/events?limit=200').get_json()
+        event = next(e for e in data['current'] if e['id'] == event_id)
+        assert event['max_students'] == 1
+        assert event['registered_count'] == 1 and event['waitlist_count'] == 1
+        assert event['is_registered'] and event['is_waitlisted']
+    finally:
+        delete_test_data(event_id, students)
+
+def test_concurrent_registrations_do_not_overbook():
+    """200 students racing for 25 seats: no lock errors, exactly 25 confirmed, waitlist in arrival order"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = seeding.open_engine(f'sqlite:///{path}', reset=True)
+    try:
+        stats = seeding.SeedStats()
+        with engine.begin() as conn:
+            [event_id] = seeding.insert_events(conn, [("Lyžařský kurz", datetime(2030, 1, 10, 8, 0), "Test")], stats)
+            conn.execute(text("UPDATE event SET capacity = 25"))
+            students = seeding.insert_students(conn, [(f"skier{i}", f"Skier {i}") for i in range(200)], stats,
+                                               PasswordHasher(HASH_PROFILES['fast']))
+        random.shuffle(students)
+        errors = []
+        start = threading.Barrier(20)
+
+        def register(chunk):
+            start.wait()
+            for user_id in chunk:
+                try:
+                    with engine.begin() as conn:
+                        seats.reserve_seat(conn, user_id, event_id)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=register, args=(students[i::20],)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT status, COUNT(*) FROM registration GROUP BY status")).all()
+            assert dict(rows) == {'confirmed': 25, 'waitlisted': 175}
+            # Every confirmed seat was taken before anyone was waitlisted
+            last_confirmed = conn.execute(text("SELECT MAX(id) FROM registration WHERE status = 'confirmed'")).scalar()
+            first_waitlisted = conn.execute(text("SELECT MIN(id) FROM registration WHERE status = 'waitlisted'")).scalar()
+            assert last_confirmed < first_waitlisted
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    test_waitlist_and_promotion()
+    test_api_exposes_capacity()
+    test_concurrent_registrations_do_not_overbook()
+    print("✓ Capacity and waitlist tests passed")
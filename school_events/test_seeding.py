@@ -0,0 +1,137 @@
+"""
+Tests for the bulk seeding engine
+"""
+import os
+import random
+import tempfile
+from datetime import datetime
+from sqlalchemy import text
+from app import app, db, User, Event, Registration
+import seeding
+
+def seeded_database(seed, **options):
+    """Generate a dataset into a fresh temporary database, returns (stats, registrations, users)"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = seeding.open_engine(f'sqlite:///{path}', reset=True)
+    try:
+        with engine.begin() as conn:
+            stats = seeding.generate_dataset(conn, random.Random(seed), base_date=datetime(2025, 10, 1), **options)
+        with engine.connect() as conn:
+            registrations = conn.execute(text(
+                "SELECT r.user_id, r.event_id, r.attended, r.registration_date, e.date "
+                "FROM registration r JOIN event e ON e.id = r.event_id ORDER BY r.id"
+            )).all()
+            users = conn.execute(text("SELECT id, username, name FROM user ORDER BY id")).all()
+        return stats, registrations, users
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+def test_dataset_is_deterministic():
+    """The same seed gives the same rows, a different seed different ones"""
+    first = seeded_database(7, students=60, events=20)
+    second = seeded_database(7, students=60, events=20)
+    other = seeded_database(8, students=60, events=20)
+    assert first[1:] == second[1:]
+    assert first[1] != other[1]
+
+def test_dataset_shape():
+    stats, registrations, users = seeded_database(1, students=200, events=30, registration_rate=0.5)
+    assert stats.rows['students'] == 200 and stats.rows['events'] == 30
+    assert stats.rows['registrations'] == len(registrations)
+    # 6000 pairs at 50% are far from the edges
+    assert 2500 < len(registrations) < 3500
+    assert len({username for _, username, _ in users}) == len(users)
+    # Only events that already happened have attendance
+    assert all(event_date < '2025-10-01' for _, _, attended, _, event_date in registrations if attended)
+    assert all(registration_date < event_date for _, _, _, registration_date, event_date in registrations)
+    assert stats.rows_per_second > 0
+
+def test_sample_data_respects_capacity():
+    """Sample registrations fill an event only up to its capacity and waitlist the rest"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = seeding.open_engine(f'sqlite:///{path}', reset=True)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO event (name, date, description, capacity) "
+                              "VALUES ('Small workshop', '2030-01-01 10:00:00', 'Few seats', 3)"))
+            seeding.create_sample_data(conn, random.Random(3),
+                                       hasher=seeding.PasswordHasher(seeding.HASH_PROFILES['fast']))
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT r.status, r.attended FROM registration r JOIN event e ON e.id = r.event_id "
+                "WHERE e.name = 'Small workshop'"
+            )).all()
+    finally:
+        engine.dispose()
+        os.remove(path)
+    statuses = [status for status, _ in rows]
+    assert statuses.count('confirmed') == 3
+    assert statuses.count('waitlisted') == len(rows) - 3 > 0
+    assert not any(attended for status, attended in rows if status == 'waitlisted')
+
+def test_reseeding_keeps_free_seats():
+    """Pairs that are already registered do not use up seats when seeding again"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = seeding.open_engine(f'sqlite:///{path}', reset=True)
+    stats = seeding.SeedStats()
+    try:
+        with engine.begin() as conn:
+            event_id = conn.execute(text("INSERT INTO event (name, date, description, capacity) "
+                                         "VALUES ('Workshop', '2030-01-01 10:00:00', 'Few seats', 3) "
+                                         "RETURNING id")).scalar()
+            users = seeding.insert_students(conn, [(f'seat{i}', f'Seat {i}', 'x') for i in range(4)], stats,
+                                            seeding.PasswordHasher(seeding.HASH_PROFILES['fast']))
+            registered_at = datetime(2029, 12, 1)
+            seeding.insert_registrations(conn, [(user_id, event_id, False, registered_at) for user_id in users[:2]], stats)
+            # Seeding again over the first two registrations, with a repeated pair among the new rows
+            inserted = seeding.insert_registrations(conn, [(user_id, event_id, False, registered_at)
+                                                           for user_id in users + users[1:2]], stats, chunk_size=2)
+            statuses = dict(conn.execute(text("SELECT user_id, status FROM registration WHERE event_id = :id"),
+                                         {'id': event_id}).all())
+    finally:
+        engine.dispose()
+        os.remove(path)
+    assert inserted == 2
+    assert [statuses[user_id] for user_id in users] == ['confirmed', 'confirmed', 'confirmed', 'waitlisted']
+
+def test_username_for():
+    assert seeding.username_for("Anna Novotná") == "annanovotna"
+    assert seeding.username_for("Matěj Kříž") == "matejkriz"
+
+def test_generate_events_route():
+    """The admin route adds one upcoming event with its registrations"""
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        if admin is None:
+            return
+        admin_id = admin.id
+        before = {event.id for event in Event.query.all()}
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+    response = client.post('/admin/generate_events')
+    assert response.status_code == 302
+
+    with app.app_context():
+        new_events = Event.query.filter(Event.id.notin_(before)).all()
+        try:
+            assert len(new_events) == 1
+            assert new_events[0].date > datetime.now()
+            assert all(not registration.attended for registration in new_events[0].registrations)
+        finally:
+            for event in new_events:
+                db.session.delete(event)
+            db.session.commit()
+
+if __name__ == "__main__":
+    test_dataset_is_deterministic()
+    test_dataset_shape()
+    test_sample_data_respects_capacity()
+    test_reseeding_keeps_free_seats()
+    test_username_for()
+    test_generate_events_route()
+    print("✓ Seeding tests passed")
@@ -0,0 +1,82 @@
+"""
+Data version counter for conditional GET (ETag / Last-Modified).
+A single row in the data_version table is bumped in the same transaction
+as every write to the tracked models, so the version only moves when a
+write is committed and it is shared by every process using the database.
+Responses derived from the data carry the version in their ETag, and a
+client holding the current version gets a 304 without any other query.
+"""
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event, text
+
+BUMP_SQL = text(
+    "INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, :now) "
+    "ON CONFLICT (id) DO UPDATE SET version = version + 1, updated_at = :now"
+)
+
+def bump_data_version(connection):
+    """Increment the data version; call after writes that bypass the ORM session"""
+    connection.execute(BUMP_SQL, {'now': datetime.utcnow().replace(microsecond=0)})
+
+def current_data_version(connection):
+    """Return (version, updated_at) with updated_at as an aware UTC datetime"""
+    row = connection.execute(text("SELECT version, updated_at FROM data_version WHERE id = 1")).first()
+    if row is None:
+        return 0, datetime(1970, 1, 1, tzinfo=timezone.utc)
+    updated_at = row[1]
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    return row[0], updated_at.replace(tzinfo=timezone.utc)
+
+def track_data_version(session, models):
+    """Bump the data version whenever a flush writes an instance of one of the models"""
+    models = tuple(models)
+
+    @event.listens_for(session, 'after_flush')
+    def after_flush(session, flush_context):
+        changed = session.new | session.dirty | session.deleted
+        if any(isinstance(instance, models) for instance in changed):
+            bump_data_version(session.connection())
+
+def conditional_get(get_version, vary=None, salt=''):
+    """Decorator answering GET requests with 304 when the client's copy is current
+
+    get_version returns (version, updated_at); vary returns a string for any
+    other input the response depends on (the user, the date...). The view
+    only runs when the client's ETag or Last-Modified is out of date.
+
+    Last-Modified cannot tell the variants apart, so varying responses only
+    get an ETag and are private to the browser. It also has one-second
+    precision, so it is only sent once the second of the last write is over
+    and no later write can share its timestamp.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, updated_at = get_version()
+            etag = f"{salt}-{version}-{vary() if vary else ''}"
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = vary is None and request.if_modified_since is not None \
+                    and updated_at <= request.if_modified_since
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if vary is None and updated_at + timedelta(seconds=1) <= datetime.now(timezone.utc):
+                response.last_modified = updated_at
+            # Let browsers keep the copy but always revalidate it; shared caches must not store variants
+            response.cache_control.no_cache = True
+            if vary is not None:
+                response.cache_control.private = True
+            return response
+        return wrapper
+    return decorator